@@ -0,0 +1,234 @@
+'''Benchmarks of the pycst pipeline, runs without CST.
+
+CST is replaced by tests/fakecst.py, which simulates latency
+by FAKECST_DELAY and writes results.
+
+Usage
+-----
+python benchmarks/run.py [--size quick|full] [--output results.json]
+
+Every run is appended to the output file, by default
+benchmarks/results.json which git ignores, together with
+time, commit and platform. Timings slower than the previous
+run of the same size by more than --threshold are reported
+as regressions, with --strict the exit code is 1 then.
+'''
+import os
+import sys
+import json
+import time
+import shutil
+import contextlib
+import platform
+import argparse
+import tempfile
+import subprocess
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tests"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fakecst  # noqa: E402
+import synthetic  # noqa: E402
+from pycst import read, write  # noqa: E402
+from pycst.sweep import SweepEngine, ParallelSweep  # noqa: E402
+
+SIZES = {
+    "quick": {"parameters": [100, 2000], "results": [1000],
+              "results_1d": 200, "csv_rows": 200, "sweep_points": 8,
+              "delay": 0.05},
+    "full": {"parameters": [100, 1000, 10000, 50000],
+             "results": [1000, 10000, 100000], "results_1d": 2000,
+             "csv_rows": 2000, "sweep_points": 40, "delay": 0.1},
+}
+
+
+def best_of(function, repeat=3):
+    '''smallest wall clock time of repeat calls in seconds'''
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def make_model(folder, lines, **kwargs):
+    '''fakecst.make_model in a new folder'''
+    os.makedirs(folder)
+    return fakecst.make_model(folder, lines, **kwargs)
+
+
+def bench_eval_parfile(folder, counts):
+    results = {}
+    for count in counts:
+        path = synthetic.write_parfile(
+            os.path.join(folder, "par%d" % count, "Model.par"), count)
+        repeat = 3 if count <= 10000 else 1
+        results["eval_parfile/%d" % count] = best_of(
+            lambda: read.eval_parfile(path), repeat)
+    return results
+
+
+def bench_get_results(folder, counts, count_1d):
+    results = {}
+    for count in counts:
+        model = make_model(
+            os.path.join(folder, "results%d" % count), ["a  1"])
+        paths = synthetic.write_result_tree(model.RESULTPATH, count)
+        start = time.perf_counter()
+        found = model.get_results()
+        results["get_results/%d/cold" % count] = time.perf_counter() - start
+        assert len(found) == count
+        # just written, every file is compared by content hash
+        results["get_results/%d/rescan_racy" % count] = best_of(
+            model.get_results)
+        old = time.time() - read.RACY_SECONDS - 1
+        for path in paths:
+            os.utime(path, (old, old))
+        model.get_results()
+        # nothing changed, only the folders are scanned
+        results["get_results/%d/rescan" % count] = best_of(
+            model.get_results)
+    result = os.path.join(folder, "results_1d")
+    paths = synthetic.write_result_tree(result, count_1d, kind="rd1")
+    results["read_1d/%d" % count_1d] = best_of(
+        lambda: [read.read_1d(p) for p in paths])
+    return results
+
+
+def bench_write_csv(folder, rows):
+    results = {}
+    path = os.path.join(folder, "Results.csv")
+    row = pd.DataFrame([{"p%d" % i: float(i) for i in range(50)}])
+    start = time.perf_counter()
+    for _ in range(rows):
+        write.write_csv(path, row)
+    results["write_csv/%d_rows/per_row" % rows] = \
+        (time.perf_counter() - start) / rows
+    wide = row.assign(new_column=1.0)
+    results["write_csv/%d_rows/new_column" % rows] = best_of(
+        lambda: write.write_csv(path, wide), 1)
+    return results
+
+
+def bench_sweep(folder, points, delay):
+    results = {}
+    os.environ["FAKECST_DELAY"] = str(delay)
+    try:
+        model = make_model(
+            os.path.join(folder, "sweep"), ["a  1", "b  a*2"],
+            cst_path=fakecst.install(folder))
+        design = {"a": [float(i) for i in range(points)]}
+        start = time.perf_counter()
+        SweepEngine(model).run(design)
+        elapsed = time.perf_counter() - start
+        results["sweep/sequential/points_per_s"] = points / elapsed
+        results["sweep/sequential/overhead_per_point"] = \
+            elapsed / points - delay
+        sweeper = ParallelSweep(model, workers=4)
+        start = time.perf_counter()
+        sweeper.run(design)
+        elapsed = time.perf_counter() - start
+        sweeper.cleanup()
+        results["sweep/parallel4/points_per_s"] = points / elapsed
+    finally:
+        del os.environ["FAKECST_DELAY"]
+    return results
+
+
+@contextlib.contextmanager
+def quiet():
+    '''silences the models and the output of fakecst processes'''
+    sys.stdout.flush()
+    saved = os.dup(1)
+    with open(os.devnull, "w") as devnull:
+        # processes inherit the file descriptor, not sys.stdout
+        os.dup2(devnull.fileno(), 1)
+        try:
+            with contextlib.redirect_stdout(devnull):
+                yield
+        finally:
+            os.dup2(saved, 1)
+            os.close(saved)
+
+
+def run(size):
+    config = SIZES[size]
+    folder = tempfile.mkdtemp(prefix="pycst_bench_")
+    try:
+        results = {}
+        # messages of the models are no results
+        with quiet():
+            results.update(bench_eval_parfile(folder, config["parameters"]))
+            results.update(bench_get_results(
+                folder, config["results"], config["results_1d"]))
+            results.update(bench_write_csv(folder, config["csv_rows"]))
+            results.update(bench_sweep(
+                folder, config["sweep_points"], config["delay"]))
+    finally:
+        shutil.rmtree(folder)
+    return results
+
+
+def commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            stderr=subprocess.DEVNULL, universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def regressions(previous, current, threshold):
+    '''names and ratios of results worse than previous by threshold'''
+    found = {}
+    for name, value in current.items():
+        old = previous.get(name)
+        if not old or not value:
+            continue
+        # rates are better when higher, times when lower
+        ratio = old / value if name.endswith("_per_s") else value / old
+        if ratio > 1 + threshold:
+            found[name] = ratio
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", choices=sorted(SIZES), default="quick")
+    parser.add_argument("--output", default=os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "results.json"))
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--strict", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = run(args.size)
+    history = []
+    if os.path.isfile(args.output):
+        with open(args.output) as file:
+            history = json.load(file)
+    previous = [h for h in history if h["size"] == args.size]
+    entry = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": commit(),
+             "python": platform.python_version(),
+             "platform": platform.platform(), "size": args.size,
+             "results": results}
+    history.append(entry)
+    with open(args.output, "w") as file:
+        json.dump(history, file, indent=1)
+
+    for name, value in results.items():
+        print("%-45s %12.6f" % (name, value))
+    found = {}
+    if previous:
+        found = regressions(previous[-1]["results"], results, args.threshold)
+        for name, ratio in found.items():
+            print("REGRESSION %s: %.2fx worse than %s"
+                  % (name, ratio, previous[-1]["commit"]))
+    return 1 if found and args.strict else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
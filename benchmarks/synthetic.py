@@ -0,0 +1,89 @@
+'''Synthetic models and result trees for the benchmarks.'''
+import os
+import random
+
+
+def parfile_lines(count, depth=1000, seed=0):
+    '''Lines of a Model.par with count parameters
+
+    The parameters form chains of up to depth parameters,
+    each referring to its predecessor and sometimes to a
+    parameter of another chain. Lines are shuffled, so
+    evaluation can not rely on the order of the file.
+
+    Parameters
+    ----------
+    count : int
+        number of parameters
+    depth : int, optional
+        length of the dependency chains
+
+    Returns
+    -------
+    list
+        lines in Model.par format
+    '''
+    rng = random.Random(seed)
+    lines = []
+    for i in range(count):
+        name = "p%d" % i
+        if i % depth == 0:
+            equation = "%d.5" % rng.randrange(100)
+        elif i > depth and rng.random() < 0.1:
+            # cross reference to an earlier chain
+            equation = "p%d+sqr(p%d)/1e6" % (
+                i - 1, rng.randrange(i - i % depth))
+        else:
+            equation = "p%d*1.0001+%d" % (i - 1, rng.randrange(10))
+        lines.append("%s  %s  synthetic parameter" % (name, equation))
+    rng.shuffle(lines)
+    return lines
+
+
+def write_parfile(path, count, depth=1000, seed=0):
+    '''Writes parfile_lines to path'''
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, "w") as file:
+        file.write("\n".join(parfile_lines(count, depth, seed)) + "\n")
+    return path
+
+
+def write_result_tree(folder, count, kind="rd0", rows=100, per_folder=500,
+                      seed=0):
+    '''Writes count synthetic result files below folder
+
+    Parameters
+    ----------
+    folder : str
+        Result folder
+    count : int
+        number of files
+    kind : str, optional
+        "rd0" for one value per file,
+        "rd1" for 1D results with rows rows
+    per_folder : int, optional
+        files per subfolder
+
+    Returns
+    -------
+    list
+        written paths
+    '''
+    rng = random.Random(seed)
+    paths = []
+    for i in range(count):
+        sub = os.path.join(folder, "group%d" % (i // per_folder))
+        os.makedirs(sub, exist_ok=True)
+        path = os.path.join(sub, "result%d.%s" % (i, kind))
+        with open(path, "w") as file:
+            if kind == "rd0":
+                file.write(repr(rng.uniform(1e8, 1e9)) + "\n")
+            else:
+                file.write('#"Frequency / GHz"\t"S1,1"\n')
+                file.write("#" + "-" * 40 + "\n")
+                file.write("".join("%.6f\t%.6f\n" % (j / rows, rng.random())
+                                   for j in range(rows)))
+        paths.append(path)
+    return paths
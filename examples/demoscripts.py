@@ -1,8 +1,8 @@
-from multiprocessing import pool
 import sys
 sys.path.append("C:\\Users\\Simon\\Documents\\CST")
 # print(sys.path)
 from pycst import pycst
+from pycst.sweep import ParallelSweep
 
 
 def collapsedict(dct: dict, i: int):
@@ -40,36 +40,19 @@ def sweep():
 
 
 def sweep_parallel():
-    # this can also be automated
-    p0 = "C:/Users/Simon/Desktop/Test2018/file1.cst"
-    p1 = "C:/Users/Simon/Desktop/Test2018/file2.cst"
-    p2 = "C:/Users/Simon/Desktop/Test2018/file3.cst"
-    files = [p0, p1, p2]
-    p = pool(len(files))
-    p.map(do_something, files)
-    return
+    model = pycst.CstModel(
+        "C:/Users/Simon/Desktop/Test2018/testfile2018.cst",
+        autoanswer="n")
 
+    sweep_dict = {"sp_Tuner": [11, 20, 55],
+                  "sp_Shell_height": [10, 10, 10]
+                  }
+    # one workspace per licence token
+    sweeper = ParallelSweep(model, workers=3)
+    results = sweeper.run(sweep_dict)
+    print(results)
+    sweeper.cleanup()
 
-def do_something(path: str):
-    model = pycst.CstModel(path)
-    model.csv_name = "ThreeFileResults.csv"
-    if "file0" in path:
-        sweep_dict = {
-            "sp_Tuner": 11,
-            "sp_Shell_height": 10,
-        }
-    elif "file1" in path:
-        sweep_dict = {
-            "sp_Tuner": 20,
-            "sp_Shell_height": 10,
-        }
-    elif "file2" in path:
-        sweep_dict = {
-            "sp_Tuner": 55,
-            "sp_Shell_height": 10,
-        }
-    model.edit_parameters(sweep_dict)
-    model.cst_run_eigenmode()
 
 # show_params()
 
@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import shutil
+import sqlite3
+import hashlib
+import threading
+from contextlib import closing
+
+
+def parameter_key(parameters: dict, flags="", model=""):
+    '''Canonical hash of a parameter set, solver flags and model
+
+    Note
+    ----
+    Parameternames are compared case-insensitive
+    and values as float, so the key does not depend
+    on order, spelling or int and float representations.
+
+    Parameters
+    ----------
+    parameters: dict
+        keys: Parameternames
+        values: value or {"equation": str, "value": float}
+        as returned by CstModel.get_parameters
+    flags : str, optional
+        Solver flags, refer to CstModel._run
+    model : str, optional
+        Identity of the model, refer to CstModel.cache_identity
+
+    Returns
+    -------
+    str
+        hex digest
+    '''
+    items = []
+    for name, value in parameters.items():
+        if isinstance(value, dict):
+            value = value["value"]
+        items.append((name.lower(), repr(float(value))))
+    items.sort()
+    canonical = json.dumps([items, " ".join(flags.split()), model])
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _folder_size(path):
+    size = 0
+    for _path, subdirs, files in os.walk(path):
+        for name in files:
+            size += os.path.getsize(os.path.join(_path, name))
+    return size
+
+
+class ResultCache:
+    '''Persistent cache of solver results keyed by parameter set.
+
+    Results are stored in a SQLite database and survive
+    restarts. Least recently used entries are evicted
+    when max_entries or max_bytes is exceeded.
+
+    Parameters
+    ----------
+    path : str
+        Path of the SQLite database, created if missing.
+        Result folders are stored in path + ".d/".
+    max_entries : int, optional
+        Maximum number of cached parameter sets.
+    max_bytes : int, optional
+        Maximum size of results and stored folders.
+    store_folders : bool, optional
+        Wether the raw Result folder is stored as well.
+
+    Attributes
+    ----------
+    hits : int
+        Number of get calls finding an entry.
+    misses : int
+        Number of get calls finding no entry.
+
+    '''
+
+    def __init__(self, path, max_entries=None, max_bytes=None,
+                 store_folders=False):
+        self.path = path
+        self.folder = path + ".d/"
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.store_folders = store_folders
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, results TEXT NOT NULL, "
+                "folder INTEGER NOT NULL, size INTEGER NOT NULL, "
+                "accessed REAL NOT NULL)")
+
+    def _connect(self):
+        return _Connection(self.path)
+
+    def __len__(self):
+        with self._connect() as db:
+            return db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def __contains__(self, key):
+        with self._connect() as db:
+            return db.execute(
+                "SELECT 1 FROM results WHERE key = ?", (key,)
+            ).fetchone() is not None
+
+    def key(self, parameters: dict, flags="", model=""):
+        '''Refer to parameter_key'''
+        return parameter_key(parameters, flags, model)
+
+    def get(self, key):
+        '''Returns cached results of key or None
+
+        Returns
+        -------
+        dict or None
+            keys: str, result names
+            values: float, result values
+        '''
+        with self._lock, self._connect() as db:
+            row = db.execute(
+                "SELECT results FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            db.execute(
+                "UPDATE results SET accessed = ? WHERE key = ?",
+                (time.time(), key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, results: dict, folder=None):
+        '''Stores results of key
+
+        Parameters
+        ----------
+        key : str
+            Refer to parameter_key.
+        results : dict
+            As returned by CstModel.get_results.
+        folder : str, optional
+            Result folder, only stored if store_folders is set.
+        '''
+        data = json.dumps(results)
+        size = len(data)
+        stored = bool(folder and self.store_folders and
+                      os.path.isdir(folder))
+        if stored:
+            target = self.folder + key
+            if os.path.isdir(target):
+                shutil.rmtree(target)
+            shutil.copytree(folder, target)
+            size += _folder_size(target)
+        with self._lock, self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                (key, data, int(stored), size, time.time()))
+        self.evict()
+
+    def restore_folder(self, key, target):
+        '''Replaces target by the stored Result folder of key
+
+        Returns
+        -------
+        bool
+            False if no folder is stored for key
+        '''
+        source = self.folder + key
+        if not os.path.isdir(source):
+            return False
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        shutil.copytree(source, target)
+        return True
+
+    def evict(self):
+        '''Removes least recently used entries exceeding the limits'''
+        with self._lock, self._connect() as db:
+            rows = db.execute(
+                "SELECT key, size FROM results ORDER BY accessed DESC"
+            ).fetchall()
+            total = sum(size for _, size in rows)
+            evicted = []
+            while rows and (
+                    (self.max_entries is not None and
+                     len(rows) > self.max_entries) or
+                    (self.max_bytes is not None and total > self.max_bytes)):
+                key, size = rows.pop()
+                total -= size
+                evicted.append(key)
+            db.executemany(
+                "DELETE FROM results WHERE key = ?",
+                [(key,) for key in evicted])
+        for key in evicted:
+            if os.path.isdir(self.folder + key):
+                shutil.rmtree(self.folder + key)
+
+    def clear(self):
+        '''Removes all entries'''
+        with self._lock, self._connect() as db:
+            db.execute("DELETE FROM results")
+        if os.path.isdir(self.folder):
+            shutil.rmtree(self.folder)
+
+
+class _Connection:
+    '''SQLite connection committing and closing on exit'''
+
+    def __init__(self, path):
+        self.path = path
+
+    def __enter__(self):
+        self._db = sqlite3.connect(self.path, timeout=60)
+        return self._db
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        with closing(self._db):
+            if exc_type is None:
+                self._db.commit()
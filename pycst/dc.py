@@ -0,0 +1,327 @@
+import time
+import threading
+import collections
+import pandas as pd
+from pycst.runner import EXITCODE_SUCCESS, EXITCODE_FAILED, \
+    EXITCODE_ABORTEDBYUSER
+from pycst.sweep import SweepEngine, ParallelSweep, _run_design
+
+
+class Controller:
+    '''State of a distributed computing main controller.
+
+    Parameters
+    ----------
+    address : str
+        "maincontroller:port" like "142.2.245.136:360000"
+    capacity : int, optional
+        Number of points run on the controller at the same time.
+
+    Attributes
+    ----------
+    running : int
+        Points currently running on the controller.
+    done : int
+        Points the controller finished successfully.
+    failures : int
+        Failed points since the last success.
+    failed : int
+        All failed points.
+    down_until : float
+        time.monotonic() till the controller gets no points.
+
+    '''
+
+    def __init__(self, address, capacity=1):
+        assert capacity >= 1
+        self.address = address
+        self.capacity = capacity
+        self.running = 0
+        self.done = 0
+        self.failures = 0
+        self.failed = 0
+        self.down_until = 0.0
+        # counts successes, failures before one are no longer in a row
+        self._streak = 0
+
+    def __repr__(self):
+        return "Controller(%r, capacity=%d)" % (self.address, self.capacity)
+
+    @property
+    def healthy(self):
+        '''False while the controller is taken out after failures'''
+        return time.monotonic() >= self.down_until
+
+    @property
+    def load(self):
+        '''fraction of the capacity in use'''
+        return self.running / self.capacity
+
+
+def controllers_from(controllers):
+    '''Converts controllers to a list of Controller
+
+    Parameters
+    ----------
+    controllers : dict, list or str
+        {"maincontroller:port": capacity},
+        list of addresses, (address, capacity) tuples
+        or :obj:`Controller`, or a single address
+
+    Returns
+    -------
+    list
+        list of :obj:`Controller`
+    '''
+    if isinstance(controllers, str):
+        controllers = [controllers]
+    elif isinstance(controllers, dict):
+        controllers = list(controllers.items())
+    result = []
+    for controller in controllers:
+        if isinstance(controller, str):
+            controller = Controller(controller)
+        elif not isinstance(controller, Controller):
+            controller = Controller(*controller)
+        result.append(controller)
+    if not result:
+        raise ValueError("No controllers given")
+    addresses = [c.address for c in result]
+    if len(set(addresses)) != len(addresses):
+        raise ValueError("Controllers given twice: %s" % addresses)
+    return result
+
+
+class DcDispatcher:
+    '''Spreads design points over several DC main controllers.
+
+    Every point is run with "-withdc" on the least loaded
+    healthy controller with free capacity, each concurrently
+    running point on its own clone of the model, refer to
+    ParallelSweep.
+
+    A point failing on a controller is moved to a controller
+    it has not failed on yet. A controller failing max_failures
+    points in a row is taken out for cooldown seconds,
+    its points go to the others meanwhile. A point failing
+    on all healthy controllers keeps its returncode and
+    its failures no longer count against the controllers,
+    a controller already taken out stays out till its
+    cooldown ends.
+
+    Parameters
+    ----------
+    model : :obj:`CstModel`
+        Model to clone, stays unchanged.
+    controllers : dict, list or str
+        Refer to controllers_from, e.g.
+        {"10.0.0.1:36000": 4, "10.0.0.2:36000": 2}
+    max_failures : int, optional
+        Failed points in a row till a controller is taken out.
+    cooldown : int or float, optional
+        Seconds a failed controller is taken out.
+    workspace, reuse : optional
+        Refer to ParallelSweep.
+    timeout, flags, combine : optional
+        Passed to SweepEngine of every clone.
+
+    Attributes
+    ----------
+    controllers : list
+        list of :obj:`Controller`
+
+    '''
+
+    def __init__(self, model, controllers, max_failures=2, cooldown=600,
+                 workspace=None, reuse=True, timeout=None, flags=None,
+                 combine=True):
+        self.model = model
+        self.controllers = controllers_from(controllers)
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self._pool = ParallelSweep(
+            model, workers=sum(c.capacity for c in self.controllers),
+            workspace=workspace, reuse=reuse)
+        self._engine_kwargs = dict(
+            timeout=timeout, flags=flags, combine=combine)
+        self._condition = threading.Condition()
+
+    def status(self):
+        '''Load and failures of every controller
+
+        Returns
+        -------
+        pandas.DataFrame
+            one row per controller with address, capacity,
+            running, done, failed and healthy
+        '''
+        with self._condition:
+            return pd.DataFrame([
+                {"address": c.address, "capacity": c.capacity,
+                 "running": c.running, "done": c.done,
+                 "failed": c.failed, "healthy": c.healthy}
+                for c in self.controllers])
+
+    def cleanup(self):
+        '''Removes all workspaces'''
+        self._pool.cleanup()
+
+    def _acquire(self, tried):
+        '''reserves a controller for a point
+
+        Returns
+        -------
+        :obj:`Controller` or None
+            None if all healthy controllers were tried
+        '''
+        while True:
+            candidates = [c for c in self.controllers
+                          if c.healthy and c.address not in tried]
+            if not candidates:
+                return None
+            free = [c for c in candidates if c.running < c.capacity]
+            if free:
+                controller = min(free, key=lambda c: c.load)
+                controller.running += 1
+                return controller
+            # wakes up on finished points or when a cooldown ends
+            down = [c.down_until for c in self.controllers if not c.healthy]
+            wait = min(down) - time.monotonic() if down else None
+            self._condition.wait(wait)
+
+    def _release(self, controller, returncode):
+        controller.running -= 1
+        if returncode in (EXITCODE_SUCCESS, EXITCODE_ABORTEDBYUSER):
+            if returncode == EXITCODE_SUCCESS:
+                controller.done += 1
+            controller.failures = 0
+            controller._streak += 1
+            return False
+        controller.failed += 1
+        controller.failures += 1
+        if controller.failures >= self.max_failures and controller.healthy:
+            controller.down_until = time.monotonic() + self.cooldown
+            self.model.message(
+                str(self.model), "controller", controller.address,
+                "failed", controller.failures, "times, taken out for",
+                self.cooldown, "s")
+        return True
+
+    def _acquit(self, blamed):
+        '''takes back failures of a point failing everywhere
+
+        Parameters
+        ----------
+        blamed : list
+            (controller, streak) of every failure of the point,
+            failures followed by a success were reset already
+        '''
+        for controller, streak in blamed:
+            if controller._streak == streak and controller.failures:
+                controller.failures -= 1
+        self._condition.notify_all()
+
+    def evaluate(self, points, journal=None):
+        '''Runs all points on the controllers
+
+        Parameters
+        ----------
+        points : list
+            list of {"parametername": value} dicts
+        journal : :obj:`SweepJournal`, optional
+            Records the state of every point.
+
+        Returns
+        -------
+        list
+            one dict per point in order of points,
+            refer to SweepEngine.evaluate
+        '''
+        todo = collections.deque(
+            (idx, point, []) for idx, point in enumerate(points))
+        rows = [None] * len(points)
+        errors = []
+        remaining = [len(points)]
+        # last failed row of points waiting for another controller
+        last = {}
+
+        def finish(idx, point, row):
+            if journal is not None:
+                journal.finished(point, row)
+            rows[idx] = row
+            remaining[0] -= 1
+            self._condition.notify_all()
+
+        def work(clone):
+            engine = SweepEngine(clone, **self._engine_kwargs)
+            with self._condition:
+                while not errors and remaining[0]:
+                    if not todo:
+                        self._condition.wait()
+                        continue
+                    idx, point, blamed = todo.popleft()
+                    controller = self._acquire(
+                        {c.address for c, _ in blamed})
+                    if controller is None:
+                        # failed on every healthy controller
+                        self._acquit(blamed)
+                        row = last.pop(idx, None)
+                        if row is None:
+                            self.model.message(
+                                str(self.model), "no healthy controller")
+                            row = dict(point, returncode=EXITCODE_FAILED)
+                        finish(idx, point, row)
+                        continue
+                    if journal is not None and not blamed:
+                        journal.running(point)
+                    engine.dc = controller.address
+                    self._condition.release()
+                    try:
+                        row = engine.evaluate([point])[0]
+                    except Exception as e:
+                        row = None
+                        errors.append(e)
+                    finally:
+                        self._condition.acquire()
+                    if row is None:
+                        controller.running -= 1
+                        self._condition.notify_all()
+                        return
+                    if self._release(controller, row["returncode"]):
+                        blamed.append((controller, controller._streak))
+                        last[idx] = row
+                        todo.append((idx, point, blamed))
+                        self._condition.notify_all()
+                    else:
+                        finish(idx, point, row)
+
+        clones = self._pool.clones()[:max(1, len(points))]
+        threads = [threading.Thread(target=work, args=(c,)) for c in clones]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if errors:
+            raise errors[0]
+        return rows
+
+    def run(self, design, journal=None):
+        '''Runs all points of design and merges the results
+
+        Parameters
+        ----------
+        design : pandas.DataFrame, dict or list
+            Refer to design_matrix.
+        journal : :obj:`SweepJournal`, str or bool, optional
+            Refer to SweepEngine.run.
+
+        Returns
+        -------
+        pandas.DataFrame
+            one row per point, refer to SweepEngine.evaluate
+        '''
+        return _run_design(self, design, journal)
+
+    def restoring(self, names=()):
+        '''Refer to ParallelSweep.restoring'''
+        return self._pool.restoring(names)
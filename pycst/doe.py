@@ -0,0 +1,348 @@
+import itertools
+import numpy as np
+import pandas as pd
+import pycst.expression as expression
+
+# primitive polynomials and initial direction numbers of
+# the Sobol sequence for dimensions 2 to 21 by Joe and Kuo,
+# (degree s, coefficients a, [m_1 .. m_s])
+_SOBOL = [
+    (1, 0, [1]),
+    (2, 1, [1, 3]),
+    (3, 1, [1, 3, 1]),
+    (3, 2, [1, 1, 1]),
+    (4, 1, [1, 1, 3, 3]),
+    (4, 4, [1, 3, 5, 13]),
+    (5, 2, [1, 1, 5, 5, 17]),
+    (5, 4, [1, 1, 5, 5, 5]),
+    (5, 7, [1, 1, 7, 11, 19]),
+    (5, 11, [1, 1, 5, 1, 1]),
+    (5, 13, [1, 1, 1, 3, 11]),
+    (5, 14, [1, 3, 5, 5, 31]),
+    (6, 1, [1, 3, 3, 9, 7, 49]),
+    (6, 13, [1, 1, 1, 15, 21, 21]),
+    (6, 16, [1, 3, 1, 13, 27, 49]),
+    (6, 19, [1, 1, 1, 15, 7, 5]),
+    (6, 22, [1, 3, 1, 15, 13, 25]),
+    (6, 25, [1, 1, 5, 5, 19, 61]),
+    (7, 1, [1, 3, 7, 11, 23, 15, 103]),
+    (7, 4, [1, 3, 7, 13, 13, 15, 69]),
+]
+_BITS = 32
+
+_PRIMES = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53,
+           59, 61, 67, 71, 73, 79, 83, 89, 97, 101, 103, 107, 109, 113]
+
+
+def _bounds(bounds):
+    '''names and (dims, 2) array of bounds'''
+    names = list(bounds)
+    if not names:
+        raise ValueError("No parameters given")
+    array = np.array([bounds[n] for n in names], dtype=float)
+    if array.shape != (len(names), 2) or \
+            np.any(array[:, 0] >= array[:, 1]):
+        raise ValueError("Bounds have to be (lower, upper) with lower < upper")
+    return names, array
+
+
+def _scale(names, bounds, u):
+    '''DataFrame of unit cube points u scaled to bounds'''
+    values = bounds[:, 0] + u * (bounds[:, 1] - bounds[:, 0])
+    return pd.DataFrame(values, columns=names)
+
+
+def full_factorial(bounds, levels=3):
+    '''All combinations of equidistant levels of every parameter
+
+    Parameters
+    ----------
+    bounds : dict
+        {"parametername": (lower, upper)}
+    levels : int or dict, optional
+        Number of levels, for all or {"parametername": int}
+        for each parameter.
+
+    Returns
+    -------
+    pandas.DataFrame
+        columns: Parameternames
+        rows: design points, refer to sweep.design_matrix
+    '''
+    names, array = _bounds(bounds)
+    if isinstance(levels, int):
+        levels = {n: levels for n in names}
+    axes = []
+    for name, (lower, upper) in zip(names, array):
+        if levels[name] < 1:
+            raise ValueError("%r needs at least one level" % name)
+        if levels[name] == 1:
+            axes.append([(lower + upper) / 2])
+        else:
+            axes.append(np.linspace(lower, upper, levels[name]))
+    return pd.DataFrame(list(itertools.product(*axes)), columns=names)
+
+
+def latin_hypercube(bounds, n, seed=None):
+    '''Latin hypercube sample
+
+    Every parameter range is split into n intervals,
+    each of which holds exactly one point.
+
+    Parameters
+    ----------
+    bounds : dict
+        {"parametername": (lower, upper)}
+    n : int
+        Number of points.
+    seed : int, optional
+        Seed of the random numbers.
+
+    Returns
+    -------
+    pandas.DataFrame
+        refer to full_factorial
+    '''
+    names, array = _bounds(bounds)
+    rng = np.random.default_rng(seed)
+    dims = len(names)
+    u = (np.argsort(rng.random((n, dims)), axis=0)
+         + rng.random((n, dims))) / n
+    return _scale(names, array, u)
+
+
+def _sobol_directions(dims):
+    '''(dims, _BITS) direction numbers as left aligned integers'''
+    if dims > len(_SOBOL) + 1:
+        raise ValueError("Sobol sequence supports up to %d parameters, "
+                         "use halton" % (len(_SOBOL) + 1))
+    V = np.zeros((dims, _BITS), dtype=np.uint64)
+    V[0] = [1 << (_BITS - 1 - k) for k in range(_BITS)]
+    for d in range(1, dims):
+        s, a, m = _SOBOL[d - 1]
+        v = [m[k] << (_BITS - 1 - k) for k in range(s)]
+        for k in range(s, _BITS):
+            value = v[k - s] ^ (v[k - s] >> s)
+            for j in range(1, s):
+                if (a >> (s - 1 - j)) & 1:
+                    value ^= v[k - j]
+            v.append(value)
+        V[d] = v
+    return V
+
+
+def sobol(bounds, n, seed=None, scramble=True, skip=0):
+    '''Sobol low discrepancy sequence
+
+    Note
+    ----
+    The balance properties hold for n and skip
+    being powers of 2.
+
+    Parameters
+    ----------
+    bounds : dict
+        {"parametername": (lower, upper)}, up to 21 parameters
+    n : int
+        Number of points.
+    seed : int, optional
+        Seed of the scrambling.
+    scramble : bool, optional
+        Randomizes the sequence by a digital shift,
+        without the first point is the lower corner.
+    skip : int, optional
+        Number of leading points skipped, e.g.
+        to continue a sequence.
+
+    Returns
+    -------
+    pandas.DataFrame
+        refer to full_factorial
+    '''
+    names, array = _bounds(bounds)
+    V = _sobol_directions(len(names))
+    index = np.arange(skip, skip + n, dtype=np.uint64)
+    gray = index ^ (index >> np.uint64(1))
+    X = np.zeros((n, len(names)), dtype=np.uint64)
+    for k in range(_BITS):
+        bit = (gray >> np.uint64(k)) & np.uint64(1)
+        X ^= bit[:, None] * V[:, k]
+    if scramble:
+        rng = np.random.default_rng(seed)
+        X ^= rng.integers(0, 1 << _BITS, size=len(names), dtype=np.uint64)
+    return _scale(names, array, X / float(1 << _BITS))
+
+
+def _radical_inverse(index, base, permutation=None):
+    '''van der Corput values of index in base'''
+    result = np.zeros(len(index))
+    factor = 1.0 / base
+    index = index.copy()
+    while np.any(index > 0):
+        digit = index % base
+        if permutation is not None:
+            digit = permutation[digit]
+        result += digit * factor
+        index //= base
+        factor /= base
+    return result
+
+
+def halton(bounds, n, seed=None, scramble=True, skip=0):
+    '''Halton low discrepancy sequence
+
+    Note
+    ----
+    Supports more parameters than sobol,
+    but is less uniform in many dimensions without scrambling.
+
+    Parameters
+    ----------
+    bounds : dict
+        {"parametername": (lower, upper)}, up to 30 parameters
+    n : int
+        Number of points.
+    seed : int, optional
+        Seed of the scrambling.
+    scramble : bool, optional
+        Permutes the digits of every base randomly.
+    skip : int, optional
+        Number of leading points skipped, e.g.
+        to continue a sequence.
+
+    Returns
+    -------
+    pandas.DataFrame
+        refer to full_factorial
+    '''
+    names, array = _bounds(bounds)
+    if len(names) > len(_PRIMES):
+        raise ValueError("Halton sequence supports up to %d parameters"
+                         % len(_PRIMES))
+    rng = np.random.default_rng(seed)
+    # the first point of the unscrambled sequence is 0
+    index = np.arange(skip + 1, skip + n + 1)
+    u = np.empty((n, len(names)))
+    for d, base in enumerate(_PRIMES[:len(names)]):
+        permutation = None
+        if scramble:
+            # 0 stays 0, the trailing zeros of index are no digits
+            permutation = np.concatenate(
+                [[0], 1 + rng.permutation(base - 1)])
+        u[:, d] = _radical_inverse(index, base, permutation)
+    return _scale(names, array, u)
+
+
+METHODS = {
+    "sobol": sobol,
+    "halton": halton,
+    "lhs": latin_hypercube,
+}
+
+
+def feasible(design, constraints, graph=None):
+    '''Checks constraints for every point of design
+
+    Parameters
+    ----------
+    design : pandas.DataFrame
+        columns: driving Parameternames
+    constraints : list
+        Equations in the syntax of the parfile, like "gap > 2*r",
+        using Parameternames of design and graph, or callables
+        taking a DataFrame of the design and the derived parameters
+        depending on it, returning bools per row.
+    graph : :obj:`ParameterGraph`, optional
+        Parameters of the model, derived parameters are
+        computed for every point by ParameterGraph.evaluate_design.
+
+    Returns
+    -------
+    numpy.ndarray
+        bool per point, True if all constraints hold
+
+    Raises
+    ------
+    NameError
+        if a constraint uses an unknown name
+    '''
+    design = pd.DataFrame(design)
+    namespace = dict(expression.CONSTANTS)
+    if graph is not None:
+        values = graph.evaluate_design(design)
+        namespace.update(
+            {n.lower(): v for n, v in graph.values.items()})
+    else:
+        values = design
+    namespace.update({c.lower(): values[c].to_numpy() for c in values})
+    ok = np.ones(len(design), dtype=bool)
+    for constraint in constraints:
+        if callable(constraint):
+            result = constraint(values)
+        else:
+            code = expression.Expression(constraint)
+            unknown = code.names - namespace.keys()
+            if unknown:
+                raise NameError("Constraint %r uses undefined name(s) %s"
+                                % (constraint, ", ".join(sorted(unknown))))
+            result = code.vectorized(namespace)
+        ok &= np.broadcast_to(np.asarray(result, dtype=bool), ok.shape)
+    return ok
+
+
+def sample(bounds, n, method="sobol", constraints=(), graph=None,
+           seed=None, max_factor=64):
+    '''Design of n feasible points
+
+    Note
+    ----
+    Points violating constraints are dropped and further
+    points are drawn until n are feasible.
+
+    Parameters
+    ----------
+    bounds : dict
+        {"parametername": (lower, upper)}
+    n : int
+        Number of points.
+    method : str, optional
+        "sobol", "halton" or "lhs"
+    constraints : list, optional
+        refer to feasible
+    graph : :obj:`ParameterGraph`, optional
+        refer to feasible
+    seed : int, optional
+        Seed of the random numbers.
+    max_factor : int, optional
+        At most max_factor*n points are drawn.
+
+    Returns
+    -------
+    pandas.DataFrame
+        columns: Parameternames
+        rows: design points, plugs into SweepEngine.run,
+        ParallelSweep.run and sweep.design_matrix
+
+    Raises
+    ------
+    ValueError
+        if less than n of max_factor*n points are feasible
+    '''
+    generate = METHODS[method]
+    if seed is None:
+        # the same scrambling for every draw
+        seed = int(np.random.default_rng().integers(2 ** 32))
+    drawn = n
+    while True:
+        design = generate(bounds, drawn, seed=seed)
+        if not constraints:
+            return design
+        ok = feasible(design, constraints, graph)
+        if ok.sum() >= n:
+            return design[ok].head(n).reset_index(drop=True)
+        if drawn >= max_factor * n:
+            raise ValueError("Only %d of %d points satisfy the constraints"
+                             % (ok.sum(), drawn))
+        # sequences keep their first points for the same seed,
+        # lhs is drawn anew
+        drawn *= 2
@@ -0,0 +1,377 @@
+import re
+import math
+import functools
+import numpy as np
+
+# functions of CST's parameter equations, evaluated on floats
+FUNCTIONS = {
+    "abs": abs,
+    "min": min,
+    "max": max,
+    "round": round,
+    "sqr": math.sqrt,
+    "sqrt": math.sqrt,
+    "exp": math.exp,
+    "log": math.log,
+    "ln": math.log,
+    "log10": math.log10,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "atn": math.atan,
+    "atan": math.atan,
+    "asin": math.asin,
+    "acos": math.acos,
+    "sinh": math.sinh,
+    "cosh": math.cosh,
+    "tanh": math.tanh,
+    "int": math.floor,
+    "fix": math.trunc,
+    "sgn": lambda x: (x > 0) - (x < 0),
+}
+
+# the same functions evaluated on numpy arrays
+VECTOR_FUNCTIONS = {
+    "abs": np.abs,
+    "min": lambda *args: functools.reduce(np.minimum, args),
+    "max": lambda *args: functools.reduce(np.maximum, args),
+    "round": lambda x, digits=0: np.round(x, int(digits)),
+    "sqr": np.sqrt,
+    "sqrt": np.sqrt,
+    "exp": np.exp,
+    "log": np.log,
+    "ln": np.log,
+    "log10": np.log10,
+    "sin": np.sin,
+    "cos": np.cos,
+    "tan": np.tan,
+    "atn": np.arctan,
+    "atan": np.arctan,
+    "asin": np.arcsin,
+    "acos": np.arccos,
+    "sinh": np.sinh,
+    "cosh": np.cosh,
+    "tanh": np.tanh,
+    "int": np.floor,
+    "fix": np.trunc,
+    "sgn": np.sign,
+}
+
+CONSTANTS = {"pi": math.pi}
+
+_TOKENS = re.compile(r'''
+    (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+    |(?P<name>[A-Za-z_][A-Za-z0-9_]*)
+    |(?P<op>\*\*|<=|>=|<>|[-+*/^(),<>=])
+    |(?P<space>\s+)
+''', re.VERBOSE)
+
+_COMPARISONS = {
+    "<": lambda a, b: a < b,
+    ">": lambda a, b: a > b,
+    "<=": lambda a, b: a <= b,
+    ">=": lambda a, b: a >= b,
+    "=": lambda a, b: a == b,
+    "<>": lambda a, b: a != b,
+}
+
+
+def tokenize(equation: str):
+    '''Splits a parameter equation into tokens
+
+    Parameters
+    ----------
+    equation: str
+        equation as written in the parfile
+
+    Returns
+    -------
+    list
+        list of (kind, text) tuples,
+        kind is one of "number", "name" or "op"
+    '''
+    tokens = []
+    pos = 0
+    while pos < len(equation):
+        match = _TOKENS.match(equation, pos)
+        if match is None:
+            raise ValueError(
+                "Invalid character %r in equation %r"
+                % (equation[pos], equation)
+            )
+        if match.lastgroup != "space":
+            tokens.append((match.lastgroup, match.group()))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    '''Recursive descent parser building tuples as nodes
+
+    comparison := sum [("<" | ">" | "<=" | ">=" | "=" | "<>") sum]
+    sum        := product (("+" | "-") product)*
+    product    := unary (("*" | "/") unary)*
+    unary      := ("+" | "-") unary | power
+    power      := atom (("^" | "**") exponent)*
+    exponent   := ("+" | "-") exponent | atom
+    atom       := number | name | name "(" args ")" | "(" comparison ")"
+    '''
+
+    def __init__(self, equation):
+        self.equation = equation
+        self.tokens = tokenize(equation)
+        self.pos = 0
+
+    def error(self, message):
+        return SyntaxError("%s in equation %r" % (message, self.equation))
+
+    def peek(self):
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return (None, None)
+
+    def take(self, text=None):
+        kind, value = self.peek()
+        if kind is None or (text is not None and value != text):
+            raise self.error("Expected %r" % (text or "operand"))
+        self.pos += 1
+        return kind, value
+
+    def parse(self):
+        if not self.tokens:
+            raise self.error("Empty")
+        node = self.comparison()
+        if self.pos != len(self.tokens):
+            raise self.error("Unexpected %r" % self.peek()[1])
+        return node
+
+    def comparison(self):
+        node = self.sum()
+        kind, op = self.peek()
+        if kind == "op" and op in _COMPARISONS:
+            self.pos += 1
+            node = ("cmp", op, node, self.sum())
+        return node
+
+    def sum(self):
+        terms = [(1, self.product())]
+        while self.peek()[1] in ("+", "-"):
+            sign = 1 if self.take()[1] == "+" else -1
+            terms.append((sign, self.product()))
+        return terms[0][1] if len(terms) == 1 else ("sum", terms)
+
+    def product(self):
+        factors = [("*", self.unary())]
+        while self.peek()[1] in ("*", "/"):
+            factors.append((self.take()[1], self.unary()))
+        return factors[0][1] if len(factors) == 1 else ("product", factors)
+
+    def unary(self):
+        op = self.peek()[1]
+        if op in ("+", "-"):
+            self.pos += 1
+            node = self.unary()
+            return ("neg", node) if op == "-" else node
+        return self.power()
+
+    def power(self):
+        node = self.atom()
+        # left associative like in VBA, 2^3^2 = 64
+        while self.peek()[1] in ("^", "**"):
+            self.pos += 1
+            node = ("pow", node, self.exponent())
+        return node
+
+    def exponent(self):
+        op = self.peek()[1]
+        if op in ("+", "-"):
+            self.pos += 1
+            node = self.exponent()
+            return ("neg", node) if op == "-" else node
+        return self.atom()
+
+    def atom(self):
+        kind, text = self.take()
+        if kind == "number":
+            return ("num", float(text))
+        if kind == "name":
+            name = text.lower()
+            if self.peek()[1] != "(":
+                return ("name", name)
+            if name not in FUNCTIONS:
+                raise NameError("Unknown function %r in equation %r"
+                                % (text, self.equation))
+            self.take("(")
+            args = []
+            if self.peek()[1] != ")":
+                args.append(self.comparison())
+                while self.peek()[1] == ",":
+                    self.pos += 1
+                    args.append(self.comparison())
+            self.take(")")
+            return ("call", name, args)
+        if text == "(":
+            node = self.comparison()
+            self.take(")")
+            return node
+        raise self.error("Unexpected %r" % text)
+
+
+def _build(node, functions, names):
+    '''closure evaluating node with functions, collects names'''
+    kind = node[0]
+    if kind == "num":
+        value = node[1]
+        return lambda env: value
+    if kind == "name":
+        name = node[1]
+        names.add(name)
+        return lambda env: env[name]
+    if kind == "neg":
+        operand = _build(node[1], functions, names)
+        return lambda env: -operand(env)
+    if kind == "pow":
+        base = _build(node[1], functions, names)
+        exponent = _build(node[2], functions, names)
+        return lambda env: base(env) ** exponent(env)
+    if kind == "cmp":
+        compare = _COMPARISONS[node[1]]
+        left = _build(node[2], functions, names)
+        right = _build(node[3], functions, names)
+        # True is -1 in VBA
+        return lambda env: compare(left(env), right(env)) * -1.0
+    if kind == "call":
+        function = functions[node[1]]
+        args = [_build(a, functions, names) for a in node[2]]
+        if len(args) == 1:
+            arg = args[0]
+            return lambda env: function(arg(env))
+        return lambda env: function(*[a(env) for a in args])
+    if kind == "sum":
+        terms = [(sign, _build(n, functions, names)) for sign, n in node[1]]
+
+        def add(env):
+            # left to right like CST, a-b+c is not a+c-b in floats
+            total = terms[0][1](env)
+            for sign, term in terms[1:]:
+                if sign > 0:
+                    total = total + term(env)
+                else:
+                    total = total - term(env)
+            return total
+        return add
+    if kind == "product":
+        factors = [(op, _build(n, functions, names)) for op, n in node[1]]
+
+        def multiply(env):
+            result = factors[0][1](env)
+            for op, factor in factors[1:]:
+                if op == "*":
+                    result = result * factor(env)
+                else:
+                    result = result / factor(env)
+            return result
+        return multiply
+    raise ValueError("Unknown node %r" % (kind,))
+
+
+def _fold(node):
+    '''replaces subtrees without names by their value'''
+    kind = node[0]
+    if kind in ("num", "name"):
+        return node
+    if kind == "neg":
+        node = ("neg", _fold(node[1]))
+        children = [node[1]]
+    elif kind == "pow":
+        node = ("pow", _fold(node[1]), _fold(node[2]))
+        children = node[1:]
+    elif kind == "cmp":
+        node = ("cmp", node[1], _fold(node[2]), _fold(node[3]))
+        children = node[2:]
+    elif kind == "call":
+        node = ("call", node[1], [_fold(a) for a in node[2]])
+        children = node[2]
+    else:
+        node = (kind, [(op, _fold(n)) for op, n in node[1]])
+        children = [n for op, n in node[1]]
+    if any(child[0] != "num" for child in children):
+        return node
+    try:
+        return ("num", float(_build(node, FUNCTIONS, set())({})))
+    except (ArithmeticError, ValueError, TypeError):
+        # e.g. 1/0, raised when evaluated
+        return node
+
+
+class Expression:
+    '''A parameter equation parsed once for repeated evaluation.
+
+    Evaluates CST's parameter syntax without Python's eval:
+    numbers, parameter names, + - * / ^ (or **), comparisons
+    and the functions of FUNCTIONS. Names are case insensitive.
+    Like in VBA, a true comparison is -1 and a false one 0.
+
+    Parameters
+    ----------
+    equation : str
+        equation as written in the parfile
+
+    Attributes
+    ----------
+    equation : str
+    names : set
+        lowercase names the equation uses,
+        without the names of called functions
+
+    Raises
+    ------
+    SyntaxError
+        if equation is malformed
+    NameError
+        if equation calls an unknown function
+
+    '''
+
+    __slots__ = ("equation", "names", "_tree", "_scalar", "_vector")
+
+    def __init__(self, equation: str):
+        self.equation = equation
+        self._tree = _fold(_Parser(equation).parse())
+        self.names = set()
+        self._scalar = _build(self._tree, FUNCTIONS, self.names)
+        self._vector = None
+
+    def __repr__(self):
+        return "Expression(%r)" % self.equation
+
+    def __call__(self, namespace: dict):
+        '''Value of the equation
+
+        Parameters
+        ----------
+        namespace : dict
+            lowercase names and their values
+
+        Returns
+        -------
+        float
+        '''
+        return self._scalar(namespace)
+
+    def vectorized(self, namespace: dict):
+        '''Value of the equation for arrays of values
+
+        Parameters
+        ----------
+        namespace : dict
+            lowercase names and their values,
+            numpy arrays of equal shape or floats
+
+        Returns
+        -------
+        numpy.ndarray or float
+        '''
+        if self._vector is None:
+            self._vector = _build(self._tree, VECTOR_FUNCTIONS, set())
+        return self._vector(namespace)
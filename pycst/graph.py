@@ -0,0 +1,260 @@
+import numpy as np
+import pandas as pd
+import pycst.read as read
+
+
+class ParameterGraph:
+    '''Dependency graph of evaluated parameters.
+
+    Allows to change driving parameters and to recompute
+    only the parameters depending on them.
+
+    Parameters
+    ----------
+    parameters : dict
+        {"parametername": {"equation": str, "value": float}}
+        as returned by read.eval_parfile
+
+    Attributes
+    ----------
+    changed : set
+        Names of the parameters whose value changed
+        during the last update.
+
+    '''
+
+    def __init__(self, parameters: dict):
+        self.changed = set()
+        self._names = {}
+        self._equations = {}
+        self._codes = {}
+        self._dependencies = {}
+        self._namespace = dict(read.FUNCTIONS)
+        for name, par in parameters.items():
+            lname = name.lower()
+            self._names[lname] = name
+            self._equations[lname] = par["equation"]
+            self._namespace[lname] = par["value"]
+        for lname, equation in self._equations.items():
+            self._codes[lname], self._dependencies[lname] = \
+                self._compile(lname, equation)
+        self._order, self._position, self._dependents = \
+            self._sort(self._dependencies)
+
+    @classmethod
+    def from_parfile(cls, filepath: str):
+        '''Builds the graph of the parfile at filepath
+
+        Parameters
+        ----------
+        filepath: str
+            absolute path to parfile
+        '''
+        return cls(read.eval_parfile(filepath))
+
+    def _compile(self, lname, equation):
+        '''returns code and dependencies of equation'''
+        code, deps = read.compile_equation(equation)
+        return code, read.resolve(self._names[lname], deps, self._names)
+
+    @staticmethod
+    def _sort(dependencies):
+        '''returns order, position and dependents of dependencies'''
+        order = read.topological_order(dependencies)
+        position = {n: i for i, n in enumerate(order)}
+        dependents = {n: [] for n in order}
+        for lname, deps in dependencies.items():
+            for dep in deps:
+                dependents[dep].append(lname)
+        return order, position, dependents
+
+    def _lower(self, name):
+        lname = name.lower()
+        if lname not in self._names:
+            raise KeyError(name)
+        return lname
+
+    def __contains__(self, name):
+        return name.lower() in self._names
+
+    def __getitem__(self, name):
+        return self._namespace[self._lower(name)]
+
+    def __len__(self):
+        return len(self._names)
+
+    @property
+    def values(self):
+        '''dict of all parameter values
+
+        Returns
+        -------
+        dict
+            keys: Parameternames
+            values: value
+        '''
+        return {n: self._namespace[ln] for ln, n in self._names.items()}
+
+    def equation(self, name):
+        '''returns the equation of parameter name'''
+        return self._equations[self._lower(name)]
+
+    def downstream(self, names):
+        '''All parameters depending directly or indirectly on names
+
+        Parameters
+        ----------
+        names : iterable(str)
+            Parameternames
+
+        Returns
+        -------
+        set
+            Parameternames, including names themselves
+        '''
+        lnames = self._downstream(
+            [self._lower(n) for n in names], self._dependents)
+        return {self._names[n] for n in lnames}
+
+    @staticmethod
+    def _downstream(lnames, dependents):
+        stack = list(lnames)
+        seen = set(stack)
+        while stack:
+            for dependent in dependents[stack.pop()]:
+                if dependent not in seen:
+                    seen.add(dependent)
+                    stack.append(dependent)
+        return seen
+
+    def update(self, parameters_values: dict):
+        '''Sets parameters and recomputes the affected subgraph
+
+        Parameters
+        ----------
+        parameters_values: dict
+            keys: Parameternames
+            values: value or equation as str
+
+        Returns
+        -------
+        set
+            Names of all parameters whose value changed,
+            also stored in self.changed
+        '''
+        # validated before anything is changed
+        codes = {}
+        dependencies = {}
+        values = {}
+        for name, value in parameters_values.items():
+            lname = self._lower(name)
+            if isinstance(value, str):
+                codes[lname], dependencies[lname] = \
+                    self._compile(lname, value)
+            else:
+                codes[lname] = None
+                dependencies[lname] = set()
+                values[lname] = value
+        structure = self._order, self._position, self._dependents
+        if any(deps != self._dependencies[n]
+               for n, deps in dependencies.items()):
+            merged = dict(self._dependencies)
+            merged.update(dependencies)
+            structure = self._sort(merged)
+        affected = list(self._downstream(codes, structure[2]))
+        affected.sort(key=structure[1].__getitem__)
+        previous = {n: self._namespace[n] for n in affected}
+        self._namespace.update(values)
+        try:
+            for lname in affected:
+                code = codes[lname] if lname in codes \
+                    else self._codes[lname]
+                if code is not None:
+                    self._namespace[lname] = read.evaluate(
+                        code, self._namespace)
+        except Exception:
+            self._namespace.update(previous)
+            raise
+        for name, value in parameters_values.items():
+            self._equations[self._lower(name)] = str(value)
+        self._codes.update(codes)
+        self._dependencies.update(dependencies)
+        self._order, self._position, self._dependents = structure
+        self.changed = {self._names[n] for n in affected
+                        if self._namespace[n] != previous[n]}
+        return self.changed
+
+    def predict(self, parameters_values: dict):
+        '''Values of all parameters after an update, graph stays unchanged
+
+        Parameters
+        ----------
+        parameters_values: dict
+            keys: Parameternames
+            values: value or equation as str
+
+        Returns
+        -------
+        dict
+            keys: Parameternames
+            values: value
+        '''
+        graph = self.copy()
+        graph.update(parameters_values)
+        return graph.values
+
+    def evaluate_design(self, design, names=None):
+        '''Values of parameters for many points at once
+
+        Note
+        ----
+        Only parameters downstream of the design columns are
+        recomputed, each equation once for all points on numpy
+        arrays. The graph stays unchanged.
+
+        Parameters
+        ----------
+        design : pandas.DataFrame or dict
+            columns: driving Parameternames
+            rows: points, e.g. 10k rows of a design of experiments
+        names : list(str), optional
+            Parameternames to return,
+            defaults to the design columns and all affected parameters
+
+        Returns
+        -------
+        pandas.DataFrame
+            one row per point, one column per Parametername
+        '''
+        design = pd.DataFrame(design)
+        driving = [self._lower(n) for n in design.columns]
+        affected = [n.lower() for n in self.downstream(design.columns)]
+        affected.sort(key=self._position.__getitem__)
+        namespace = dict(self._namespace)
+        for lname, column in zip(driving, design.columns):
+            namespace[lname] = design[column].to_numpy(dtype=float)
+        for lname in affected:
+            if lname not in driving:
+                namespace[lname] = self._codes[lname].vectorized(namespace)
+        if names is None:
+            names = driving + [n for n in affected if n not in driving]
+        else:
+            names = [self._lower(n) for n in names]
+        return pd.DataFrame(
+            {self._names[n]: np.broadcast_to(namespace[n], len(design))
+             for n in names}, index=design.index)
+
+    def copy(self):
+        '''returns an independent copy of the graph'''
+        graph = ParameterGraph.__new__(ParameterGraph)
+        graph.changed = set(self.changed)
+        graph._names = dict(self._names)
+        graph._equations = dict(self._equations)
+        graph._codes = dict(self._codes)
+        graph._dependencies = {
+            n: set(d) for n, d in self._dependencies.items()}
+        graph._namespace = dict(self._namespace)
+        graph._order = self._order
+        graph._position = self._position
+        graph._dependents = self._dependents
+        return graph
@@ -0,0 +1,249 @@
+import os
+import json
+import time
+import threading
+import pycst.write as write
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def journal_path(model):
+    '''Default journal of the sweeps of model
+
+    Returns
+    -------
+    str
+        "<model>.sweep.jsonl" next to the model
+    '''
+    return model.FILEPATH + str(model) + ".sweep.jsonl"
+
+
+def active_path(model):
+    '''File naming the journal of the running sweep of model'''
+    return model.FILEPATH + str(model) + ".sweep.active"
+
+
+def mark_active(model, path):
+    '''Records path as journal of the running sweep of model
+
+    Note
+    ----
+    A crashed sweep leaves the record, so the parameter
+    backup is kept for its resume, refer to active_journal.
+    '''
+    with open(active_path(model), "w") as file:
+        file.write(os.path.abspath(path))
+
+
+def clear_active(model):
+    '''Removes the record of mark_active'''
+    if os.path.isfile(active_path(model)):
+        os.remove(active_path(model))
+
+
+def active_journal(model):
+    '''Journal path recorded by mark_active, None if there is none'''
+    if not os.path.isfile(active_path(model)):
+        return None
+    with open(active_path(model)) as file:
+        return file.read().strip() or None
+
+
+def point_key(point: dict):
+    '''Identifies a design point independent of key order and types'''
+    values = {}
+    for key, value in point.items():
+        try:
+            values[key] = float(value)
+        except (TypeError, ValueError):
+            values[key] = str(value)
+    return json.dumps(values, sort_keys=True)
+
+
+class SweepJournal:
+    '''Persistent state of every point of a sweep.
+
+    Every state change is appended as one json line,
+    so the journal survives a crash at any time. A
+    restarted sweep with the same journal skips the
+    points which are done and runs the others again.
+
+    States are "pending", "running", "done" and "failed".
+    Finished points record the result keys, returncode,
+    start time and duration.
+
+    Parameters
+    ----------
+    path : str
+        Journal file, loaded if existing.
+
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self._points = {}
+        self._lock = threading.Lock()
+        if os.path.isfile(path):
+            self._load()
+
+    @classmethod
+    def for_model(cls, model):
+        '''Journal at journal_path(model)'''
+        return cls(journal_path(model))
+
+    @staticmethod
+    def unfinished(path):
+        '''True if the journal at path has pending or running points'''
+        if not os.path.isfile(path):
+            return False
+        return any(p["state"] in (PENDING, RUNNING)
+                   for p in SweepJournal(path)._points.values())
+
+    def archive(self):
+        '''Moves the journal aside, the next sweep starts empty
+
+        Returns
+        -------
+        str
+            path of the archived journal, None if there was no file
+        '''
+        with self._lock:
+            self._points = {}
+            if not os.path.isfile(self.path):
+                return None
+            root = self.path[:-len(".jsonl")] \
+                if self.path.endswith(".jsonl") else self.path
+            archived = root + time.strftime(".%Y%m%d-%H%M%S") + ".jsonl"
+            n = 1
+            while os.path.exists(archived):
+                archived = "%s.%s-%d.jsonl" % (
+                    root, time.strftime("%Y%m%d-%H%M%S"), n)
+                n += 1
+            os.replace(self.path, archived)
+            return archived
+
+    def _load(self):
+        with open(self.path) as file:
+            for line in file:
+                # a torn last line of a crashed writer
+                if not line.endswith("\n"):
+                    break
+                record = json.loads(line)
+                entry = self._points.setdefault(record["key"], {})
+                entry.update(record)
+
+    def _append(self, records):
+        lines = "".join(json.dumps(r) + "\n" for r in records)
+        with write.file_lock(self.path), open(self.path, "a") as file:
+            file.write(lines)
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _set(self, point, **record):
+        record["key"] = point_key(point)
+        record["time"] = time.time()
+        with self._lock:
+            self._points.setdefault(record["key"], {}).update(record)
+            self._append([record])
+
+    def state(self, point):
+        '''State of point, None if unknown'''
+        return self._points.get(point_key(point), {}).get("state")
+
+    def states(self):
+        '''Number of points per state
+
+        Returns
+        -------
+        dict
+            {state: int}
+        '''
+        counts = {}
+        for entry in self._points.values():
+            counts[entry["state"]] = counts.get(entry["state"], 0) + 1
+        return counts
+
+    def start(self, points):
+        '''Registers points and returns the ones still to run
+
+        Parameters
+        ----------
+        points : list
+            list of {"parametername": value} dicts
+
+        Returns
+        -------
+        list
+            points which are not done, in order of points
+        '''
+        new = []
+        with self._lock:
+            for point in points:
+                key = point_key(point)
+                if key not in self._points:
+                    record = {"key": key, "state": PENDING,
+                              "point": point_values(point),
+                              "time": time.time()}
+                    self._points[key] = dict(record)
+                    new.append(record)
+            if new:
+                self._append(new)
+        return [p for p in points if self.state(p) != DONE]
+
+    def running(self, point):
+        '''Marks point as running'''
+        self._set(point, state=RUNNING, start=time.time())
+
+    def finished(self, point, row):
+        '''Marks point as done or failed by the returncode of row
+
+        Parameters
+        ----------
+        row : dict
+            refer to SweepEngine.evaluate
+        '''
+        start = self._points.get(point_key(point), {}).get("start")
+        duration = None if start is None else time.time() - start
+        returncode = row.get("returncode", 0)
+        self._set(
+            point, state=DONE if returncode == 0 else FAILED,
+            returncode=returncode, duration=duration,
+            results=sorted(k for k in row
+                           if k not in point and k != "returncode"),
+            row=row_values(row))
+
+    def rows(self, points):
+        '''Rows of all finished points, in order of points
+
+        Returns
+        -------
+        list
+            refer to SweepEngine.evaluate
+        '''
+        rows = []
+        for point in points:
+            entry = self._points.get(point_key(point), {})
+            if entry.get("state") in (DONE, FAILED):
+                rows.append(dict(point, **entry["row"]))
+        return rows
+
+
+def point_values(point):
+    return json.loads(point_key(point))
+
+
+def row_values(row):
+    values = {}
+    for key, value in row.items():
+        try:
+            json.dumps(value)
+            values[key] = value
+        except TypeError:
+            try:
+                values[key] = float(value)
+            except (TypeError, ValueError):
+                values[key] = str(value)
+    return values
@@ -0,0 +1,249 @@
+import os
+import json
+import math
+import numpy as np
+from pycst.surrogate import GaussianProcess
+from pycst.sweep import restoring, evaluate
+
+
+def target(resultname, value):
+    '''Objective reaching value with result resultname
+
+    Parameters
+    ----------
+    resultname : str
+        name of the result, refer to CstModel.get_results
+    value : float
+        wanted value, e.g. a frequency
+
+    Returns
+    -------
+    callable
+        objective, absolute deviation of a row from value.
+        SurrogateOptimizer models the result itself instead
+        of the deviation, which has a kink at value.
+    '''
+    def objective(row):
+        return abs(row[resultname] - value)
+    objective.resultname = resultname
+    objective.value = value
+    return objective
+
+
+class SurrogateOptimizer:
+    '''Minimizes an objective of CST results with few solver calls.
+
+    A Gaussian process is fitted to all evaluations done so
+    far. Batches of points are proposed where the lower
+    confidence bound of the surrogate is smallest, every
+    point of a batch is added to the surrogate with its
+    predicted value before the next one is chosen. Batches are
+    run by an evaluator, so ParallelSweep runs a batch at once.
+    If the model has a result_cache, points it already
+    evaluated are served from it, also by the clones of
+    ParallelSweep, which share it.
+
+    Parameters
+    ----------
+    evaluator : :obj:`SweepEngine`, :obj:`ParallelSweep` or callable
+        Runs a list of {"parametername": value} dicts
+        and returns one row per point,
+        refer to SweepEngine.evaluate.
+    bounds : dict
+        {"parametername": (lower, upper)}
+    objective : callable or str
+        Called with a row, returns the value to minimize.
+        A str minimizes this result. Refer to target.
+    batch_size : int, optional
+        Points per batch. Defaults to the workers
+        of the evaluator or 1.
+    initial : int, optional
+        Number of latin hypercube points evaluated before the
+        surrogate is used. Defaults to 2 * parameters + 1.
+    checkpoint : str, optional
+        Json file all evaluations are saved to after each batch.
+        Existing evaluations are loaded, so an interrupted
+        optimization resumes where it stopped.
+    kappa : float, optional
+        Weight of the surrogate's uncertainty,
+        higher values explore more.
+    candidates : int, optional
+        Number of random candidates the batch is chosen from.
+    seed : int, optional
+        Seed of the random generator.
+
+    Attributes
+    ----------
+    evaluations : list
+        dicts with keys "point", "row" and "objective",
+        objective is nan for failed runs
+
+    '''
+
+    def __init__(self, evaluator, bounds, objective, batch_size=None,
+                 initial=None, checkpoint=None, kappa=2.0, candidates=2000,
+                 seed=None):
+        self.evaluator = evaluator
+        self.names = list(bounds)
+        self.bounds = np.array([bounds[k] for k in self.names], dtype=float)
+        assert (self.bounds[:, 0] < self.bounds[:, 1]).all(), bounds
+        if isinstance(objective, str):
+            name = objective
+            objective = lambda row: row[name]
+        self.objective = objective
+        if batch_size is None:
+            batch_size = getattr(evaluator, "workers", 1)
+        self.batch_size = batch_size
+        if initial is None:
+            initial = 2 * len(self.names) + 1
+        self.initial = initial
+        self.checkpoint = checkpoint
+        self.kappa = kappa
+        self.candidates = candidates
+        self._rng = np.random.default_rng(seed)
+        self.evaluations = []
+        if checkpoint is not None and os.path.isfile(checkpoint):
+            self.load(checkpoint)
+
+    def load(self, filepath):
+        '''Loads evaluations from a checkpoint'''
+        with open(filepath) as file:
+            data = json.load(file)
+        if data["names"] != self.names:
+            raise ValueError("Checkpoint %s optimizes %s"
+                             % (filepath, data["names"]))
+        self.evaluations = [
+            dict(e, objective=float("nan") if e["objective"] is None
+                 else e["objective"])
+            for e in data["evaluations"]]
+
+    def save(self, filepath):
+        '''Saves all evaluations to a checkpoint'''
+        data = {"names": self.names, "bounds": self.bounds.tolist(),
+                "evaluations": [
+                    dict(e, objective=None if math.isnan(e["objective"])
+                         else e["objective"])
+                    for e in self.evaluations]}
+        with open(filepath + ".tmp", "w") as file:
+            json.dump(data, file)
+        os.replace(filepath + ".tmp", filepath)
+
+    @property
+    def best(self):
+        '''Evaluation with the smallest objective, None if there is none'''
+        done = [e for e in self.evaluations if not math.isnan(e["objective"])]
+        if not done:
+            return None
+        return min(done, key=lambda e: e["objective"])
+
+    def _points(self, X):
+        return [{k: float(v) for k, v in zip(self.names, x)} for x in X]
+
+    def _latin_hypercube(self, n):
+        dims = len(self.names)
+        u = (np.argsort(self._rng.random((n, dims)), axis=0)
+             + self._rng.random((n, dims))) / n
+        return self.bounds[:, 0] + u * (self.bounds[:, 1] - self.bounds[:, 0])
+
+    def _candidates(self, X, y):
+        lower, upper = self.bounds[:, 0], self.bounds[:, 1]
+        n = self.candidates
+        C = lower + self._rng.random((n, len(lower))) * (upper - lower)
+        # refining around the best points found so far
+        best = X[np.argsort(y)[:5]]
+        origin = best[self._rng.integers(len(best), size=n)]
+        step = self._rng.normal(scale=0.05, size=(n, len(lower)))
+        local = origin + step * (upper - lower)
+        return np.vstack([C, np.clip(local, lower, upper)])
+
+    def ask(self, n=None):
+        '''Proposes the next batch
+
+        Parameters
+        ----------
+        n : int, optional
+            Number of points, defaults to batch_size.
+
+        Returns
+        -------
+        list
+            list of {"parametername": value} dicts
+        '''
+        if n is None:
+            n = self.batch_size
+        done = [e for e in self.evaluations if not math.isnan(e["objective"])]
+        if len(done) < self.initial:
+            return self._points(self._latin_hypercube(n))
+        X = np.array([[e["point"][k] for k in self.names] for e in done])
+        C = self._candidates(X, [e["objective"] for e in done])
+        goal = getattr(self.objective, "value", None)
+        if goal is None:
+            y = np.array([e["objective"] for e in done])
+        else:
+            y = np.array([e["row"][self.objective.resultname] for e in done])
+        gp = GaussianProcess(self.bounds).fit(X, y)
+        batch = []
+        for i in range(n):
+            mean, std = gp.predict(C, return_std=True)
+            if goal is None:
+                bound = mean - self.kappa * std
+            else:
+                bound = np.abs(mean - goal) - self.kappa * std
+            idx = int(np.argmin(bound))
+            batch.append(C[idx])
+            # assuming the prediction comes true for the rest of the batch
+            X = np.vstack([X, C[idx]])
+            y = np.append(y, mean[idx])
+            C = np.delete(C, idx, axis=0)
+            gp = GaussianProcess(
+                self.bounds, length_scale=gp.length_scale_).fit(X, y)
+        return self._points(batch)
+
+    def tell(self, points, rows):
+        '''Adds evaluated points
+
+        Parameters
+        ----------
+        points : list
+            points proposed by ask
+        rows : list
+            one row per point, refer to SweepEngine.evaluate
+        '''
+        for point, row in zip(points, rows):
+            try:
+                if row.get("returncode", 0) != 0:
+                    raise ValueError(row["returncode"])
+                value = float(self.objective(row))
+            except (KeyError, TypeError, ValueError):
+                value = float("nan")
+            self.evaluations.append(
+                {"point": point, "row": row, "objective": value})
+        if self.checkpoint is not None:
+            self.save(self.checkpoint)
+
+    def run(self, budget, tol=None):
+        '''Optimizes until budget or tol is reached
+
+        Parameters
+        ----------
+        budget : int
+            Maximum number of evaluations,
+            including the ones of a resumed checkpoint.
+        tol : float, optional
+            Stops once an objective below tol is found.
+
+        Returns
+        -------
+        dict
+            best evaluation, refer to evaluations
+        '''
+        with restoring(self.evaluator, self.names):
+            while len(self.evaluations) < budget:
+                best = self.best
+                if tol is not None and best is not None and \
+                        best["objective"] <= tol:
+                    break
+                points = self.ask(min(self.batch_size,
+                                      budget - len(self.evaluations)))
+                self.tell(points, evaluate(self.evaluator, points))
+        return self.best
@@ -1,7 +1,10 @@
 import os
 import time
+import hashlib
 import shutil
 import copy
+import contextlib
+import asyncio
 import subprocess
 from pycst.config import Configuration
 from pandas import DataFrame
@@ -10,6 +13,15 @@ import pandas as pd
 import numpy as np
 import pycst.read as read
 import pycst.write as write
+import pycst.runner as runner
+import pycst.telemetry as telemetry
+import pycst.doe as doe
+from pycst.graph import ParameterGraph
+from pycst.sweep import SweepEngine, AdaptiveSweep, design_matrix
+from pycst.journal import SweepJournal, journal_path, active_journal
+from pycst.dc import DcDispatcher
+from pycst.watch import ResultWatcher
+from pycst.surrogate import ResultInterpolator
 import random
 
 
@@ -35,15 +47,51 @@ class CstModel:
     ----------
     csv_name: str
         how to name the csv when exporting
+    csv_folder: str
+        folder of the csv, defaults to the folder of
+        the .cst file. Clones of a ParallelSweep
+        export to the folder of their model.
     parhandler : :obj:`Parfile`
         Refer to class Parfile.
     verbose : bool
         Wether messages should be printed or not.
+    result_cache : :obj:`ResultCache` or None
+        If set, eigenmode runs of already solved
+        parameter sets are served from this cache.
+        Refer to pycst.cache.ResultCache.
+    result_store : :obj:`ResultStore` or None
+        If set, exported results are appended to this
+        store instead of the csv. Refer to pycst.store.ResultStore.
+    session : :obj:`Session` or None
+        If set, CST commands are sent to this running
+        session instead of starting CST for each command.
+        None by default, a session needs a bridge to CST
+        which pycst does not ship. Refer to pycst.session.
+    parameter_tolerance : float
+        Relative and absolute tolerance within which
+        edited values count as unchanged.
+    skipped_invocations : int
+        Number of CST calls avoided since edited
+        parameters were unchanged.
+    cache_identity : str
+        Identifies the model in result_cache keys,
+        defaults to the absolute path of the .cst file.
+        Change it when the geometry changes, the .cst
+        file itself is rewritten by every solver run.
 
     '''
 
     def __init__(self, filename, cst_path=None, autoanswer=None):
         self.verbose = True
+        self.result_cache = None
+        self.result_store = None
+        self._scanner = None
+        self._batch = None
+        self.session = None
+        self.parameter_tolerance = 1e-9
+        self.skipped_invocations = 0
+        # > 0 while a sweep restores the parameters afterwards
+        self._restoring = 0
 
         if not os.path.isfile(filename):
             raise FileNotFoundError(
@@ -60,6 +108,9 @@ class CstModel:
         # navigating to subfolder of file
         self.RESULTPATH = "".join(self.RESULTPATH) + "/Result/"
         self.csv_name = "Results%s.csv" % str(self)
+        self.csv_folder = self.FILEPATH
+        self.cache_identity = os.path.abspath(self.FILENAME).replace(
+            "\\", "/")
         if cst_path:
             self.CST_PATH = cst_path
         else:
@@ -150,57 +201,187 @@ class CstModel:
 
         Note
         ----
-        Currently only rundID 0 supported
-
+        Results of run_id "0" are read from
+        "<resultname><filetype>", of other run ids from
+        "<resultname>_<run_id><filetype>".
+        Refer to read.split_run_ids.
 
         Parameters
         ----------
         resultname : str
             Name of Result, must be located in self.RESULTPATH
         filetype : str, optional
-            Currently only .rd0 files are implemented
+            One of read.READERS: ".rd0" for 0D results,
+            ".rd1", ".sig" or ".txt" for ASCII 1D results
         run_id : str, optional
-            get Result by run_id
-            only run_id 0 supported
-
+            get Result by run_id,
+            "all" stacks the results of all run ids
 
         Returns
         -------
-        float
-            float of first line in corresponding filetype
+        float or numpy.ndarray
+            float of first line for .rd0 files,
+            array of shape (rows, columns) for 1D results.
+            For run_id "all" the results are stacked
+            along a new first axis in order of run ids.
 
         '''
-        if run_id != "0":
-            raise AttributeError("Only runID '0' allowed")
-        if filetype != ".rd0":
+        if filetype not in read.READERS:
             raise FileExistsError("Resulttype not implemented yet")
-        path = self.RESULTPATH + resultname + filetype
-        return read.read_one_liner(path)
-
-    def get_results(self):
+        if run_id == "all":
+            run_ids, data = read.read_runs(
+                self.RESULTPATH, resultname, filetype)
+            return data
+        path = self.RESULTPATH + read.run_name(resultname, run_id) + filetype
+        return read.READERS[filetype](path)
+
+    @telemetry.timed("result_io")
+    def get_results(self, run_ids=None, parameters=None):
         '''Returns all rd0 results containesd in resultpath
 
+        Note
+        ----
+        Only files changed since the previous call are read.
+
+        Parameters
+        ----------
+        run_ids : None, "all" or list of str, optional
+            If None, results are returned as dictionary.
+            Else results of these run ids, or of every
+            run id found, are returned as DataFrame.
+            Refer to get_result for the naming of run ids.
+        parameters : dict or pandas.DataFrame, optional
+            Parameters of each run to join the results with,
+            {"run_id": {"parametername": value}} or DataFrame
+            with column "run_id". Defaults to the current
+            parameters for run id "0".
+
         Returns
         -------
         res: dictionary
             keys: str, result names
             values: float, result values
+        or pandas.DataFrame
+            long format with columns "run_id", "result",
+            "value" and one column per parameter
+        '''
+        if self._scanner is None:
+            self._scanner = read.ResultScanner(self.RESULTPATH)
+        results = self._scanner.scan()
+        if run_ids is None:
+            return results
+        if run_ids != "all":
+            run_ids = [str(r) for r in run_ids]
+        rows = []
+        for resultname, runs in read.split_run_ids(results).items():
+            for run_id, name in runs.items():
+                if run_ids == "all" or run_id in run_ids:
+                    rows.append((run_id, resultname, results[name]))
+        df = DataFrame(rows, columns=["run_id", "result", "value"])
+        df = df.sort_values(
+            ["run_id", "result"],
+            key=lambda c: c.astype(int) if c.name == "run_id" else c)
+        if parameters is None:
+            params = self.get_parameters()
+            parameters = {"0": {k: params[k]["value"] for k in params}}
+        if isinstance(parameters, dict):
+            parameters = DataFrame.from_dict(parameters, orient="index")
+            parameters = parameters.rename_axis("run_id").reset_index()
+        parameters = parameters.astype({"run_id": str})
+        df = df.merge(parameters, on="run_id", how="left")
+        return df.reset_index(drop=True)
+
+    def watch_results(self, **kwargs):
+        '''Returns a watcher yielding results while CST writes them
+
+        Note
+        ----
+        Use like
+        ``for record in model.watch_results().watch(done=job.done)``
+        while a solver runs, e.g. as job of a Scheduler.
+
+        Parameters
+        ----------
+        kwargs : optional
+            Refer to watch.ResultWatcher
+
+        Returns
+        -------
+        :obj:`ResultWatcher`
+        '''
+        return ResultWatcher(self.RESULTPATH, **kwargs)
+
+    def get_interpolator(self, results=None, parameters=None, paths=None):
+        '''Returns an interpolator of the results exported to csv
+
+        Note
+        ----
+        Answers what-if questions without running CST,
+        refer to surrogate.ResultInterpolator.
+
+        Parameters
+        ----------
+        results : list, optional
+            Results to interpolate, defaults to all
+            numeric columns which are no parameters.
+        parameters : list, optional
+            Inputs of the interpolation. Defaults to the
+            parameters of the model which are not defined
+            by an equation of other parameters.
+        paths : list, optional
+            Csv files, defaults to self.csv_folder + self.csv_name.
+
+        Returns
+        -------
+        :obj:`ResultInterpolator`
         '''
-        res = {}
-        for resultname in self.get_resultnames():
-            res[resultname] = self.get_result(resultname)
-        return res
+        if paths is None:
+            paths = [self.csv_folder + self.csv_name]
+        model_parameters = self.get_parameters()
+        if parameters is None:
+            parameters = [
+                key for key, par in model_parameters.items()
+                if not read.compile_equation(par["equation"])[1]
+                - set(read.FUNCTIONS)]
+        data = pd.concat(
+            [pd.read_csv(path, delimiter=";", index_col=0) for path in paths],
+            ignore_index=True)
+        if results is None:
+            results = [
+                key for key in data.select_dtypes("number").columns
+                if key not in model_parameters and key != "returncode"]
+        parameters = [key for key in parameters if key in data.columns]
+        return ResultInterpolator(data, parameters, results=results)
 
     def get_parameters(self):
         '''Loads and returns all parametes
 
+        Note
+        ----
+        Model.par is only evaluated if it changed since the
+        last call, refer to Parfile.get_parameters.
 
         Returns
         -------
         dictionary
             {"parametername": {"equation": str, "value": float}}
         '''
-        return read.eval_parfile(filepath=self.parhandler.path)
+        params = self.parhandler.get_parameters()
+        return {key: dict(params[key]) for key in params}
+
+    def get_parameter_graph(self):
+        '''Returns the dependency graph of all parameters
+
+        Note
+        ----
+        Use ParameterGraph.update or ParameterGraph.predict
+        to compute derived parameters without running CST.
+
+        Returns
+        -------
+        :obj:`ParameterGraph`
+        '''
+        return ParameterGraph(self.get_parameters())
 
     def is_parameter(self, parametername):
         '''Check if parameter is existing
@@ -217,41 +398,110 @@ class CstModel:
             else Flase
 
         '''
-        try:
-            self.get_parameters()[parametername]
-            return True
-        except KeyError:
-            return False
+        return parametername in self.parhandler.get_parameters()
 
-    def edit_parameters(self, parameters_values: dict):
+    def edit_parameters(self, parameters_values: dict, rebuild=True):
         '''Imports a dictionary of Parameters to cst file
 
+        Note
+        ----
+        Only parameters which differ from the equations of
+        Model.par are imported, numbers by more than
+        self.parameter_tolerance. A number still replaces an
+        equation of other parameters. If none differs, CST is not called,
+        refer to self.skipped_invocations.
+        Within batch_parameters the import is postponed.
+
         Parameters
         ----------
         parameters_values: dict
             keys: Parameternames
             values: value
+        rebuild : bool, optional
+            Wether the model should be rebuilt after importing.
+            A following solver run rebuilds the model anyways.
+
+        Returns
+        -------
+        int
+            returncode of cst_import_parfile,
+            0 if CST was not called
         '''
-        filename = self.FILEPATH + "par_tmp.par"
         for key in parameters_values:
-            assert self.is_parameter(key)
-        assert os.path.isfile(self.FILENAME)
-        with write.parfile_tmp(filename, parameters_values):
-            self.cst_import_parfile(filename)
+            assert self.is_parameter(key) or (
+                self._batch is not None
+                and key in self._batch.parameters_values)
+        return self.__import_parameters(parameters_values, rebuild)
 
-    def add_parameters(self, parameters_values: dict):
+    def add_parameters(self, parameters_values: dict, rebuild=True):
         '''Imports a dictionary of Parameters to cst file
 
+        Note
+        ----
+        Refer to edit_parameters.
+
         Parameters
         ----------
         parameters_values: dict
             keys: Parameternames
             values: value
+        rebuild : bool, optional
+            Wether the model should be rebuilt after importing.
+
+        Returns
+        -------
+        int
+            returncode of cst_import_parfile,
+            0 if CST was not called
         '''
-        filename = self.FILEPATH + "par_tmp.par"
+        return self.__import_parameters(parameters_values, rebuild)
+
+    def __import_parameters(self, parameters_values, rebuild):
         assert os.path.isfile(self.FILENAME)
-        with write.parfile_tmp(filename, parameters_values):
-            self.cst_import_parfile(filename)
+        if self._batch is not None:
+            self._batch.parameters_values.update(parameters_values)
+            self._batch.rebuild = self._batch.rebuild or rebuild
+            return 0
+        changes = write.parfile_changes(
+            self.parhandler.get_parameters(), parameters_values,
+            tol=self.parameter_tolerance)
+        if not changes:
+            self.message(str(self), "parameters unchanged, skipping import")
+            # the import and the rebuild
+            self.skipped_invocations += 1 + bool(rebuild)
+            return 0
+        with write.parfile_tmp(self.FILEPATH, changes) as filename:
+            return self.cst_import_parfile(filename, rebuild=rebuild)
+
+    @contextlib.contextmanager
+    def batch_parameters(self, rebuild=False):
+        '''Merges all parameter edits within the context into one import
+
+        Note
+        ----
+        Use like
+        ``with model.batch_parameters() as batch:``
+        and read batch.returncode after the context.
+        Nothing is imported if the context raises.
+
+        Parameters
+        ----------
+        rebuild : bool, optional
+            Wether the model should be rebuilt after importing,
+            also done if any edit within the context asks for it.
+
+        Yields
+        ------
+        :obj:`ParameterBatch`
+        '''
+        assert self._batch is None, "batches can not be nested"
+        batch = self._batch = ParameterBatch(rebuild)
+        try:
+            yield batch
+        finally:
+            self._batch = None
+        batch.returncode = self.__import_parameters(
+            batch.parameters_values, batch.rebuild)
 
     def _run(self, flags, dc=None, timeout=None):
         '''Run cst command for this file.
@@ -277,31 +527,91 @@ class CstModel:
             returncode
 
         '''
+        cmd = self._command(flags, dc)
+        with telemetry.span("_run", self, flags=" ".join(cmd[1:-1]),
+                            session=self.session is not None) as span:
+            if self.session is not None:
+                self.message(str(self), "running in session:\n\t",
+                             " ".join(cmd[1:-1]))
+                returncode = self.session.run(cmd[1:-1], timeout=timeout)
+            else:
+                self.message(str(self), "running command:\n\t",
+                             " ".join(cmd))
+                # returncode = subprocess.call(cmd)
+                p = subprocess.Popen(cmd, **runner.popen_kwargs())
+                try:
+                    p.wait(timeout=timeout)
+                    returncode = p.returncode
+                except subprocess.TimeoutExpired:
+                    runner.kill_tree(p.pid)
+                    p.wait()
+                    returncode = 1
+            span["returncode"] = returncode
+        # returncodes are listed in runner.EXITCODES
+        self._report(cmd, returncode)
+        return returncode
+
+    def _command(self, flags, dc=None):
+        '''Returns the command line of _run as list'''
         if dc:
-            flags += "-withdc=" + str(dc) + " "
-        cmd = self.CST_PATH + flags + self.FILENAME
-        self.message(str(self), "running command:\n\t", cmd)
+            flags += " -withdc=" + str(dc) + " "
+        return [self.CST_PATH] + flags.split() + [self.FILENAME]
 
-        # returncode = subprocess.call(cmd)
-        p = subprocess.Popen(cmd)
-        try:
-            p.wait(timeout=timeout)
-            returncode = p.returncode
-        except subprocess.TimeoutExpired:
-            returncode = 1
-        # retcodes = {
-        #     "0": "EXITCODE_SUCCESS",
-        #     "1": "EXITCODE_FAILED",
-        #     "2": "EXITCODE_ABORTEDBYUSER",
-        #     "3": "EXITCODE_NOLICENSE",
-        #     "4": "EXITCODE_FAILED_TO_OPEN",
-        # }
+    def _report(self, cmd, returncode):
+        '''Prints command and returncode of failed runs'''
         if returncode != 0:
             print(self.__str__(),)
-            print("\tCommand", cmd)
-            print("\treturncode %s")
+            print("\tCommand", " ".join(cmd))
+            print("\treturncode %s" % returncode)
+
+    async def arun(self, flags, dc=None, timeout=None, on_line=None):
+        '''Run cst command for this file asynchronously.
+
+        Note
+        ----
+        Same as _run, but the process is awaited, its output
+        is streamed line by line and on timeout or cancellation
+        the whole process tree is killed.
+
+        Parameters
+        ----------
+        flags : str
+            Refer to CST manual
+        dc : str, optional
+            distributed comuting as "maincontroller:port"
+            like "112.2.245.136:360000"
+        timeout : int or float, optional
+            time in seconds till the command is terminated
+        on_line : callable, optional
+            called as on_line(stream, line) for every line
+            of stdout and stderr. By default lines are passed
+            to self.message.
+
+        Returns
+        -------
+        int
+            returncode
+
+        '''
+        cmd = self._command(flags, dc)
+        with telemetry.span("arun", self, flags=" ".join(cmd[1:-1]),
+                            session=self.session is not None) as span:
+            if self.session is not None:
+                loop = asyncio.get_running_loop()
+                returncode = await loop.run_in_executor(
+                    None, self.session.run, cmd[1:-1], timeout)
+            else:
+                self.message(str(self), "running command:\n\t",
+                             " ".join(cmd))
+                if on_line is None:
+                    def on_line(stream, line):
+                        self.message(str(self), line)
+                returncode = await runner.run_async(cmd, timeout, on_line)
+            span["returncode"] = returncode
+        self._report(cmd, returncode)
         return returncode
 
+    @telemetry.timed("rebuild")
     def cst_rebuild(self, timeout=5 * 60):
         '''CST History will be updated completely
 
@@ -328,13 +638,30 @@ class CstModel:
         self.toggle_mute(silent=True)
         return returncode
 
-    def cst_run_eigenmode(self, dc=None, timeout=None):
+    async def acst_rebuild(self, timeout=5 * 60):
+        '''Asynchronous cst_rebuild, refer to cst_rebuild and arun'''
+        self.message(str(self), "rebuilding")
+        return await self.arun(" -m -rebuild ", timeout=timeout)
+
+    @telemetry.timed("solve")
+    def cst_run_eigenmode(self, dc=None, timeout=None,
+                          parameters_values=None):
         '''Runs eigenmode solver for the model.
 
         Note
         ----
         flags = " -m -e "
-        Exports CSV to self.path + self.csv_name
+        Exports CSV to self.csv_folder + self.csv_name
+
+        If parameters_values are given, they are imported
+        by the same CST call via " -par ", which
+        saves seperate import and rebuild calls.
+
+        If self.result_cache holds results for the parameters,
+        the solver is not called. The cached results replace
+        the Result folder and parameters_values are imported
+        without rebuild, except within a sweep restoring the
+        parameters anyway.
 
         Parameters
         ----------
@@ -343,6 +670,9 @@ class CstModel:
             "142.2.245.136:360000"
         timeout : int or float, optional
             time in seconds till the command is terminated
+        parameters_values: dict, optional
+            keys: Parameternames
+            values: value
 
         Returns
         -------
@@ -351,12 +681,47 @@ class CstModel:
 
         '''
         flags = " -m -e "
+        key, cached = self.__restore_cached(flags, parameters_values)
+        if cached:
+            return 0
         self.message(str(self), "running Eigenmode Solver")
         self.toggle_mute(silent=True)
-        returncode = self._run(flags, dc=dc, timeout=timeout)
+        if parameters_values:
+            with write.parfile_tmp(self.FILEPATH,
+                                   parameters_values) as filename:
+                returncode = self._run(
+                    flags + " -par " + filename + " ",
+                    dc=dc, timeout=timeout)
+        else:
+            returncode = self._run(flags, dc=dc, timeout=timeout)
         self.toggle_mute(silent=True)
         if returncode == 0:
             self.__export_csv()
+            self.__store_cached(key)
+        return returncode
+
+    async def acst_run_eigenmode(self, dc=None, timeout=None,
+                                 parameters_values=None):
+        '''Asynchronous cst_run_eigenmode, refer to it and arun'''
+        flags = " -m -e "
+        # file io off the event loop
+        loop = asyncio.get_running_loop()
+        key, cached = await loop.run_in_executor(
+            None, self.__restore_cached, flags, parameters_values)
+        if cached:
+            return 0
+        self.message(str(self), "running Eigenmode Solver")
+        if parameters_values:
+            with write.parfile_tmp(self.FILEPATH,
+                                   parameters_values) as filename:
+                returncode = await self.arun(
+                    flags + " -par " + filename + " ",
+                    dc=dc, timeout=timeout)
+        else:
+            returncode = await self.arun(flags, dc=dc, timeout=timeout)
+        if returncode == 0:
+            await loop.run_in_executor(None, self.__export_csv)
+            await loop.run_in_executor(None, self.__store_cached, key)
         return returncode
 
     def cst_run_optimizer(self, dc=None):
@@ -366,6 +731,9 @@ class CstModel:
         ----
         flags = " -m -o "
 
+        Refer to optimize.SurrogateOptimizer for an optimizer
+        with evaluation budget and parallel evaluations.
+
         Parameters
         ----------
         dc : str
@@ -385,7 +753,8 @@ class CstModel:
         self.toggle_mute(silent=True)
         return returncode
 
-    def cst_import_parfile(self, Parfilepath, timeout=600):
+    @telemetry.timed("import")
+    def cst_import_parfile(self, Parfilepath, timeout=600, rebuild=True):
         '''Runs CST routine for importing .par file.
 
         Note
@@ -399,6 +768,8 @@ class CstModel:
             ending on ".par"
         timeout : int or float, optional
             time in seconds till the command is terminated
+        rebuild : bool, optional
+            Wether cst_rebuild should be run after importing.
 
         Returns
         -------
@@ -410,28 +781,100 @@ class CstModel:
         flags = " -c -par " + Parfilepath + " "
         self.message(str(self), "importing parameter from\n\t", Parfilepath)
         self.toggle_mute(silent=True)
-        returncode = self._run(flags)
+        returncode = self._run(flags, timeout=timeout)
         self.toggle_mute(silent=True)
-        self.cst_rebuild()
+        if rebuild and returncode == 0:
+            self.cst_rebuild()
         return returncode
 
-    def __export_csv(self):
-        def gen_dataframe():
-            '''Creates a pandas-dataframe of all results and parameters'''
-            dct = {}
+    async def acst_import_parfile(self, Parfilepath, timeout=600,
+                                  rebuild=True):
+        '''Asynchronous cst_import_parfile, refer to it and arun'''
+        assert os.path.isfile(Parfilepath)
+        flags = " -c -par " + Parfilepath + " "
+        self.message(str(self), "importing parameter from\n\t", Parfilepath)
+        returncode = await self.arun(flags, timeout=timeout)
+        if rebuild and returncode == 0:
+            await self.acst_rebuild()
+        return returncode
+
+    def __restore_cached(self, flags, parameters_values=None):
+        '''Restores cached results of the current parameters
+
+        Returns
+        -------
+        tuple
+            (key, restored)
+            key: cache key of the parameters or None without cache
+            restored: True if results were restored from cache
+        '''
+        if self.result_cache is None:
+            return None, False
+        if parameters_values:
+            graph = self.get_parameter_graph()
+            params = graph.predict(parameters_values)
+        else:
             params = self.get_parameters()
+        key = self.result_cache.key(params, flags, self.cache_identity)
+        results = self.result_cache.get(key)
+        if results is None:
+            return key, False
+        self.message(str(self), "using cached results")
+        if parameters_values and not self._restoring:
+            if self.edit_parameters(parameters_values, rebuild=False) != 0:
+                return key, False
+        if not self.result_cache.restore_folder(key, self.RESULTPATH):
+            # results of other parameters must not remain
+            if os.path.isdir(self.RESULTPATH):
+                shutil.rmtree(self.RESULTPATH)
+            for resultname, value in results.items():
+                write.write_one_liner(
+                    self.RESULTPATH + resultname + ".rd0", value)
+        self.__export_csv(params)
+        return key, True
+
+    def __store_cached(self, key):
+        '''Stores current results under key in self.result_cache'''
+        if self.result_cache is not None and key is not None:
+            self.result_cache.put(
+                key, self.get_results(), folder=self.RESULTPATH)
+
+    def __export_csv(self, parameters=None):
+        def gen_row():
+            '''Creates a dictionary of all results and parameters'''
+            dct = {}
+            params = parameters
+            if params is None:
+                params = self.get_parameters()
             for key in params.keys():
-                dct[key] = [params[key]["value"]]
+                value = params[key]
+                if isinstance(value, dict):
+                    value = value["value"]
+                dct[key] = value
             results = self.get_results()
             for key in results:
-                dct[key] = [results[key]]
-            return DataFrame.from_dict(dct)
-        target = self.FILEPATH + self.csv_name
-        df = gen_dataframe()
+                dct[key] = results[key]
+            return dct
+        if self.result_store is not None:
+            self.result_store.append(gen_row())
+            self.message(str(self), "wrote to", self.result_store.path)
+            return
+        target = self.csv_folder + self.csv_name
+        df = DataFrame([gen_row()])
         write.write_csv(filepath=target, dataframe=df)
         print(str(self), "wrote to csv", target)
 
-    def sweep(self, parametername, values, dc=None, flags=None):
+    def _sweeper(self, dc=None, flags=None):
+        '''SweepEngine, or DcDispatcher if dc lists several controllers
+
+        The workspaces of a DcDispatcher are removed after the sweep.
+        '''
+        if dc is None or isinstance(dc, str):
+            return SweepEngine(self, dc=dc, flags=flags)
+        return DcDispatcher(self, dc, flags=flags, reuse=False)
+
+    def sweep(self, parametername, values, dc=None, flags=None,
+              journal=None):
         '''Performs a Eigenmode Sweep on the given values.
 
         Will perform a Eigenmode Sweep on the given values.
@@ -446,6 +889,8 @@ class CstModel:
         If flags are given, its not a eigenmode sweep,
         but a sweep with the selcted flag.
 
+        Refer to sweep_design for sweeping multiple parameters.
+
         Parameters
         ----------
         parametername : str
@@ -454,12 +899,22 @@ class CstModel:
         values : iterable(float or int)
             The values to sweep over.
 
-        dc : str
+        dc : str, list or dict
             Distributed comuting as "maincontroller:port" like
-            "142.2.245.136:360000".
+            "142.2.245.136:360000". Several controllers like
+            {"maincontroller:port": capacity} share the points,
+            refer to DcDispatcher.
 
         flags : str
             Refer to module _run().
+
+        journal : :obj:`SweepJournal`, str or bool
+            Resumes a crashed sweep, refer to SweepEngine.run.
+
+        Returns
+        -------
+        pandas.DataFrame
+            One row per value, refer to SweepEngine.run
         '''
 
         def check_args():
@@ -469,22 +924,124 @@ class CstModel:
 
         check_args()
         self.message(str(self), "sweeping", parametername)
-        # value_init = self.get_parameter(parametername)[1]
-        self.parhandler.backup()
-        # self.message("\tInitial value", value_init)
-        for run, value in enumerate(values):
-            self.message("\nRun", run, "/", len(value))
-            self.edit_paramert(parametername, value)
-            self.cst_rebuild()
-            if flags:
-                self._run(flags, dc)
-            else:
-                self.cst_run_eigenmode(dc)
-        # resetting to initial value
-        self.message(str(self), "resetting to initial value")
-        self.parhandler.recover()
-        # self.edit_paramert(parametername, value_init)
-        # self.cst_rebuild()
+        engine = self._sweeper(dc, flags)
+        return engine.run({parametername: list(values)}, journal=journal)
+
+    def adaptive_sweep(self, bounds, result, threshold=None, budget=50,
+                       tol=0.01, dc=None, flags=None):
+        '''Performs a sweep refined where result changes.
+
+        Note
+        ----
+        Parameters before and after sweep will
+        be the same.
+
+        Parameters
+        ----------
+        bounds : dict
+            {"parametername": (lower, upper)}
+
+        result : str
+            Result the refinement follows.
+
+        threshold, budget, tol : optional
+            Refer to AdaptiveSweep.
+
+        dc : str, list or dict
+            Distributed comuting as "maincontroller:port" like
+            "142.2.245.136:360000". Several controllers like
+            {"maincontroller:port": capacity} share the points,
+            refer to DcDispatcher.
+
+        flags : str
+            Refer to module _run().
+
+        Returns
+        -------
+        pandas.DataFrame
+            One row per point, refer to AdaptiveSweep.run
+        '''
+        self.message(str(self), "sweeping", ", ".join(bounds), "adaptively")
+        engine = self._sweeper(dc, flags)
+        return AdaptiveSweep(engine, result, threshold=threshold,
+                             budget=budget, tol=tol).run(bounds)
+
+    def sample_design(self, bounds, n, method="sobol", constraints=(),
+                      seed=None):
+        '''Design of n points satisfying constraints.
+
+        Note
+        ----
+        Constraints may use derived parameters, which
+        are computed without running CST.
+
+        Parameters
+        ----------
+        bounds : dict
+            {"parametername": (lower, upper)}
+
+        n : int
+            Number of points.
+
+        method, constraints, seed : optional
+            Refer to doe.sample.
+
+        Returns
+        -------
+        pandas.DataFrame
+            One row per point, refer to sweep_design.
+        '''
+        graph = self.get_parameter_graph() if constraints else None
+        return doe.sample(bounds, n, method=method, constraints=constraints,
+                          graph=graph, seed=seed)
+
+    def sweep_design(self, design, dc=None, flags=None, journal=None):
+        '''Performs a Eigenmode Sweep over a design matrix.
+
+        Note
+        ----
+        Parameters before and after sweep will
+        be the same.
+
+        Parameters
+        ----------
+        design : pandas.DataFrame, dict or list
+            Refer to sweep.design_matrix, e.g.
+            from sample_design or the doe module.
+
+        dc, flags, journal : optional
+            Refer to sweep.
+
+        Returns
+        -------
+        pandas.DataFrame
+            One row per point, refer to SweepEngine.run
+        '''
+        df = design_matrix(design)
+        self.message(str(self), "sweeping", len(df), "points of",
+                     ", ".join(df.columns))
+        engine = self._sweeper(dc, flags)
+        return engine.run(df, journal=journal)
+
+
+class ParameterBatch:
+    '''Parameter edits collected by CstModel.batch_parameters
+
+    Attributes
+    ----------
+    parameters_values : dict
+        merged edits, later edits win
+    rebuild : bool
+        Wether the model is rebuilt after importing.
+    returncode : int
+        returncode of the import, None till the batch ended
+
+    '''
+
+    def __init__(self, rebuild=False):
+        self.parameters_values = {}
+        self.rebuild = rebuild
+        self.returncode = None
 
 
 class Parfile:
@@ -504,11 +1061,20 @@ class Parfile:
     ----------
     path : str
         Path to Model.par
+    cache_hits : int
+        Number of get_parameters calls served from cache.
+    cache_misses : int
+        Number of get_parameters calls evaluating Model.par.
 
     '''
 
     def __init__(self, path, master_cav, autoanswer=None):
         self.autoanswer = autoanswer
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache_state = None
+        self._cache_digest = None
+        self._cache = None
         self._filetype = ".par"
         self._filetype_backup = ".parbackup"
         assert path[-len(self._filetype):] == self._filetype
@@ -522,11 +1088,59 @@ class Parfile:
             self._filetype_backup
         self.__handle_existing_backup()
 
+    @telemetry.timed("parameters")
+    def get_parameters(self):
+        '''Evaluated parameters of Model.par, cached by file state.
+
+        Note
+        ----
+        Model.par is only evaluated again if its mtime, size
+        or content hash changed, refer to read.unchanged.
+        The returned dictionary is the cache itself and
+        must not be modified.
+
+        Returns
+        -------
+        dictionary
+            {"parametername": {"equation": str, "value": float}}
+        '''
+        stat = os.stat(self.path)
+        same, state = read.unchanged(self.path, self._cache_state, stat)
+        if self._cache is not None and same:
+            self._cache_state = state
+            self.cache_hits += 1
+            return self._cache
+        with open(self.path, "rb") as file:
+            content = file.read()
+        digest = hashlib.sha1(content).hexdigest()
+        self._cache_state = read.file_state(stat, content)
+        if self._cache is not None and digest == self._cache_digest:
+            self.cache_hits += 1
+            return self._cache
+        self.cache_misses += 1
+        self._cache = read.eval_parfile(filepath=self.path)
+        self._cache_digest = digest
+        return self._cache
+
+    def cache_info(self):
+        '''Returns hit and miss counters of the parameter cache
+
+        Returns
+        -------
+        dict
+            {"hits": int, "misses": int}
+        '''
+        return {"hits": self.cache_hits, "misses": self.cache_misses}
+
     def backup(self):
         '''Copies /3D/Model/Model.par to Model.parbackup.
         '''
         shutil.copyfile(self.path, self._path_backup)
 
+    def has_backup(self):
+        '''True if Model.parbackup exists'''
+        return os.path.isfile(self._path_backup)
+
     def recover(self):
         '''Recovers parameters from backup.
 
@@ -552,9 +1166,21 @@ class Parfile:
         either neglecting the parameters
         or applying them to the cst-file.
 
+        The backup of an unfinished sweep with the default
+        journal or the journal recorded by journal.mark_active
+        is kept without asking, the resumed sweep recovers
+        it when done. Refer to journal.SweepJournal.
+
         '''
         if os.path.isfile(self._path_backup):
             self._master_cav.message("A Parfile backup has been detected")
+            journals = [journal_path(self._master_cav),
+                        active_journal(self._master_cav)]
+            for path in journals:
+                if path is not None and SweepJournal.unfinished(path):
+                    self._master_cav.message(
+                        "Keeping it for the unfinished sweep in", path)
+                    return
             if self.autoanswer:
                 answer = self.autoanswer
             else:
@@ -1,5 +1,74 @@
 import os
-import copy
+import re
+import time
+import mmap
+import hashlib
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pycst.expression as expression
+
+
+# CST (VBA-like) functions and constants usable in parameter equations.
+# Keys are lowercase, as parameter names are case-insensitive in CST.
+FUNCTIONS = dict(expression.FUNCTIONS, **expression.CONSTANTS)
+
+# lines of ASCII result files not holding numbers:
+# comments, titles and "-----" separators
+_HEADER = re.compile(rb"^[ \t]*(?:[^\s\d+\-.]|--).*$", re.MULTILINE)
+
+# files larger than this are memory-mapped instead of read
+MMAP_THRESHOLD = 1 << 24
+
+# bytes of a result file parsed at once
+_CHUNK = 1 << 22
+
+# files modified less than this many seconds ago may be written
+# again without a new mtime, within the filesystem timestamp resolution
+RACY_SECONDS = 2
+
+# results of run_id "0" are named "<name><ext>",
+# results of other run ids "<name>_<run_id><ext>"
+RUN_ID_SEPARATOR = "_"
+
+
+def scan_files(path: str, filetypes: list):
+    '''Yields all files in root and subdirs by filetypes
+
+    Parameters
+    ----------
+    path: str
+        directory to search files in
+    filetypes: list or str
+        all file extensions to search for like ".rd0",
+        matched exactly at the end of the filename
+
+    Yields
+    ------
+    tuple
+        (name, entry)
+        name: str(subdir + filename) relative to path,
+        neglecting file extension
+        entry: os.DirEntry of the file
+    '''
+    if isinstance(filetypes, str):
+        filetypes = [filetypes]
+    filetypes = tuple(filetypes)
+    stack = [""]
+    while stack:
+        subdir = stack.pop()
+        try:
+            entries = os.scandir(os.path.join(path, subdir))
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir():
+                    stack.append(subdir + entry.name + "/")
+                elif entry.name.endswith(filetypes):
+                    ext = next(ft for ft in filetypes
+                               if entry.name.endswith(ft))
+                    yield subdir + entry.name[:-len(ext)], entry
 
 
 def get_files(path: str, filetypes: list):
@@ -10,8 +79,7 @@ def get_files(path: str, filetypes: list):
     ----------
     path: str
         directory to search files in
-    filetypes: list
-        list of strings
+    filetypes: list or str
         all filetypes to search for
 
     Returns
@@ -20,17 +88,82 @@ def get_files(path: str, filetypes: list):
         list of files as str(subdir + filename)
         neglecting file extension
     '''
-    assert isinstance(filetypes, list)
-    res = []
-    for _path, subdirs, files in os.walk(path):
-        for name in files:
-            resname = os.path.join(_path, name)
-            resname = resname.replace("\\", "/")
-            resname = resname.replace(path, "")
-            for ft in filetypes:
-                if ft in resname:
-                    res.append(resname.replace(ft, ""))
-    return res
+    return [name for name, entry in scan_files(path, filetypes)]
+
+
+def file_state(stat, content=None, path=None):
+    '''Fingerprint of a file to detect changes, refer to unchanged
+
+    Parameters
+    ----------
+    stat: os.stat_result
+        stat of the file
+    content: bytes, optional
+        content of the file, read after stat
+    path: str, optional
+        path of the file, read if the content is needed
+
+    Returns
+    -------
+    tuple
+        (mtime_ns, size, digest)
+        digest: sha1 of the content if the file is racy,
+        modified less than RACY_SECONDS ago, else None
+    '''
+    digest = None
+    if time.time() - stat.st_mtime < RACY_SECONDS:
+        if content is None:
+            with open(path, "rb") as file:
+                content = file.read()
+        digest = hashlib.sha1(content).hexdigest()
+    return stat.st_mtime_ns, stat.st_size, digest
+
+
+def unchanged(path, state, stat=None):
+    '''Whether a file still has the state returned by file_state
+
+    Note
+    ----
+    Files recorded while racy are compared by content hash,
+    as mtime and size may be the same after a further write.
+    Once verified after RACY_SECONDS, their state no longer
+    holds a hash and mtime and size are trusted.
+
+    Parameters
+    ----------
+    path: str
+        path of the file
+    state: tuple or None
+        returned by file_state
+    stat: os.stat_result, optional
+        current stat of the file
+
+    Returns
+    -------
+    tuple
+        (unchanged, state)
+        unchanged: bool
+        state: the updated state, None if changed
+    '''
+    if state is None:
+        return False, None
+    if stat is None:
+        stat = os.stat(path)
+    if state[:2] != (stat.st_mtime_ns, stat.st_size):
+        return False, None
+    if state[2] is None:
+        return True, state
+    with open(path, "rb") as file:
+        content = file.read()
+    if hashlib.sha1(content).hexdigest() != state[2]:
+        return False, None
+    return True, file_state(stat, content)
+
+
+def _one_liner(text):
+    lines = text.splitlines()
+    assert len(lines) == 1
+    return float(lines[0])
 
 
 def read_one_liner(path: str):
@@ -45,15 +178,430 @@ def read_one_liner(path: str):
     -------
     float
         '''
-    file = open(path, mode='r')
-    lines = file.readlines()
-    assert len(lines) == 1
-    return float(lines[0])
+    with open(path, mode='r') as file:
+        return _one_liner(file.read())
+
+
+def _parse_block(data, path, start=0, end=None):
+    '''parses whitespace seperated numbers of data[start:end] to 2D array
+
+    Parsed in chunks of whole lines, so a memory-mapped
+    file is never copied to memory at once.
+    '''
+    end = len(data) if end is None else end
+    columns = None
+    parts = []
+    while start < end:
+        stop = min(end, start + _CHUNK)
+        if stop < end:
+            newline = data.rfind(b"\n", start, stop)
+            if newline < 0:
+                # line longer than a chunk
+                newline = data.find(b"\n", stop, end)
+            stop = end if newline < 0 else newline + 1
+        chunk = data[start:stop].strip()
+        start = stop
+        if not chunk:
+            continue
+        if columns is None:
+            columns = len(chunk.split(b"\n", 1)[0].split())
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            try:
+                values = np.fromstring(chunk, sep=" ")
+            except (ValueError, DeprecationWarning):
+                raise ValueError("Invalid numbers in " + path)
+        if values.size % columns:
+            raise ValueError("Rows of different length in " + path)
+        parts.append(values)
+    if columns is None:
+        return None
+    values = parts[0] if len(parts) == 1 else np.concatenate(parts)
+    return values.reshape(-1, columns)
+
+
+def read_1d(path: str):
+    '''Reads ASCII 1D result file to numpy array
+
+    Note
+    ----
+    Lines which do not start with a number, like
+    "#" comments, titles and "---" separators, are
+    headers. Every header ends a block of numbers,
+    e.g. the curves of several run ids in one file.
+    Files larger than MMAP_THRESHOLD are memory-mapped
+    and parsed in chunks, only the numbers are held in memory.
+
+    Parameters
+    ----------
+    path: str
+        path to result file
+
+    Returns
+    -------
+    numpy.ndarray or list
+        shape (rows, columns) for a single block,
+        (blocks, rows, columns) if all blocks have the same shape,
+        else list of 2D arrays
+    '''
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size > MMAP_THRESHOLD:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            data = file.read()
+    try:
+        blocks = []
+        start = 0
+        for header in _HEADER.finditer(data):
+            blocks.append(_parse_block(data, path, start, header.start()))
+            start = header.end()
+        blocks.append(_parse_block(data, path, start))
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+    blocks = [b for b in blocks if b is not None]
+    if not blocks:
+        return np.empty((0, 0))
+    if len(blocks) == 1:
+        return blocks[0]
+    if len({b.shape for b in blocks}) == 1:
+        return np.stack(blocks)
+    return blocks
+
+
+# readers of the supported result filetypes
+READERS = {
+    ".rd0": read_one_liner,
+    ".rd1": read_1d,
+    ".sig": read_1d,
+    ".txt": read_1d,
+}
+
+
+def run_name(resultname: str, run_id="0"):
+    '''Filename of result of run_id without extension'''
+    if str(run_id) == "0":
+        return resultname
+    return resultname + RUN_ID_SEPARATOR + str(run_id)
+
+
+def split_run_ids(names):
+    '''Groups result names by run id
+
+    Note
+    ----
+    "<name>_<digits>" is a run of "<name>" only if
+    "<name>" exists as well, otherwise it is a result
+    of its own.
+
+    Parameters
+    ----------
+    names : iterable(str)
+        result names as returned by get_files
+
+    Returns
+    -------
+    dict
+        {"resultname": {"run_id": "name"}}
+    '''
+    names = set(names)
+    res = {}
+    for name in names:
+        base, sep, run_id = name.rpartition(RUN_ID_SEPARATOR)
+        if sep and run_id.isdigit() and base in names:
+            res.setdefault(base, {})[run_id] = name
+        else:
+            res.setdefault(name, {})["0"] = name
+    return res
+
+
+def read_runs(path: str, resultname: str, filetype=".rd1"):
+    '''Reads results of all run ids of resultname
+
+    Parameters
+    ----------
+    path: str
+        Result folder
+    resultname: str
+        name of result, refer to get_files
+    filetype: str, optional
+        one of READERS
+
+    Returns
+    -------
+    tuple
+        (run_ids, data)
+        run_ids: list of str, sorted numerically
+        data: numpy.ndarray stacking the results along
+        the first axis if they have the same shape, else list
+    '''
+    reader = READERS[filetype]
+    folder = os.path.dirname(resultname)
+    names = [os.path.join(folder, n).replace("\\", "/") for n, entry in
+             scan_files(os.path.join(path, folder), [filetype])
+             if "/" not in n]
+    runs = split_run_ids(names).get(resultname, {})
+    if not runs:
+        raise FileNotFoundError(os.path.join(path, resultname + filetype))
+    run_ids = sorted(runs, key=int)
+    data = [reader(os.path.join(path, runs[r] + filetype)) for r in run_ids]
+    shapes = {np.shape(d) if not isinstance(d, list) else None for d in data}
+    if len(shapes) == 1 and None not in shapes:
+        data = np.stack([np.asarray(d) for d in data])
+    return run_ids, data
+
+
+class ResultScanner:
+    '''Reads all single lined results below a folder.
+
+    Repeated scans only read files whose mtime or
+    size changed since the previous scan. Files
+    which were racy, refer to unchanged, are
+    compared by content hash instead.
+
+    Parameters
+    ----------
+    path : str
+        Result folder.
+    filetype : str, optional
+        Extension of the results to read.
+    workers : int, optional
+        Number of threads reading files in parallel.
+
+    Attributes
+    ----------
+    errors : dict
+        keys: result names which could not be read by the last scan
+        values: the raised exception
+
+    '''
+
+    def __init__(self, path, filetype=".rd0", workers=8):
+        self.path = path
+        self.filetype = filetype
+        self.workers = workers
+        self.errors = {}
+        self._entries = {}
+
+    @staticmethod
+    def _refresh(path, stat, old):
+        '''returns (state, value) of a racy or changed file'''
+        if old is not None:
+            same, state = unchanged(path, old[0], stat)
+            if same:
+                return state, old[1]
+        with open(path, "rb") as file:
+            content = file.read()
+        return file_state(stat, content), _one_liner(content)
+
+    def scan(self):
+        '''Returns all results, reading changed files only
+
+        Returns
+        -------
+        dict
+            keys: str, result names
+            values: float, result values
+        '''
+        entries = {}
+        changed = []
+        for name, entry in scan_files(self.path, [self.filetype]):
+            stat = entry.stat()
+            old = self._entries.get(name)
+            if old is not None and old[0][2] is None and \
+                    old[0][:2] == (stat.st_mtime_ns, stat.st_size):
+                entries[name] = old
+            else:
+                changed.append((name, entry.path, stat, old))
+        self.errors = {}
+        if changed:
+            with ThreadPoolExecutor(self.workers) as pool:
+                futures = [
+                    (name, pool.submit(self._refresh, path, stat, old))
+                    for name, path, stat, old in changed]
+            for name, future in futures:
+                try:
+                    entries[name] = future.result()
+                except (OSError, ValueError, AssertionError) as e:
+                    self.errors[name] = e
+        self._entries = entries
+        return {name: value for name, (state, value) in entries.items()}
+
+
+tokenize = expression.tokenize
+
+
+def compile_equation(equation: str):
+    '''Parses a parameter equation once for repeated evaluation
+
+    Note
+    ----
+    Names are lowercased. Refer to expression.Expression.
+
+    Parameters
+    ----------
+    equation: str
+        equation as written in the parfile
+
+    Returns
+    -------
+    tuple
+        (code, dependencies)
+        code: :obj:`Expression`, to be evaluated with
+        a namespace holding FUNCTIONS and lowercase parameter values
+        dependencies: set of lowercase names used in equation,
+        without called functions
+    '''
+    code = expression.Expression(equation)
+    return code, set(code.names)
+
+
+def evaluate(code, namespace: dict):
+    '''Evaluates an equation returned by compile_equation
+
+    Parameters
+    ----------
+    code: :obj:`Expression`
+        compiled equation
+    namespace: dict
+        lowercase names and their values,
+        usually FUNCTIONS updated by parameter values
+
+    Returns
+    -------
+    float or int
+    '''
+    return code(namespace)
+
+
+def resolve(name: str, dependencies: set, names):
+    '''Dependencies of parameter name which are parameters
+
+    Note
+    ----
+    Parameters shadow functions of the same name.
+    Costs only the number of dependencies, not of names.
+
+    Parameters
+    ----------
+    name: str
+        Parametername, for the error message
+    dependencies: set
+        lowercase names returned by compile_equation
+    names: dict or set
+        lowercase names of all parameters
+
+    Returns
+    -------
+    set
+        dependencies without functions
+
+    Raises
+    ------
+    NameError
+        if a dependency is neither a parameter nor a function
+    '''
+    deps = {d for d in dependencies if d in names or d not in FUNCTIONS}
+    unresolved = {d for d in deps if d not in names}
+    if unresolved:
+        raise NameError(
+            "Parameter %r uses undefined name(s) %s"
+            % (name, ", ".join(sorted(unresolved)))
+        )
+    return deps
+
+
+def topological_order(dependencies: dict):
+    '''Orders names so that each one follows all of its dependencies
+
+    Parameters
+    ----------
+    dependencies: dict
+        keys: names
+        values: set of names the key depends on,
+        every name must be a key itself
+
+    Returns
+    -------
+    list
+        names in evaluation order
+
+    Raises
+    ------
+    ValueError
+        if dependencies contain a cycle
+    '''
+    dependents = {name: [] for name in dependencies}
+    pending = {}
+    for name, deps in dependencies.items():
+        pending[name] = len(deps)
+        for dep in deps:
+            dependents[dep].append(name)
+    order = [name for name, n in pending.items() if n == 0]
+    for name in order:
+        for dependent in dependents[name]:
+            pending[dependent] -= 1
+            if pending[dependent] == 0:
+                order.append(dependent)
+    if len(order) != len(dependencies):
+        raise ValueError(
+            "Cyclic parameter dependency: " +
+            " -> ".join(_find_cycle(dependencies, set(order)))
+        )
+    return order
+
+
+def _find_cycle(dependencies: dict, resolved: set):
+    '''returns one cycle among the unresolved names as list'''
+    name = next(n for n in dependencies if n not in resolved)
+    path = []
+    while name not in path:
+        path.append(name)
+        name = next(d for d in dependencies[name] if d not in resolved)
+    return path[path.index(name):] + [name]
+
+
+def parse_parfile(filepath: str):
+    '''Reads name and equation of all parameters in Parfile
+
+    Parameters
+    ----------
+    filepath: str
+        absolute path to parfile
+
+    Returns
+    -------
+    list
+        list of [name, equation] in file order
+    '''
+    with open(filepath, mode='r') as file:
+        lines = file.read().splitlines()
+    params = []
+    for line in lines:
+        # assumption:
+        # [0]: name, [1]: equation, [2]: comment
+        p = [a.replace(" ", "") for a in line.split("  ") if a != ""]
+        p = [a for a in p if a != ""]
+        if not p or p[-1] == "-1":
+            continue
+        if len(p) > 3:
+            raise Exception("Bug occured, pleas fix here")
+        if len(p) < 2:
+            raise ValueError("No equation for parameter %r" % p[0])
+        # neglection comment
+        params.append(p[:2])
+    return params
 
 
 def eval_parfile(filepath: str):
     '''Reads and evaluates all parameters in Parfile
 
+    Note
+    ----
+    Every equation is compiled once and evaluated in
+    dependency order, so loading is linear in the
+    number of parameters.
+
     Parameters
     ----------
     filepath: str
@@ -63,79 +611,32 @@ def eval_parfile(filepath: str):
     -------
     dictionary
         {"parametername": {"equation": str, "value": float}}
-    '''
-    def compute_values(params):
-        '''compute the value of all equations
-        '''
 
-        def evaluate():
-            '''try to evaluate all equations
-
-            Note
-            ----
-            _params and params will be edited
-            '''
-            for idx, p in enumerate(_params):
-                equation = p[1]
-                equation.replace("^", "**")
-                try:
-                    if len(p) != 3:
-                        # for working
-                        p.append(eval(equation))
-                    if len(params[idx]) != 3:
-                        # for output
-                        params[idx].append(eval(equation))
-                except NameError:
-                    pass
-
-        # working copy
-        # to apply .lower() without changing it in params
-        _params = copy.deepcopy(params)
-        evaluate()
-        while True:
-            evaluated = [p for p in _params if len(p) == 3]
-            for e in evaluated:
-                name, val = e[0].lower(), e[2]
-                for i, p in enumerate(_params):
-                    equation = p[1].lower()
-                    if name in equation:
-                        idx = equation.index(name) + len(name)
-                        if idx == len(equation):
-                            _params[i][1] = \
-                                equation.replace(name, str(val))
-                        else:
-                            # mathematical symbols after name so that
-                            # following example cant happen
-                            # "ih" : 1,"ih_1" :9
-                            # "ih_1".replace(..)
-                            # "9_1"
-                            if equation[idx] in\
-                               ["+", "-", "*", "/", "^", ")"]:
-                                _params[i][1] = \
-                                    equation.replace(name, str(val))
-            evaluate()
-            if len(evaluated) == len(_params):
-                return params
-
-    file = open(filepath, mode='r')
-    # formatting
-    params = [x for x in file.readlines()]
-    params = [x.split("  ") for x in params]
-    params = [[a for a in x if a not in [""]] for x in params]
-    params = [[a.replace(" ", "") for a in x] for x in params]
-    params = [x for x in params if x[-1] != "-1\n"]
-    # assumption:
-    # [0]: name, [1]: equation, [2]: comment
-    # asserting assumtion
-    for p in params:
-        if len(p) > 3:
-            raise Exception("Bug occured, pleas fix here")
-    # neglection comment
-    params = [x[:2] for x in params]
-    params = sorted(params, key=lambda x: -len(x[0]))
-    params = compute_values(params)
+    Raises
+    ------
+    NameError
+        if an equation uses an unknown name
+    ValueError
+        if parameters depend on each other cyclically
+    '''
+    params = parse_parfile(filepath)
+    names = {}
+    codes = {}
+    dependencies = {}
+    for name, equation in params:
+        lname = name.lower()
+        names[lname] = name
+        codes[lname], dependencies[lname] = compile_equation(equation)
+    for lname, deps in dependencies.items():
+        dependencies[lname] = resolve(names[lname], deps, names)
+    namespace = dict(FUNCTIONS)
+    for lname in topological_order(dependencies):
+        namespace[lname] = evaluate(codes[lname], namespace)
     # return dictionary as result
     res = {}
-    for p in params:
-        res[p[0]] = {"equation": p[1], "value": float(p[2])}
+    for name, equation in params:
+        res[name] = {
+            "equation": equation,
+            "value": float(namespace[name.lower()])
+        }
     return res
@@ -0,0 +1,117 @@
+import os
+import sys
+import signal
+import asyncio
+import subprocess
+
+EXITCODE_SUCCESS = 0
+EXITCODE_FAILED = 1
+EXITCODE_ABORTEDBYUSER = 2
+EXITCODE_NOLICENSE = 3
+EXITCODE_FAILED_TO_OPEN = 4
+
+# returncodes of "CST DESIGN ENVIRONMENT"
+EXITCODES = {
+    EXITCODE_SUCCESS: "EXITCODE_SUCCESS",
+    EXITCODE_FAILED: "EXITCODE_FAILED",
+    EXITCODE_ABORTEDBYUSER: "EXITCODE_ABORTEDBYUSER",
+    EXITCODE_NOLICENSE: "EXITCODE_NOLICENSE",
+    EXITCODE_FAILED_TO_OPEN: "EXITCODE_FAILED_TO_OPEN",
+}
+
+
+def popen_kwargs():
+    '''Keyword arguments to start a process in its own process group
+
+    Note
+    ----
+    Needed by kill_tree to terminate the process
+    together with all processes it started.
+
+    Returns
+    -------
+    dict
+        for subprocess.Popen or asyncio.create_subprocess_exec
+    '''
+    if sys.platform == "win32":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def kill_tree(pid):
+    '''Kills process pid and all of its child processes
+
+    Parameters
+    ----------
+    pid : int
+        id of a process started with popen_kwargs()
+    '''
+    if sys.platform == "win32":
+        subprocess.call(
+            ["taskkill", "/F", "/T", "/PID", str(pid)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+async def _stream(reader, name, on_line):
+    while True:
+        line = await reader.readline()
+        if not line:
+            return
+        on_line(name, line.decode(errors="replace").rstrip("\r\n"))
+
+
+async def _reap(proc, streams):
+    '''waits for a killed process and stops reading its output'''
+    await proc.wait()
+    streams.cancel()
+    try:
+        await streams
+    except asyncio.CancelledError:
+        pass
+
+
+async def run_async(cmd, timeout=None, on_line=None):
+    '''Runs cmd as subprocess and streams its output line by line
+
+    Parameters
+    ----------
+    cmd : list
+        program and arguments
+    timeout : int or float, optional
+        time in seconds till the process tree is killed
+    on_line : callable, optional
+        called as on_line(stream, line) for every line,
+        stream is "stdout" or "stderr"
+
+    Returns
+    -------
+    int
+        returncode, 1 if timeout expired
+    '''
+    if on_line is None:
+        def on_line(stream, line):
+            pass
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE, **popen_kwargs())
+    streams = asyncio.gather(
+        _stream(proc.stdout, "stdout", on_line),
+        _stream(proc.stderr, "stderr", on_line))
+    try:
+        await asyncio.wait_for(proc.wait(), timeout)
+    except asyncio.TimeoutError:
+        kill_tree(proc.pid)
+        await _reap(proc, streams)
+        return 1
+    except asyncio.CancelledError:
+        kill_tree(proc.pid)
+        # reaps the process, cancelling again must not leave it behind
+        await asyncio.shield(_reap(proc, streams))
+        raise
+    await streams
+    return proc.returncode
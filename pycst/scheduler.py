@@ -0,0 +1,262 @@
+import os
+import time
+import heapq
+import itertools
+import threading
+from pycst.runner import EXITCODE_NOLICENSE
+
+
+# how a job of each kind is run on its model
+KINDS = {
+    "rebuild": lambda model, **kwargs: model.cst_rebuild(**kwargs),
+    "eigenmode": lambda model, **kwargs: model.cst_run_eigenmode(**kwargs),
+    "optimizer": lambda model, **kwargs: model.cst_run_optimizer(**kwargs),
+}
+
+
+class Job:
+    '''A CST run queued in a Scheduler.
+
+    Parameters
+    ----------
+    model : :obj:`CstModel`
+        Model to run.
+    kind : str
+        One of KINDS: "rebuild", "eigenmode" or "optimizer".
+    priority : int, optional
+        Jobs of higher priority are started first.
+    kwargs : dict, optional
+        Passed to the CstModel method of kind.
+
+    Attributes
+    ----------
+    returncode : int or None
+        Returncode of the last finished attempt.
+    attempts : int
+        Number of started attempts.
+    error : Exception or None
+        Raised by the last attempt.
+
+    '''
+
+    def __init__(self, model, kind, priority=0, kwargs=None):
+        if kind not in KINDS:
+            raise ValueError("Unknown job kind %r" % kind)
+        self.model = model
+        self.kind = kind
+        self.priority = priority
+        self.kwargs = kwargs or {}
+        self.returncode = None
+        self.attempts = 0
+        self.error = None
+        self._done = threading.Event()
+
+    def __repr__(self):
+        return "Job(%s, %s, priority=%s)" % (
+            str(self.model), self.kind, self.priority)
+
+    def done(self):
+        '''True if job finished, including all retries'''
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        '''Waits till job finished and returns its returncode'''
+        self._done.wait(timeout)
+        return self.returncode
+
+
+class Scheduler:
+    '''Queues CST runs and starts them within licence limits.
+
+    Note
+    ----
+    Runs failing with EXITCODE_NOLICENSE are queued
+    again after a backoff of
+    backoff * backoff_factor ** (attempts - 1) seconds.
+    A model never runs two jobs at the same time.
+
+    Parameters
+    ----------
+    limits : dict, optional
+        Maximum number of concurrent jobs per kind,
+        missing kinds are limited to 1.
+        Defaults to one "eigenmode" and one "optimizer"
+        licence and one "rebuild" per cpu.
+    total : int, optional
+        Maximum number of concurrent jobs of all kinds.
+    retries : int, optional
+        How often a job is retried on EXITCODE_NOLICENSE.
+    backoff : int or float, optional
+        Seconds to wait before the first retry.
+    backoff_factor : int or float, optional
+        Growth of the backoff per retry.
+
+    '''
+
+    def __init__(self, limits=None, total=None, retries=3, backoff=30,
+                 backoff_factor=2):
+        if limits is None:
+            limits = {
+                "rebuild": os.cpu_count() or 1,
+                "eigenmode": 1,
+                "optimizer": 1,
+            }
+        self.limits = limits
+        self.total = total
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_factor = backoff_factor
+        # {kind: heap of (-priority, count, job)} of startable jobs
+        self._queues = {}
+        # heap of (not_before, count, job) waiting for a retry
+        self._delayed = []
+        self._counter = itertools.count()
+        self._running = {}
+        self._models = set()
+        self._unfinished = 0
+        self._stopped = False
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.join()
+        self.shutdown()
+
+    def submit(self, model, kind, priority=0, **kwargs):
+        '''Queues a run
+
+        Parameters
+        ----------
+        model : :obj:`CstModel`
+            Model to run.
+        kind : str
+            "rebuild", "eigenmode" or "optimizer"
+        priority : int, optional
+            Jobs of higher priority are started first.
+        kwargs : optional
+            Passed to the CstModel method of kind,
+            e.g. dc or timeout.
+
+        Returns
+        -------
+        :obj:`Job`
+        '''
+        job = Job(model, kind, priority, kwargs)
+        with self._condition:
+            self._unfinished += 1
+            self._push(job, 0)
+        return job
+
+    def _push(self, job, not_before):
+        count = next(self._counter)
+        if not_before:
+            heapq.heappush(self._delayed, (not_before, count, job))
+        else:
+            heapq.heappush(self._queues.setdefault(job.kind, []),
+                           (-job.priority, count, job))
+        self._condition.notify_all()
+
+    def start(self):
+        '''Starts dispatching queued jobs in a background thread'''
+        if self._thread is not None:
+            return
+        self._stopped = False
+        self._thread = threading.Thread(target=self._dispatch, daemon=True)
+        self._thread.start()
+
+    def join(self, timeout=None):
+        '''Waits till all submitted jobs finished
+
+        Returns
+        -------
+        bool
+            False if timeout expired before
+        '''
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._unfinished == 0, timeout)
+
+    def shutdown(self):
+        '''Stops dispatching, running jobs are not interrupted'''
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _free(self, kind):
+        if self.total is not None and \
+                sum(self._running.values()) >= self.total:
+            return False
+        return self._running.get(kind, 0) < self.limits.get(kind, 1)
+
+    def _next(self):
+        '''pops next startable job, returns (job, None) or (None, wait)'''
+        now = time.monotonic()
+        while self._delayed and self._delayed[0][0] <= now:
+            _, count, job = heapq.heappop(self._delayed)
+            heapq.heappush(self._queues.setdefault(job.kind, []),
+                           (-job.priority, count, job))
+        # best startable entry of every kind with a free licence
+        candidates = []
+        for kind, queue in self._queues.items():
+            if not queue or not self._free(kind):
+                continue
+            # jobs of models running another job stay queued
+            busy = []
+            while queue and queue[0][2].model in self._models:
+                busy.append(heapq.heappop(queue))
+            if queue:
+                candidates.append((heapq.heappop(queue), queue))
+            for entry in busy:
+                heapq.heappush(queue, entry)
+        if candidates:
+            best = min(candidates, key=lambda c: c[0][:2])
+            for entry, queue in candidates:
+                if entry is not best[0]:
+                    heapq.heappush(queue, entry)
+            return best[0][2], None
+        if self._delayed:
+            return None, self._delayed[0][0] - now
+        return None, None
+
+    def _dispatch(self):
+        with self._condition:
+            while not self._stopped:
+                job, wait = self._next()
+                if job is None:
+                    self._condition.wait(wait)
+                    continue
+                self._running[job.kind] = self._running.get(job.kind, 0) + 1
+                self._models.add(job.model)
+                job.attempts += 1
+                threading.Thread(
+                    target=self._execute, args=(job,), daemon=True).start()
+
+    def _execute(self, job):
+        job.error = None
+        try:
+            returncode = KINDS[job.kind](job.model, **job.kwargs)
+        except Exception as e:
+            job.error = e
+            returncode = None
+        with self._condition:
+            self._running[job.kind] -= 1
+            self._models.discard(job.model)
+            job.returncode = returncode
+            if returncode == EXITCODE_NOLICENSE and \
+                    job.attempts <= self.retries:
+                delay = self.backoff * \
+                    self.backoff_factor ** (job.attempts - 1)
+                job.model.message(
+                    str(job.model), "no licence, retrying in", delay, "s")
+                self._push(job, time.monotonic() + delay)
+            else:
+                self._unfinished -= 1
+                job._done.set()
+                self._condition.notify_all()
@@ -0,0 +1,282 @@
+'''Sessions keeping a CST model opened between commands.
+
+pycst does not ship a session server. By default a model has no
+session and every command starts CST with its command line flags
+(``-m``), refer to CstModel._run. A Session needs a bridge, a
+program started as ``command + [model.FILENAME]`` which opens the
+model once, e.g. through the CST Python or COM interface, and
+speaks the following JSON-lines protocol on stdin and stdout.
+
+Every request is one line with an "id" and a "cmd":
+
+    {"id": 1, "cmd": "ping"}
+    {"id": 2, "cmd": "run", "flags": ["-m", "-rebuild"]}
+    {"id": 0, "cmd": "quit"}
+
+"ping" and "run" are answered with one line holding the id
+of the request and the exit code:
+
+    {"id": 2, "returncode": 0}
+
+"run" does what the CST command line would do with these flags
+on the opened model, the model path is not part of the flags.
+"quit" is not answered, the server closes the model and exits.
+Answers with an unknown id are ignored, every other line printed
+on stdout is passed to model.message. A server that exits or does
+not answer in time is killed and restarted.
+tests/fakesession.py is a stand-in server used by the tests.
+'''
+import json
+import queue
+import itertools
+import threading
+import subprocess
+from collections import OrderedDict
+import pycst.runner as runner
+import pycst.telemetry as telemetry
+
+
+class SessionError(Exception):
+    '''Raised if a session process does not answer'''
+
+
+class Session:
+    '''Keeps one CST process with an opened model alive.
+
+    Commands are sent to a session server, a process started as
+    ``command + [model.FILENAME]`` which keeps the model opened.
+    pycst ships no such server, refer to the module docstring
+    for the protocol a bridge has to speak. A dead or hanging
+    server is restarted.
+
+    Parameters
+    ----------
+    model : :obj:`CstModel`
+        Model opened by the session.
+    command : list
+        Program and arguments of the session server,
+        a bridge to CST.
+    timeout : int or float, optional
+        Seconds to wait for answers to "ping".
+    restarts : int, optional
+        How often a command is retried after the server died.
+
+    Attributes
+    ----------
+    starts : int
+        Number of started server processes.
+
+    '''
+
+    def __init__(self, model, command, timeout=60, restarts=1):
+        self.model = model
+        self.command = list(command)
+        self.timeout = timeout
+        self.restarts = restarts
+        self.starts = 0
+        self._proc = None
+        self._answers = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def alive(self):
+        '''True if the server process is running'''
+        return self._proc is not None and self._proc.poll() is None
+
+    def start(self):
+        '''Starts the server process if not running'''
+        if self.alive():
+            return
+        self.close()
+        cmd = self.command + [self.model.FILENAME]
+        self.model.message(str(self.model), "starting session:\n\t",
+                           " ".join(cmd))
+        with telemetry.span("session_start", self.model, phase="startup"):
+            self._proc = subprocess.Popen(
+                cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                universal_newlines=True, bufsize=1,
+                **runner.popen_kwargs())
+        self._answers = queue.Queue()
+        self.starts += 1
+        threading.Thread(
+            target=self._read, args=(self._proc, self._answers),
+            daemon=True).start()
+
+    def _read(self, proc, answers):
+        for line in proc.stdout:
+            try:
+                answer = json.loads(line)
+            except ValueError:
+                answer = None
+            if isinstance(answer, dict) and "id" in answer:
+                answers.put(answer)
+            else:
+                self.model.message(str(self.model), line.rstrip("\n"))
+        answers.put(None)
+
+    def close(self):
+        '''Ends the server process'''
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        if proc.poll() is None:
+            try:
+                proc.stdin.write(json.dumps({"id": 0, "cmd": "quit"}) + "\n")
+                proc.stdin.flush()
+                proc.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                runner.kill_tree(proc.pid)
+                proc.wait()
+        try:
+            proc.stdin.close()
+        except OSError:
+            pass
+
+    def _kill(self):
+        if self._proc is not None:
+            runner.kill_tree(self._proc.pid)
+            self._proc.wait()
+            self.close()
+
+    def _request(self, request, timeout):
+        request["id"] = next(self._ids)
+        try:
+            self._proc.stdin.write(json.dumps(request) + "\n")
+            self._proc.stdin.flush()
+        except OSError:
+            raise SessionError("session died")
+        while True:
+            try:
+                answer = self._answers.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError("session did not answer")
+            if answer is None:
+                raise SessionError("session died")
+            if answer["id"] == request["id"]:
+                return answer
+
+    def ping(self):
+        '''Health check, restarts a dead or hanging server
+
+        Returns
+        -------
+        bool
+            True if the server answered,
+            possibly after a restart
+        '''
+        with self._lock:
+            for attempt in range(2):
+                self.start()
+                try:
+                    self._request({"cmd": "ping"}, self.timeout)
+                    return True
+                except (SessionError, TimeoutError):
+                    self._kill()
+            return False
+
+    def run(self, flags, timeout=None):
+        '''Runs CST command line flags in the session
+
+        Parameters
+        ----------
+        flags : list or str
+            Refer to CstModel._run, without the model path.
+        timeout : int or float, optional
+            Time in seconds till the server is killed.
+
+        Returns
+        -------
+        int
+            returncode, 1 on timeout
+        '''
+        if isinstance(flags, str):
+            flags = flags.split()
+        with self._lock:
+            for attempt in range(self.restarts + 1):
+                self.start()
+                try:
+                    answer = self._request(
+                        {"cmd": "run", "flags": list(flags)}, timeout)
+                    return answer["returncode"]
+                except TimeoutError:
+                    self._kill()
+                    return 1
+                except SessionError:
+                    self.model.message(str(self.model), "session died")
+                    self._kill()
+            return 1
+
+
+class SessionPool:
+    '''Keeps sessions of up to size models alive.
+
+    Parameters
+    ----------
+    command : list
+        Refer to Session.
+    size : int, optional
+        Maximum number of running sessions,
+        the least recently used one is closed first and
+        detached from its model, which then runs CST directly
+        till it is attached again.
+    kwargs : optional
+        Passed to Session.
+
+    '''
+
+    def __init__(self, command, size=1, **kwargs):
+        self.command = command
+        self.size = size
+        self._kwargs = kwargs
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get(self, model):
+        '''Returns the session of model, started by its first command
+
+        Returns
+        -------
+        :obj:`Session`
+        '''
+        with self._lock:
+            key = model.FILENAME
+            if key in self._sessions:
+                self._sessions.move_to_end(key)
+                return self._sessions[key]
+            while len(self._sessions) >= self.size:
+                self._evict(self._sessions.popitem(last=False)[1])
+            session = Session(model, self.command, **self._kwargs)
+            self._sessions[key] = session
+            return session
+
+    @staticmethod
+    def _evict(session):
+        '''closes session and detaches it from its model'''
+        session.close()
+        # an attached model would restart it with its next command
+        if getattr(session.model, "session", None) is session:
+            session.model.session = None
+
+    def attach(self, model):
+        '''Sends all CST calls of model to its session'''
+        model.session = self.get(model)
+        return model.session
+
+    def close(self):
+        '''Ends all sessions'''
+        with self._lock:
+            while self._sessions:
+                self._evict(self._sessions.popitem()[1])
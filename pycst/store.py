@@ -0,0 +1,157 @@
+import os
+import json
+import glob
+import time
+import socket
+import threading
+import pandas as pd
+import pycst.write as write
+
+
+class ResultStore:
+    '''Append-only store of result rows shared by many writers.
+
+    Every writer appends to its own shard, a JSON-lines
+    file in the store folder, so rows are never rewritten
+    and concurrent writers never touch the same file.
+    compact merges the shards into a columnar file.
+
+    Parameters
+    ----------
+    path : str
+        Store folder, created if missing.
+    writer : str, optional
+        Name of the shard to append to.
+        Defaults to a name unique per host and process.
+    fmt : str, optional
+        Columnar format used by compact,
+        "parquet" or "feather". Both need pyarrow.
+
+    '''
+
+    _columnar = {
+        "parquet": (pd.read_parquet, "to_parquet"),
+        "feather": (pd.read_feather, "to_feather"),
+    }
+
+    def __init__(self, path, writer=None, fmt="parquet"):
+        if fmt not in self._columnar:
+            raise ValueError("Unknown format %r" % fmt)
+        self.path = path.replace("\\", "/").rstrip("/") + "/"
+        os.makedirs(self.path, exist_ok=True)
+        if writer is None:
+            writer = "%s-%d" % (socket.gethostname(), os.getpid())
+        self.writer = writer
+        self.fmt = fmt
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        return self.path + self.writer + ".jsonl"
+
+    def _shards(self):
+        return sorted(glob.glob(self.path + "*.jsonl"))
+
+    def append(self, row: dict):
+        '''Appends one row
+
+        Parameters
+        ----------
+        row : dict
+            keys: column names
+            values: json-serializable values
+        '''
+        self.extend([row])
+
+    def extend(self, rows):
+        '''Appends rows, refer to append'''
+        lines = "".join(
+            json.dumps(dict(row, _time=time.time())) + "\n" for row in rows)
+        shard = self._shard()
+        with self._lock, write.file_lock(shard), open(shard, "a") as file:
+            file.write(lines)
+
+    def _compacting(self):
+        return sorted(glob.glob(self.path + "*.compacting"))
+
+    def to_dataframe(self):
+        '''All rows of all writers ordered by time of appending
+
+        Note
+        ----
+        Waits for a running compact, which would
+        otherwise hide the rows being compacted.
+
+        Returns
+        -------
+        pandas.DataFrame
+            column "_time" holds the time of appending
+        '''
+        frames = []
+        columnar = self.path + "data." + self.fmt
+        with write.file_lock(columnar):
+            if os.path.isfile(columnar):
+                frames.append(self._columnar[self.fmt][0](columnar))
+            # left behind by a crashed compact
+            for shard in self._compacting() + self._shards():
+                with open(shard) as file:
+                    rows = [json.loads(line) for line in file
+                            if line.endswith("\n")]
+                frames.append(pd.DataFrame(rows))
+        frames = [f for f in frames if len(f)]
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames, ignore_index=True)
+        return df.sort_values("_time", kind="stable").reset_index(drop=True)
+
+    def compact(self):
+        '''Merges all shards into the columnar file "data.<fmt>"
+
+        Note
+        ----
+        Only one process may compact at a time. Rows appended
+        to a shard while compacting are kept in the shard.
+        Shards moved aside by a crashed compact are merged too.
+        '''
+        columnar = self.path + "data." + self.fmt
+        with write.file_lock(columnar):
+            moved = self._compacting()
+            for shard in self._shards():
+                target = "%s.%d.compacting" % (shard, time.time_ns())
+                # waits for a running append to the shard
+                with write.file_lock(shard):
+                    os.replace(shard, target)
+                moved.append(target)
+            frames = []
+            if os.path.isfile(columnar):
+                frames.append(self._columnar[self.fmt][0](columnar))
+            for shard in moved:
+                with open(shard) as file:
+                    # a line torn by a crashed append is dropped
+                    rows = [json.loads(line) for line in file
+                            if line.endswith("\n")]
+                frames.append(pd.DataFrame(rows))
+            frames = [f for f in frames if len(f)]
+            if frames:
+                df = pd.concat(frames, ignore_index=True)
+                try:
+                    getattr(df, self._columnar[self.fmt][1])(
+                        columnar + ".tmp")
+                    os.replace(columnar + ".tmp", columnar)
+                finally:
+                    if os.path.isfile(columnar + ".tmp"):
+                        os.remove(columnar + ".tmp")
+            for shard in moved:
+                os.remove(shard)
+
+    def export_csv(self, filepath, delimiter=";"):
+        '''Writes all rows to a csv like write.write_csv does
+
+        Parameters
+        ----------
+        filepath: str
+            path where file should be written
+        delimiter: str, optional
+            how delimiter aka seperator shoud be choosen
+        '''
+        df = self.to_dataframe().drop(columns="_time", errors="ignore")
+        df.to_csv(filepath, sep=delimiter)
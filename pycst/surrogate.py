@@ -0,0 +1,342 @@
+import numpy as np
+import pandas as pd
+
+
+class GaussianProcess:
+    '''Gaussian process regression with squared exponential kernel.
+
+    Inputs are scaled to the unit cube of bounds and outputs
+    to zero mean and unit variance. Without length_scale,
+    the length scale maximizing the marginal likelihood of
+    up to 500 samples is chosen from a grid.
+
+    Up to 256 samples are fitted exactly. Larger fits are
+    sparse, projected on 256 samples spread over the inputs
+    (deterministic training conditional), so fitting costs
+    O(samples) and a prediction O(1) in the number of samples.
+
+    Parameters
+    ----------
+    bounds : array_like, optional
+        (lower, upper) per input dimension, shape (dims, 2).
+        Defaults to the range of the fitted inputs.
+    length_scale : float, optional
+        Kernel length scale in scaled inputs.
+    noise : float, optional
+        Variance added to the diagonal, relative to the
+        output variance.
+
+    '''
+
+    _length_scales = np.logspace(-1.5, 1, 16)
+    # samples used to choose the length scale
+    _max_likelihood_samples = 500
+    # samples the fit is projected on
+    _inducing = 256
+
+    def __init__(self, bounds=None, length_scale=None, noise=1e-6):
+        self.bounds = None if bounds is None else \
+            np.asarray(bounds, dtype=float)
+        self.length_scale = length_scale
+        self.noise = noise
+
+    def _scale(self, X):
+        lower, upper = self._bounds[:, 0], self._bounds[:, 1]
+        return (np.asarray(X, dtype=float) - lower) / (upper - lower)
+
+    @staticmethod
+    def _kernel(A, B, length_scale):
+        d2 = (A ** 2).sum(axis=1)[:, None] + (B ** 2).sum(axis=1) \
+            - 2 * A @ B.T
+        return np.exp(-0.5 * np.clip(d2, 0, None) / length_scale ** 2)
+
+    @staticmethod
+    def _spread(X, m):
+        '''indices of m rows of X far from each other'''
+        if len(X) <= m:
+            return np.arange(len(X))
+        chosen = [0]
+        distance = ((X - X[0]) ** 2).sum(axis=1)
+        for _ in range(m - 1):
+            idx = int(np.argmax(distance))
+            chosen.append(idx)
+            distance = np.minimum(distance, ((X - X[idx]) ** 2).sum(axis=1))
+        return np.array(chosen)
+
+    def _log_likelihood(self, length_scale, X, y):
+        K = self._kernel(X, X, length_scale)
+        K[np.diag_indices_from(K)] += self.noise_
+        try:
+            L = np.linalg.cholesky(K)
+        except np.linalg.LinAlgError:
+            return -np.inf
+        alpha = np.linalg.solve(L, y)
+        return -0.5 * alpha @ alpha - np.log(np.diag(L)).sum()
+
+    def _project(self, length_scale):
+        '''fits the projection on self._Z, refer to fit'''
+        s2 = self.noise_
+        Kmm = self._kernel(self._Z, self._Z, length_scale)
+        Kmm[np.diag_indices_from(Kmm)] += s2
+        Lm = np.linalg.cholesky(Kmm)
+        eye = np.eye(len(self._Z))
+        # triangular and small, as are A and LA
+        P = np.linalg.solve(Lm, eye)
+        if len(self._Z) == len(self._X):
+            # exact: self._Z is self._X
+            self._P = P
+            self._Q = None
+            self._w = P.T @ (P @ self._y)
+            return
+        Kmn = self._kernel(self._Z, self._X, length_scale)
+        V = P @ Kmn
+        LA = np.linalg.cholesky(eye + V @ V.T / s2)
+        Q = np.linalg.solve(LA, P)
+        self._P = P
+        self._Q = Q
+        self._w = Q.T @ (Q @ (Kmn @ self._y)) / s2
+
+    def fit(self, X, y):
+        '''Fits the process to samples
+
+        Parameters
+        ----------
+        X : array_like
+            inputs, shape (samples, dims)
+        y : array_like
+            outputs, shape (samples,)
+
+        Returns
+        -------
+        :obj:`GaussianProcess`
+            self
+        '''
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        y = np.asarray(y, dtype=float)
+        if len(X) != len(y) or len(y) == 0:
+            raise ValueError("Need the same, nonzero number of X and y")
+        if self.bounds is not None:
+            self._bounds = self.bounds
+        else:
+            self._bounds = np.stack([X.min(axis=0), X.max(axis=0)], axis=1)
+        # constant inputs
+        width = self._bounds[:, 1] - self._bounds[:, 0]
+        self._bounds = self._bounds.copy()
+        self._bounds[width == 0, 1] += 1
+        self._X = self._scale(X)
+        self.noise_ = self.noise
+        self._mean = y.mean()
+        self._std = y.std() or 1.0
+        self._y = (y - self._mean) / self._std
+        length_scale = self.length_scale
+        if length_scale is None:
+            subset = np.random.default_rng(0).permutation(len(y))[
+                :self._max_likelihood_samples]
+            likelihoods = [
+                self._log_likelihood(s, self._X[subset], self._y[subset])
+                for s in self._length_scales]
+            length_scale = self._length_scales[int(np.argmax(likelihoods))]
+        self.length_scale_ = length_scale
+        self._Z = self._X[self._spread(self._X, self._inducing)]
+        for jitter in range(6):
+            try:
+                self._project(length_scale)
+                break
+            except np.linalg.LinAlgError:
+                # (nearly) duplicate samples
+                self.noise_ *= 10
+        else:
+            raise ValueError("Samples can not be fitted")
+        return self
+
+    def predict(self, X, return_std=False):
+        '''Predicts outputs at X
+
+        Parameters
+        ----------
+        X : array_like
+            inputs, shape (points, dims)
+        return_std : bool, optional
+            Wether the standard deviation is returned as well.
+
+        Returns
+        -------
+        numpy.ndarray or tuple
+            mean, shape (points,), and standard deviation
+            if return_std is set
+        '''
+        X = self._scale(np.atleast_2d(X))
+        k = self._kernel(X, self._Z, self.length_scale_)
+        mean = self._mean + self._std * (k @ self._w)
+        if not return_std:
+            return mean
+        var = 1 + self.noise_ - ((k @ self._P.T) ** 2).sum(axis=1)
+        if self._Q is not None:
+            var += ((k @ self._Q.T) ** 2).sum(axis=1)
+        return mean, self._std * np.sqrt(np.clip(var, 0, None))
+
+
+def _nearest(A, B, exclude_self=False, chunk=1024):
+    '''distance of every row of A to the nearest row of B
+
+    With exclude_self, A is B and rows are not their own neighbours.
+    '''
+    result = np.full(len(A), np.inf)
+    squared = (B ** 2).sum(axis=1)
+    for start in range(0, len(A), chunk):
+        a = A[start:start + chunk]
+        d = (a ** 2).sum(axis=1)[:, None] + squared - 2 * a @ B.T
+        if exclude_self:
+            rows = np.arange(len(a))
+            d[rows, start + rows] = np.inf
+        if d.shape[1]:
+            result[start:start + chunk] = d.min(axis=1)
+    return np.sqrt(np.clip(result, 0, None))
+
+
+class ResultInterpolator:
+    '''Predicts results from past runs without running CST.
+
+    One GaussianProcess per result is fitted to the rows of
+    a result table, e.g. Results<model>.csv written by
+    CstModel. Points outside the sampled range of any
+    parameter or farther than max_distance from the
+    nearest sample are refused, so gaps inside the range,
+    like the empty corner of an L-shaped design, are
+    not interpolated either.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame, str or list
+        Result table or paths to csv files like
+        the ones written by write.write_csv.
+    parameters : list
+        Columns which are inputs of the results.
+    results : list, optional
+        Columns to predict. Defaults to all
+        numeric columns not in parameters.
+    delimiter : str, optional
+        Delimiter of the csv files.
+    max_distance : float, optional
+        Largest distance of a point to the nearest sample,
+        every parameter scaled to its sampled range. Defaults
+        to the largest distance of a sample to its nearest
+        neighbour, times sqrt(parameters) / 2 if larger,
+        which covers the centers of a full factorial grid.
+
+    Attributes
+    ----------
+    bounds : dict
+        {"parametername": (lower, upper)} of the samples
+    max_distance : float
+        Refer to Parameters.
+
+    '''
+
+    def __init__(self, data, parameters, results=None, delimiter=";",
+                 max_distance=None):
+        if isinstance(data, str):
+            data = [data]
+        if not isinstance(data, pd.DataFrame):
+            data = pd.concat(
+                [pd.read_csv(path, delimiter=delimiter, index_col=0)
+                 for path in data], ignore_index=True)
+        self.parameters = list(parameters)
+        missing = set(self.parameters) - set(data.columns)
+        if missing:
+            raise KeyError("No columns %s" % sorted(missing))
+        if results is None:
+            results = [c for c in data.select_dtypes("number").columns
+                       if c not in self.parameters and c != "returncode"]
+        self.results = list(results)
+        data = data.dropna(subset=self.parameters)
+        if "returncode" in data.columns:
+            data = data[data["returncode"].fillna(0) == 0]
+        if not len(data):
+            raise ValueError("No rows to interpolate")
+        X = data[self.parameters].to_numpy(dtype=float)
+        self.bounds = {k: (float(a), float(b)) for k, a, b in
+                       zip(self.parameters, X.min(axis=0), X.max(axis=0))}
+        self._lower, self._upper = X.min(axis=0), X.max(axis=0)
+        self._samples = np.unique(self._scale(X), axis=0)
+        if max_distance is None:
+            max_distance = _nearest(self._samples, self._samples,
+                                    exclude_self=True).max(initial=0)
+            max_distance *= max(1, np.sqrt(len(self.parameters)) / 2)
+        self.max_distance = max_distance
+        self._models = {}
+        for result in self.results:
+            df = data.dropna(subset=[result])
+            if not len(df):
+                continue
+            # repeated points are averaged
+            df = df.groupby(self.parameters, as_index=False)[result].mean()
+            bounds = np.stack([self._lower, self._upper], axis=1)
+            self._models[result] = GaussianProcess(bounds).fit(
+                df[self.parameters].to_numpy(dtype=float),
+                df[result].to_numpy(dtype=float))
+
+    def _scale(self, X):
+        width = self._upper - self._lower
+        return (X - self._lower) / np.where(width == 0, 1, width)
+
+    def _inputs(self, points):
+        if isinstance(points, pd.DataFrame):
+            X = points[self.parameters].to_numpy(dtype=float)
+        else:
+            X = np.array([[points[k] for k in self.parameters]], dtype=float)
+        outside = (X < self._lower - 1e-9 * (abs(self._lower) + 1)) | \
+            (X > self._upper + 1e-9 * (abs(self._upper) + 1))
+        if outside.any():
+            names = [k for k, o in zip(self.parameters, outside.any(axis=0))
+                     if o]
+            raise ValueError("Extrapolation of %s, refer to bounds" % names)
+        distance = _nearest(self._scale(X), self._samples)
+        if (distance > self.max_distance * (1 + 1e-9)).any():
+            raise ValueError(
+                "Extrapolation, %g from the nearest sample, refer to "
+                "max_distance" % distance.max())
+        return X
+
+    def predict(self, point, return_std=False):
+        '''Predicts the results at point
+
+        Parameters
+        ----------
+        point : dict or pandas.DataFrame
+            {"parametername": value} or
+            one point per row
+        return_std : bool, optional
+            Wether the standard deviations are returned as well.
+
+        Returns
+        -------
+        dict or pandas.DataFrame
+            {"resultname": value} or one column per result,
+            as tuple with the standard deviations
+            if return_std is set
+
+        Raises
+        ------
+        ValueError
+            if point is outside of bounds or
+            farther than max_distance from the samples
+        '''
+        if isinstance(point, pd.DataFrame):
+            X = self._inputs(point)
+            means = pd.DataFrame(index=point.index)
+            stds = pd.DataFrame(index=point.index)
+            for result, model in self._models.items():
+                means[result], stds[result] = model.predict(
+                    X, return_std=True)
+            return (means, stds) if return_std else means
+        X = self._inputs(point)
+        means, stds = {}, {}
+        for result, model in self._models.items():
+            if return_std:
+                mean, std = model.predict(X, return_std=True)
+                stds[result] = float(std[0])
+            else:
+                mean = model.predict(X)
+            means[result] = float(mean[0])
+        return (means, stds) if return_std else means
@@ -0,0 +1,605 @@
+import os
+import queue
+import shutil
+import itertools
+import threading
+import contextlib
+import numpy as np
+import pandas as pd
+import pycst.write as write
+import pycst.telemetry as telemetry
+from pycst.session import Session
+from pycst.journal import SweepJournal, DONE, mark_active, clear_active
+
+
+def design_matrix(design):
+    '''Converts a design to a DataFrame with one row per point
+
+    Parameters
+    ----------
+    design : pandas.DataFrame, dict or list
+        DataFrame with parameters as columns,
+        dict of {"parametername": [values]} of equal length
+        or list of {"parametername": value} dicts
+
+    Returns
+    -------
+    pandas.DataFrame
+        columns: Parameternames
+        rows: design points
+    '''
+    if isinstance(design, pd.DataFrame):
+        df = design.reset_index(drop=True)
+    elif isinstance(design, dict):
+        lengths = {len(v) for v in design.values()}
+        if len(lengths) > 1:
+            raise ValueError("All parameters need the same number of values")
+        df = pd.DataFrame(design)
+    else:
+        df = pd.DataFrame(list(design))
+    if df.isnull().values.any():
+        raise ValueError("Design contains missing values")
+    return df
+
+
+def restoring(evaluator, names=()):
+    '''Restoring context of evaluator, refer to SweepEngine.restoring
+
+    Parameters
+    ----------
+    evaluator : :obj:`SweepEngine`, :obj:`ParallelSweep` or callable
+        A callable evaluator has nothing to restore.
+    names : iterable, optional
+        Parameternames which have to exist in the model.
+    '''
+    if hasattr(evaluator, "restoring"):
+        return evaluator.restoring(names)
+    return contextlib.nullcontext()
+
+
+def evaluate(evaluator, points):
+    '''Runs points with a SweepEngine, ParallelSweep or callable
+
+    Returns
+    -------
+    list
+        one row per point, refer to SweepEngine.evaluate
+    '''
+    if callable(evaluator):
+        return evaluator(points)
+    return evaluator.evaluate(points)
+
+
+def _run_design(sweeper, design, journal=None):
+    '''runs design with restoring and journal, refer to SweepEngine.run'''
+    df = design_matrix(design)
+    points = df.to_dict("records")
+    default = journal is True
+    if default:
+        journal = SweepJournal.for_model(sweeper.model)
+    elif isinstance(journal, str):
+        journal = SweepJournal(journal)
+    todo = points if journal is None else journal.start(points)
+    rows = []
+    if todo:
+        if journal is not None:
+            mark_active(sweeper.model, journal.path)
+        with telemetry.span("sweep", sweeper.model, points=len(todo)), \
+                sweeper.restoring(df.columns):
+            rows = sweeper.evaluate(todo, journal=journal)
+    if journal is not None:
+        clear_active(sweeper.model)
+        rows = journal.rows(points)
+        # failed points are retried by the next sweep with the journal
+        if default and journal.states().keys() <= {DONE}:
+            journal.archive()
+    return pd.DataFrame(rows)
+
+
+class SweepEngine:
+    '''Runs a design matrix of parameter sets on a model.
+
+    Every point costs a single CST call, which imports
+    the parameters and runs the solver. Refer to
+    CstModel.cst_run_eigenmode.
+
+    Parameters
+    ----------
+    model : :obj:`CstModel`
+        Model to run the points on.
+    dc : str, optional
+        Distributed comuting as "maincontroller:port" like
+        "142.2.245.136:360000".
+    timeout : int or float, optional
+        Time in seconds till the solver of a point is terminated.
+    flags : str, optional
+        If given, the points are run with these flags
+        instead of the eigenmode solver. Refer to CstModel._run.
+    combine : bool, optional
+        Wether parameter import and solver run share one CST call.
+        If False, the parameters are imported by a seperate call,
+        without the redundant rebuild.
+
+    '''
+
+    def __init__(self, model, dc=None, timeout=None, flags=None,
+                 combine=True):
+        self.model = model
+        self.dc = dc
+        self.timeout = timeout
+        self.flags = flags
+        self.combine = combine
+
+    def _solve(self, point):
+        '''imports point and runs solver, returns returncode'''
+        model = self.model
+        if not self.combine:
+            returncode = model.edit_parameters(point, rebuild=False)
+            if returncode != 0:
+                return returncode
+            point = None
+        if self.flags is None:
+            return model.cst_run_eigenmode(
+                dc=self.dc, timeout=self.timeout, parameters_values=point)
+        flags = self.flags
+        if not point:
+            return model._run(flags, dc=self.dc, timeout=self.timeout)
+        with write.parfile_tmp(model.FILEPATH, point) as filename:
+            return model._run(
+                flags + " -par " + filename + " ",
+                dc=self.dc, timeout=self.timeout)
+
+    def evaluate(self, points, journal=None):
+        '''Runs all points and collects their results
+
+        Parameters
+        ----------
+        points : list
+            list of {"parametername": value} dicts
+        journal : :obj:`SweepJournal`, optional
+            Records the state of every point.
+
+        Returns
+        -------
+        list
+            one dict per point with the point's parameters,
+            "returncode" and the results of CstModel.get_results
+        '''
+        rows = []
+        for run, point in enumerate(points):
+            self.model.message("\nRun", run + 1, "/", len(points))
+            if journal is not None:
+                journal.running(point)
+            returncode = self._solve(point)
+            row = dict(point)
+            row["returncode"] = returncode
+            if returncode == 0:
+                row.update(self.model.get_results())
+            if journal is not None:
+                journal.finished(point, row)
+            rows.append(row)
+        return rows
+
+    def run(self, design, journal=None):
+        '''Runs all points of design and restores the parameters afterwards
+
+        Parameters
+        ----------
+        design : pandas.DataFrame, dict or list
+            Refer to design_matrix.
+        journal : :obj:`SweepJournal`, str or bool, optional
+            Journal or its path, True for the default journal
+            of the model. Points the journal has done are not
+            run again, so a crashed sweep resumes where it stopped.
+            The default journal is archived once all its points
+            are done, refer to SweepJournal.archive.
+
+        Returns
+        -------
+        pandas.DataFrame
+            one row per point, refer to evaluate
+        '''
+        return _run_design(self, design, journal)
+
+    @contextlib.contextmanager
+    def restoring(self, names=()):
+        '''Context restoring the parameters of model on exit
+
+        Parameters
+        ----------
+        names : iterable, optional
+            Parameternames which have to exist in model.
+        '''
+        for key in names:
+            assert self.model.is_parameter(key), key
+        assert os.path.isfile(self.model.FILENAME)
+        # kept from a crashed sweep, holds the initial parameters
+        if not self.model.parhandler.has_backup():
+            self.model.parhandler.backup()
+        self.model._restoring += 1
+        try:
+            yield
+        finally:
+            self.model._restoring -= 1
+            # resetting to initial values
+            self.model.message(str(self.model), "resetting to initial value")
+            self.model.parhandler.recover()
+
+
+class ParallelSweep:
+    '''Runs design points concurrently on clones of a model.
+
+    The .cst file and its folder are copied into one
+    workspace per worker. Each worker runs points on its
+    own clone until all points are done. The clones share
+    result_cache, result_store and the csv of model, each
+    clone gets its own session if model has one.
+
+    Parameters
+    ----------
+    model : :obj:`CstModel`
+        Model to clone, stays unchanged.
+    workers : int, optional
+        Number of concurrent CST calls,
+        e.g. the number of available licence tokens.
+    workspace : str, optional
+        Folder for the clones. Defaults to
+        "<model>_workspaces/" next to the model.
+    reuse : bool, optional
+        Wether workspaces are kept after run.
+        Workspaces are synchronized with model by every
+        call of clones, only files which changed in mtime
+        or size are copied. The Result folder is not
+        copied, results of the clones are exported to
+        the csv or store of model.
+    dc, timeout, flags, combine : optional
+        Passed to SweepEngine of every clone.
+
+    '''
+
+    def __init__(self, model, workers=2, workspace=None, reuse=True,
+                 dc=None, timeout=None, flags=None, combine=True):
+        assert workers >= 1
+        self.model = model
+        self.workers = workers
+        self.reuse = reuse
+        if workspace is None:
+            workspace = model.FILEPATH + str(model) + "_workspaces/"
+        self.workspace = workspace.replace("\\", "/").rstrip("/") + "/"
+        self._engine_kwargs = dict(
+            dc=dc, timeout=timeout, flags=flags, combine=combine)
+        self._clones = {}
+
+    @staticmethod
+    def _copy(source, target):
+        '''copies file source to target if mtime or size differ'''
+        try:
+            a, b = os.stat(source), os.stat(target)
+            if (a.st_mtime_ns, a.st_size) == (b.st_mtime_ns, b.st_size):
+                return
+        except FileNotFoundError:
+            pass
+        shutil.copy2(source, target)
+
+    @staticmethod
+    def _sync(source, target, skip=()):
+        '''copies changed files of folder source to target
+
+        Files and folders missing in source are removed from
+        target, names in skip are neither copied nor removed.
+        '''
+        os.makedirs(target, exist_ok=True)
+        with os.scandir(target) as entries:
+            present = {e.name: e.is_dir() for e in entries}
+        with os.scandir(source) as entries:
+            for entry in entries:
+                if entry.name in skip:
+                    continue
+                path = os.path.join(target, entry.name)
+                isdir = present.pop(entry.name, None)
+                if isdir is not None and isdir != entry.is_dir():
+                    if isdir:
+                        shutil.rmtree(path)
+                    else:
+                        os.remove(path)
+                if entry.is_dir():
+                    ParallelSweep._sync(entry.path, path)
+                else:
+                    ParallelSweep._copy(entry.path, path)
+        for name, isdir in present.items():
+            if name in skip:
+                continue
+            path = os.path.join(target, name)
+            if isdir:
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+
+    def _clone(self, i):
+        '''synchronizes workspace i with model and returns its clone'''
+        model = self.model
+        folder = self.workspace + str(i) + "/"
+        os.makedirs(folder, exist_ok=True)
+        filename = folder + model.FILENAME.split("/")[-1]
+        self._copy(model.FILENAME, filename)
+        source = model.FILENAME[:-len(".cst")]
+        target = filename[:-len(".cst")]
+        if os.path.isdir(source):
+            # results of the clone are no files of the model
+            self._sync(source, target, skip=["Result"])
+        elif os.path.isdir(target):
+            shutil.rmtree(target)
+        clone = self._clones.get(i)
+        if clone is None:
+            clone = type(model)(
+                filename, cst_path=model.CST_PATH, autoanswer="n")
+            if model.session is not None:
+                clone.session = Session(
+                    clone, model.session.command,
+                    timeout=model.session.timeout,
+                    restarts=model.session.restarts)
+            self._clones[i] = clone
+        clone.verbose = model.verbose
+        clone.result_cache = model.result_cache
+        clone.result_store = model.result_store
+        clone.parameter_tolerance = model.parameter_tolerance
+        clone.cache_identity = model.cache_identity
+        clone.csv_name = model.csv_name
+        clone.csv_folder = model.csv_folder
+        # scratch copies, synchronized with model by the next run
+        clone._restoring = 1
+        return clone
+
+    def clones(self):
+        '''Creates or synchronizes all workspaces
+
+        Returns
+        -------
+        list
+            one :obj:`CstModel` per worker
+        '''
+        return [self._clone(i) for i in range(self.workers)]
+
+    def cleanup(self):
+        '''Closes the sessions of the clones and removes all workspaces'''
+        for clone in self._clones.values():
+            if clone.session is not None:
+                clone.session.close()
+        self._clones = {}
+        if os.path.isdir(self.workspace):
+            shutil.rmtree(self.workspace)
+
+    def evaluate(self, points, journal=None):
+        '''Runs all points on the clones
+
+        Parameters
+        ----------
+        points : list
+            list of {"parametername": value} dicts
+        journal : :obj:`SweepJournal`, optional
+            Records the state of every point.
+
+        Returns
+        -------
+        list
+            one dict per point in order of points,
+            refer to SweepEngine.evaluate
+        '''
+        todo = queue.Queue()
+        for idx, point in enumerate(points):
+            todo.put((idx, point))
+        rows = [None] * len(points)
+        errors = []
+
+        def work(clone):
+            engine = SweepEngine(clone, **self._engine_kwargs)
+            while not errors:
+                try:
+                    idx, point = todo.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    rows[idx] = engine.evaluate([point], journal)[0]
+                except Exception as e:
+                    errors.append(e)
+
+        clones = self.clones()[:max(1, len(points))]
+        threads = [threading.Thread(target=work, args=(c,)) for c in clones]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if errors:
+            raise errors[0]
+        return rows
+
+    def run(self, design, journal=None):
+        '''Runs all points of design and merges the results
+
+        Parameters
+        ----------
+        design : pandas.DataFrame, dict or list
+            Refer to design_matrix.
+        journal : :obj:`SweepJournal`, str or bool, optional
+            Refer to SweepEngine.run.
+
+        Returns
+        -------
+        pandas.DataFrame
+            one row per point, refer to SweepEngine.evaluate
+        '''
+        return _run_design(self, design, journal)
+
+    @contextlib.contextmanager
+    def restoring(self, names=()):
+        '''Context removing the workspaces on exit unless reused
+
+        The model itself is never changed.
+        Refer to SweepEngine.restoring.
+        '''
+        for key in names:
+            assert self.model.is_parameter(key), key
+        try:
+            yield
+        finally:
+            if not self.reuse:
+                self.cleanup()
+
+
+class AdaptiveSweep:
+    '''Sweeps coarse first and refines where a result changes.
+
+    The parameter space is split into cells. Starting from
+    a coarse grid, the cells where the result changes most
+    or crosses threshold are split in halves along every
+    parameter, so flat regions keep few points. In one
+    dimension this bisects the intervals of a sweep.
+
+    Parameters
+    ----------
+    evaluator : :obj:`SweepEngine`, :obj:`ParallelSweep` or callable
+        Runs a list of {"parametername": value} dicts
+        and returns one row per point,
+        refer to SweepEngine.evaluate.
+    result : str
+        Result the refinement follows,
+        refer to CstModel.get_results.
+    threshold : float, optional
+        Cells where result crosses threshold,
+        e.g. a mode crossing, are refined first.
+    budget : int, optional
+        Maximum number of evaluated points.
+    tol : float, optional
+        Cells whose change of result, relative to the range
+        of result, is below tol are not split. No cell is split
+        below a width of tol, relative to the bounds.
+    initial : int, optional
+        Points per parameter of the coarse grid.
+    batch_size : int, optional
+        Points per evaluation. Defaults to the workers
+        of the evaluator or 1.
+
+    '''
+
+    def __init__(self, evaluator, result, threshold=None, budget=50,
+                 tol=0.01, initial=5, batch_size=None):
+        assert initial >= 2
+        self.evaluator = evaluator
+        self.result = result
+        self.threshold = threshold
+        self.budget = budget
+        self.tol = tol
+        self.initial = initial
+        if batch_size is None:
+            batch_size = getattr(evaluator, "workers", 1)
+        self.batch_size = batch_size
+
+    def _value(self, row):
+        if row.get("returncode", 0) != 0:
+            return np.nan
+        try:
+            return float(row[self.result])
+        except (KeyError, TypeError, ValueError):
+            return np.nan
+
+    @staticmethod
+    def _corners(cell):
+        return itertools.product(*zip(*cell))
+
+    @staticmethod
+    def _children(cell):
+        lower, upper = cell
+        mid = tuple((a + b) / 2 for a, b in zip(lower, upper))
+        halves = [((a, m), (m, b)) for a, m, b in zip(lower, mid, upper)]
+        for choice in itertools.product(*halves):
+            yield tuple(c[0] for c in choice), tuple(c[1] for c in choice)
+
+    def _scores(self, cells, values, width):
+        '''priority per cell, None if the cell is not split'''
+        finite = [v for v in values.values() if not np.isnan(v)]
+        span = (max(finite) - min(finite)) if finite else 0
+        span = span or 1.0
+        scores = []
+        for cell in cells:
+            size = max((b - a) / w for a, b, w in zip(*cell, width))
+            corners = [values[c] for c in self._corners(cell)]
+            if size / 2 < self.tol or np.isnan(corners).any():
+                scores.append(None)
+                continue
+            change = (max(corners) - min(corners)) / span
+            if self.threshold is not None and \
+                    min(corners) < self.threshold < max(corners):
+                # crossings first, the largest ones first
+                scores.append(1 + size)
+            elif change >= self.tol:
+                scores.append(change)
+            else:
+                scores.append(None)
+        return scores
+
+    def run(self, bounds):
+        '''Sweeps adaptively within bounds
+
+        Parameters
+        ----------
+        bounds : dict
+            {"parametername": (lower, upper)}
+
+        Returns
+        -------
+        pandas.DataFrame
+            one row per point ordered by the parameters,
+            refer to SweepEngine.evaluate
+        '''
+        names = list(bounds)
+        lower = np.array([bounds[k][0] for k in names], dtype=float)
+        upper = np.array([bounds[k][1] for k in names], dtype=float)
+        assert (lower < upper).all(), bounds
+        if self.initial ** len(names) > self.budget:
+            raise ValueError("Initial grid of %d points exceeds budget %d"
+                             % (self.initial ** len(names), self.budget))
+        width = upper - lower
+        axes = [tuple(float(v) for v in np.linspace(a, b, self.initial))
+                for a, b in zip(lower, upper)]
+        cells = [tuple(zip(*[(axis[i], axis[i + 1])
+                             for axis, i in zip(axes, idx)]))
+                 for idx in itertools.product(
+                     range(self.initial - 1), repeat=len(names))]
+        values = {}
+        rows = []
+
+        def run_points(todo):
+            points = [dict(zip(names, p)) for p in todo]
+            for p, point, row in zip(
+                    todo, points, evaluate(self.evaluator, points)):
+                values[p] = self._value(row)
+                rows.append(dict(point, **row))
+
+        with restoring(self.evaluator, names):
+            run_points(list(itertools.product(*axes)))
+            while len(values) < self.budget:
+                scores = self._scores(cells, values, width)
+                order = sorted((s, i) for i, s in enumerate(scores)
+                               if s is not None)[::-1]
+                if not order:
+                    break
+                todo, split = [], set()
+                room = min(self.batch_size, self.budget - len(values))
+                for score, i in order:
+                    new = {c for child in self._children(cells[i])
+                           for c in self._corners(child)
+                           if c not in values and c not in todo}
+                    if todo and len(todo) + len(new) > room:
+                        break
+                    if len(values) + len(todo) + len(new) > self.budget:
+                        break
+                    todo.extend(sorted(new))
+                    split.add(i)
+                if not split:
+                    break
+                cells = [child for i, cell in enumerate(cells)
+                         for child in (self._children(cell) if i in split
+                                       else [cell])]
+                run_points(todo)
+        df = pd.DataFrame(rows)
+        return df.sort_values(names, kind="stable").reset_index(drop=True)
@@ -0,0 +1,288 @@
+import os
+import json
+import time
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+import pandas as pd
+
+_sinks = []
+_sinks_lock = threading.Lock()
+# spans opened in the current thread or task, innermost last
+_stack = contextvars.ContextVar("pycst_spans", default=())
+
+
+def add_sink(sink):
+    '''Sends all following spans to sink
+
+    Parameters
+    ----------
+    sink : object
+        has a method emit(span), refer to MemorySink
+    '''
+    with _sinks_lock:
+        _sinks.append(sink)
+
+
+def remove_sink(sink):
+    '''Stops sending spans to sink'''
+    with _sinks_lock:
+        if sink in _sinks:
+            _sinks.remove(sink)
+
+
+@contextmanager
+def span(name, model=None, phase=None, **tags):
+    '''Times the enclosed block and emits it to all sinks
+
+    Note
+    ----
+    Without sinks nothing is recorded.
+
+    Parameters
+    ----------
+    name : str
+        what is timed, e.g. "_run"
+    model : object, optional
+        tagged as str(model)
+    phase : str, optional
+        e.g. "rebuild" or "solve". Defaults to the phase
+        of the enclosing span, so a CST call inside a
+        rebuild counts as rebuild, or to name.
+    tags : optional
+        added to the span
+
+    Yields
+    ------
+    dict
+        the span, further tags may be added to it
+    '''
+    if not _sinks:
+        yield {}
+        return
+    stack = _stack.get()
+    parent = stack[-1] if stack else None
+    if phase is None:
+        phase = parent["phase"] if parent else name
+    record = {"name": name,
+              "model": None if model is None else str(model),
+              "phase": phase,
+              "parent": parent["name"] if parent else None,
+              "depth": len(stack)}
+    record.update(tags)
+    token = _stack.set(stack + (record,))
+    record["start"] = time.time()
+    begin = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record["error"] = type(e).__name__
+        raise
+    finally:
+        record["duration"] = time.perf_counter() - begin
+        _stack.reset(token)
+        for sink in list(_sinks):
+            sink.emit(record)
+
+
+def timed(phase=None, name=None):
+    '''Decorator timing every call of a function or method as span
+
+    The model of a span is the first argument of methods
+    of CstModel, or the model of a Parfile.
+
+    Parameters
+    ----------
+    phase : str, optional
+        refer to span
+    name : str, optional
+        defaults to the name of the function
+    '''
+    def decorator(function):
+        label = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _sinks:
+                return function(*args, **kwargs)
+            model = None
+            if args and hasattr(args[0], "FILENAME"):
+                model = args[0]
+            elif args and hasattr(args[0], "_master_cav"):
+                model = args[0]._master_cav
+            with span(label, model, phase=phase):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def summary(spans):
+    '''Where the wall clock went, by phase and name
+
+    Parameters
+    ----------
+    spans : list
+        emitted spans, e.g. MemorySink.spans
+
+    Returns
+    -------
+    pandas.DataFrame
+        one row per phase and name with
+        count, total, mean and max seconds and share,
+        the fraction of the wall clock of all top-level spans
+    '''
+    columns = ["phase", "name", "count", "total", "mean", "max", "share"]
+    if not spans:
+        return pd.DataFrame(columns=columns)
+    df = pd.DataFrame(spans)
+    top = df[df["depth"] == 0]
+    wall = (top["start"] + top["duration"]).max() - top["start"].min()
+    grouped = df.groupby(["phase", "name"])["duration"]
+    result = pd.DataFrame({
+        "count": grouped.count(), "total": grouped.sum(),
+        "mean": grouped.mean(), "max": grouped.max()}).reset_index()
+    result["share"] = result["total"] / wall if wall > 0 else 0.0
+    return result.sort_values("total", ascending=False)[columns] \
+        .reset_index(drop=True)
+
+
+def report(spans):
+    '''summary as printable table'''
+    df = summary(spans)
+    if not len(df):
+        return "no spans recorded"
+    return df.to_string(index=False, float_format=lambda v: "%.4f" % v)
+
+
+class MemorySink:
+    '''Keeps spans in memory.
+
+    Attributes
+    ----------
+    spans : list
+        all emitted spans
+
+    '''
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def emit(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def summary(self):
+        '''Refer to telemetry.summary'''
+        return summary(self.spans)
+
+    def report(self):
+        '''Refer to telemetry.report'''
+        return report(self.spans)
+
+
+class JsonlSink:
+    '''Appends spans as json lines to a file.
+
+    Parameters
+    ----------
+    path : str
+        file to append to
+
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def emit(self, span):
+        line = json.dumps(span, default=str) + "\n"
+        with self._lock, open(self.path, "a") as file:
+            file.write(line)
+
+    def read(self):
+        '''Returns all spans of the file'''
+        with open(self.path) as file:
+            return [json.loads(line) for line in file]
+
+
+class PrometheusSink:
+    '''Aggregates spans to Prometheus metrics.
+
+    Counts and sums the seconds of spans per name,
+    model and phase, refer to text.
+
+    Parameters
+    ----------
+    prefix : str, optional
+        prefix of the metric names
+
+    '''
+
+    def __init__(self, prefix="pycst"):
+        self.prefix = prefix
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def emit(self, span):
+        key = (span["name"], span["model"] or "", span["phase"])
+        with self._lock:
+            count, total, errors = self._metrics.get(key, (0, 0.0, 0))
+            self._metrics[key] = (count + 1, total + span["duration"],
+                                  errors + ("error" in span))
+
+    def text(self):
+        '''Metrics in the Prometheus text exposition format
+
+        Returns
+        -------
+        str
+        '''
+        name = self.prefix + "_span_seconds"
+        lines = ["# HELP %s Time spent in pycst operations." % name,
+                 "# TYPE %s summary" % name]
+        errors = []
+        with self._lock:
+            items = sorted(self._metrics.items())
+        for (span, model, phase), (count, total, failed) in items:
+            labels = '{name="%s",model="%s",phase="%s"}' % (
+                _escape(span), _escape(model), _escape(phase))
+            lines.append("%s_sum%s %r" % (name, labels, total))
+            lines.append("%s_count%s %d" % (name, labels, count))
+            errors.append("%s_errors_total%s %d"
+                          % (self.prefix, labels, failed))
+        lines += ["# TYPE %s_errors_total counter" % self.prefix] + errors
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        '''Writes text to path, e.g. for a node exporter textfile'''
+        with open(path + ".tmp", "w") as file:
+            file.write(self.text())
+        os.replace(path + ".tmp", path)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+@contextmanager
+def record():
+    '''Collects the spans of the enclosed block
+
+    Note
+    ----
+    Use like
+    ``with telemetry.record() as sink: model.sweep(...)``
+    and print(sink.report()) afterwards.
+
+    Yields
+    ------
+    :obj:`MemorySink`
+    '''
+    sink = MemorySink()
+    add_sink(sink)
+    try:
+        yield sink
+    finally:
+        remove_sink(sink)
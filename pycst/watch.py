@@ -0,0 +1,231 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import asyncio
+import ctypes
+import ctypes.util
+import pycst.read as read
+
+# inotify events signaling new or changed files
+_IN_MODIFY = 0x2
+_IN_CLOSE_WRITE = 0x8
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | \
+    _IN_DELETE
+# watch removed, e.g. its folder was deleted
+_IN_IGNORED = 0x8000
+# event of a folder
+_IN_ISDIR = 0x40000000
+# struct inotify_event without its name
+_EVENT = struct.Struct("iIII")
+
+
+class _Inotify:
+    '''Minimal inotify binding, raises OSError where unavailable'''
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify needs linux")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"),
+                                 use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # wd: watched folder
+        self._watched = {}
+
+    def watching(self, path):
+        '''True if folder path is watched'''
+        return os.path.normpath(path) in self._watched.values()
+
+    def add(self, path):
+        '''watches folder path and all of its subfolders'''
+        for _path, subdirs, files in os.walk(path):
+            _path = os.path.normpath(_path)
+            wd = self._libc.inotify_add_watch(
+                self.fd, os.fsencode(_path), _IN_MASK)
+            if wd >= 0:
+                self._watched[wd] = _path
+
+    def _handle(self, data):
+        '''watches new subfolders and forgets removed ones'''
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, cookie, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & _IN_IGNORED:
+                self._watched.pop(wd, None)
+            elif mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO) \
+                    and wd in self._watched:
+                self.add(os.path.join(self._watched[wd], os.fsdecode(name)))
+
+    def wait(self, timeout):
+        '''waits for events, returns True if there were some'''
+        ready = select.select([self.fd], [], [], timeout)[0]
+        if not ready:
+            return False
+        data = b""
+        try:
+            while True:
+                chunk = os.read(self.fd, 1 << 16)
+                if not chunk:
+                    break
+                data += chunk
+        except BlockingIOError:
+            pass
+        self._handle(data)
+        return True
+
+    def close(self):
+        os.close(self.fd)
+
+
+class ResultWatcher:
+    '''Yields results while they are written to a Result folder.
+
+    Uses inotify where available and polls otherwise.
+    Every event is a result which is new or
+    changed its value since it was yielded before.
+
+    Parameters
+    ----------
+    path : str or :obj:`CstModel`
+        Result folder or model to watch the RESULTPATH of.
+    filetype : str, optional
+        Extension of the results, refer to read.ResultScanner.
+    interval : int or float, optional
+        Seconds between polls. With inotify the folder is
+        also scanned at least this often.
+    inotify : bool, optional
+        Wether inotify should be used if available.
+    initial : bool, optional
+        Wether results existing at the start are yielded.
+
+    '''
+
+    def __init__(self, path, filetype=".rd0", interval=1.0, inotify=True,
+                 initial=False):
+        if not isinstance(path, str):
+            path = path.RESULTPATH
+        self.path = path
+        self.interval = interval
+        self._scanner = read.ResultScanner(path, filetype=filetype)
+        self._reported = {}
+        self._inotify = None
+        if inotify:
+            try:
+                self._inotify = _Inotify()
+            except OSError:
+                self._inotify = None
+        if not initial:
+            self._reported = self._scanner.scan()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        '''Releases the inotify handle'''
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def changes(self):
+        '''Scans once and returns new or changed results
+
+        Returns
+        -------
+        list
+            records as dict with keys
+            "result", "value" and "time"
+        '''
+        # subfolders created later are added by their events
+        if self._inotify is not None and os.path.isdir(self.path) and \
+                not self._inotify.watching(self.path):
+            self._inotify.add(self.path)
+        now = time.time()
+        records = []
+        for name, value in sorted(self._scanner.scan().items()):
+            if self._reported.get(name) != value:
+                self._reported[name] = value
+                records.append({"result": name, "value": value, "time": now})
+        return records
+
+    def _wait(self, timeout):
+        if self._inotify is not None and os.path.isdir(self.path):
+            self._inotify.wait(timeout)
+        else:
+            time.sleep(timeout)
+
+    def watch(self, stop=None, done=None, timeout=None):
+        '''Yields records of new or changed results
+
+        Parameters
+        ----------
+        stop : callable, optional
+            Called with every record, watching ends
+            after the first record it returns True for,
+            e.g. when a figure of merit is reached.
+        done : callable, optional
+            Watching ends after a final scan once it
+            returns True, e.g. job.done of a solver run.
+        timeout : int or float, optional
+            Seconds till watching ends.
+
+        Yields
+        ------
+        dict
+            refer to changes
+        '''
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            finished = done is not None and done()
+            for record in self.changes():
+                yield record
+                if stop is not None and stop(record):
+                    return
+            if finished:
+                return
+            wait = self.interval
+            if deadline is not None:
+                wait = min(wait, deadline - time.monotonic())
+                if wait <= 0:
+                    return
+            self._wait(wait)
+
+    async def awatch(self, stop=None, done=None, timeout=None):
+        '''Asynchronous watch, refer to watch
+
+        Yields
+        ------
+        dict
+            refer to changes
+        '''
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            finished = done is not None and done()
+            for record in await loop.run_in_executor(None, self.changes):
+                yield record
+                if stop is not None and stop(record):
+                    return
+            if finished:
+                return
+            wait = self.interval
+            if deadline is not None:
+                wait = min(wait, deadline - loop.time())
+                if wait <= 0:
+                    return
+            if self._inotify is not None and os.path.isdir(self.path):
+                await loop.run_in_executor(None, self._inotify.wait, wait)
+            else:
+                await asyncio.sleep(wait)
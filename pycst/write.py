@@ -1,47 +1,254 @@
 import os
+import math
 import time
+import socket
+import tempfile
+from contextlib import contextmanager
 import pandas as pd
+import pycst.telemetry as telemetry
 
 
 class parfile_tmp:
-    '''creates a temporary parameter file at filepath
+    '''creates a temporary parameter file, use as context manager
+
+    Note
+    ----
+    The file is removed when the context is left.
+    If filepath is a folder, the file gets a unique
+    name in it, so concurrent imports never share a file.
 
     Parameters
     ----------
     filepath: str
-        target to write
+        target to write or folder to create it in
     parameters_values: dict
         keys: Parameternames
         values: value
+
+    Returns
+    -------
+    str
+        path of the written file, on entering the context
     '''
 
     def __init__(self, filepath: str, parameters_values: dict):
         self.filepath = filepath
-        if os.path.isfile(self.filepath):
-            os.remove(self.filepath)
         self.parameters_values = parameters_values
+        self.path = None
 
     def __enter__(self):
-        file = open(self.filepath, "w")
-        for key in self.parameters_values:
-            value = self.parameters_values[key]
-            line = key + "=" + str(value) + "\n"
-            file.write(line)
-        file.close()
+        if os.path.isdir(self.filepath):
+            fd, path = tempfile.mkstemp(
+                prefix="par_tmp_", suffix=".par", dir=self.filepath)
+            file = os.fdopen(fd, "w")
+        else:
+            path = self.filepath
+            file = open(path, "w")
+        with file:
+            for key in self.parameters_values:
+                value = self.parameters_values[key]
+                file.write(key + "=" + str(value) + "\n")
+        self.path = path.replace("\\", "/")
+        return self.path
 
     def __exit__(self, exc_type, exc_value, traceback):
-        del self
+        if self.path is not None and os.path.isfile(self.path):
+            os.remove(self.path)
+        self.path = None
+
+
+def parfile_changes(parameters: dict, parameters_values: dict, tol=0.0):
+    '''Returns the parameters an import would change
+
+    Note
+    ----
+    A number equal to the value of a parameter defined
+    by an equation of other parameters still changes it,
+    since the import replaces the equation. Numbers are
+    compared to numeric equations within tol.
+
+    Parameters
+    ----------
+    parameters: dict
+        current parameters, refer to read.eval_parfile
+    parameters_values: dict
+        keys: Parameternames
+        values: value or equation
+    tol: float, optional
+        relative and absolute tolerance of numbers
+
+    Returns
+    -------
+    dict
+        the items of parameters_values which differ
+    '''
+    changes = {}
+    for key, value in parameters_values.items():
+        current = parameters.get(key)
+        if current is None or not _unchanged(current, value, tol):
+            changes[key] = value
+    return changes
+
+
+def _unchanged(current, value, tol):
+    equation = str(current["equation"])
+    try:
+        return math.isclose(float(equation), float(value),
+                            rel_tol=tol, abs_tol=tol)
+    except (TypeError, ValueError):
+        return equation.replace(" ", "") == str(value).replace(" ", "")
+
+
+def write_one_liner(path: str, value):
+    '''Writes value as single lined file, refer to read.read_one_liner
+
+    Parameters
+    ----------
+    path: str
+        target to write, missing folders are created
+    value: float
+        value to write
+    '''
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, "w") as file:
+        file.write(repr(float(value)) + "\n")
+
+
+def _pid_alive(pid):
+    '''False if no process with pid is running on this host'''
+    if os.name == "nt":
+        # os.kill would terminate the process on Windows
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            # access denied means the process exists
+            return kernel32.GetLastError() == 5
+        code = ctypes.c_ulong()
+        try:
+            kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+        finally:
+            kernel32.CloseHandle(handle)
+        return code.value == 259
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _stale_lock(lockpath, owner):
+    '''True if the lock owner is a dead process of this host'''
+    try:
+        host, pid = owner.split()
+        pid = int(pid)
+    except ValueError:
+        # owner is about to write its pid, unless it crashed
+        try:
+            return time.time() - os.path.getmtime(lockpath) > 10
+        except OSError:
+            return False
+    return host == socket.gethostname() and not _pid_alive(pid)
+
+
+@contextmanager
+def file_lock(path: str, timeout=60, poll=0.01):
+    '''Exclusive lock of path between threads and processes
+
+    Note
+    ----
+    Creates path + ".lock" holding host and pid of the owner
+    while locked. A lockfile left behind by a crashed process
+    of the same host is removed, one of another host has to
+    be removed by hand.
+
+    Parameters
+    ----------
+    path: str
+        file to lock
+    timeout: int or float, optional
+        seconds to wait for the lock
+    poll: float, optional
+        seconds between attempts to get the lock
+
+    Raises
+    ------
+    TimeoutError
+        if lock could not be acquired within timeout
+    '''
+    lockpath = path + ".lock"
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(lockpath, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                with open(lockpath) as file:
+                    owner = file.read()
+            except FileNotFoundError:
+                continue
+            if _stale_lock(lockpath, owner):
+                with open(lockpath) as file:
+                    # another process might have broken it already
+                    if file.read() != owner:
+                        continue
+                try:
+                    os.remove(lockpath)
+                except FileNotFoundError:
+                    pass
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(
+                    "Could not lock %s, remove %s if no other process "
+                    "is writing" % (path, lockpath))
+            time.sleep(poll)
+    try:
+        os.write(fd, ("%s %d" % (socket.gethostname(), os.getpid())).encode())
+        yield
+    finally:
+        os.close(fd)
+        os.remove(lockpath)
+
+
+# filepath: (size, mtime, rows) after the last write_csv
+_csv_rows = {}
+
+
+def _count_rows(filepath):
+    '''data rows of a csv, counted only if changed by others'''
+    stat = os.stat(filepath)
+    known = _csv_rows.get(os.path.abspath(filepath))
+    if known and known[:2] == (stat.st_size, stat.st_mtime_ns):
+        return known[2]
+    count = 0
+    with open(filepath, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            count += chunk.count(b"\n")
+    return count - 1
+
 
-    def __del__(self):
-        os.remove(self.filepath)
+def _remember_rows(filepath, rows):
+    stat = os.stat(filepath)
+    _csv_rows[os.path.abspath(filepath)] = (
+        stat.st_size, stat.st_mtime_ns, rows)
 
 
+@telemetry.timed("result_io")
 def write_csv(filepath, dataframe, delimiter=";"):
     '''writes dataframe to filepath
 
     Notes
     -----
-    Appends to csv if one is existing in filepath
+    Appends to csv if one is existing in filepath.
+    Rows are appended without rewriting the file, unless
+    dataframe has columns missing in the file. The file is
+    only reread to count its rows if others changed it.
+    Concurrent writers are serialized by file_lock.
 
     Parameters
     ----------
@@ -52,10 +259,25 @@ def write_csv(filepath, dataframe, delimiter=";"):
     delimiter: str, optional
         how delimiter aka seperator shoud be choosen
     '''
-    if os.path.isfile(filepath):
+    with file_lock(filepath):
+        if not os.path.isfile(filepath):
+            dataframe.reset_index(drop=True).to_csv(filepath, sep=delimiter)
+            _remember_rows(filepath, len(dataframe))
+            return
+        columns = pd.read_csv(
+            filepath, delimiter=delimiter, index_col=0, nrows=0).columns
+        if set(dataframe.columns) <= set(columns):
+            rows = _count_rows(filepath)
+            dataframe = dataframe.reindex(columns=columns)
+            dataframe.index = range(rows, rows + len(dataframe))
+            dataframe.to_csv(filepath, sep=delimiter, mode="a", header=False)
+            _remember_rows(filepath, rows + len(dataframe))
+            return
+        # new columns, the whole file needs a new header
         df0 = pd.read_csv(filepath, delimiter=delimiter, index_col=0)
-        dataframe = pd.concat([dataframe, df0], ignore_index=True)
-    dataframe.to_csv(filepath, sep=delimiter)
+        dataframe = pd.concat([df0, dataframe], ignore_index=True)
+        dataframe.to_csv(filepath, sep=delimiter)
+        _remember_rows(filepath, len(dataframe))
 
 
 if __name__ == "__main__":
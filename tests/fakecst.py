@@ -0,0 +1,161 @@
+'''Stand-in for "CST DESIGN ENVIRONMENT" to test pycst without CST.
+
+Invoked like CST: fakecst.py [flags] model.cst
+
+Environment
+-----------
+FAKECST_LOG : str
+    every invocation is appended to this file as json list of arguments
+FAKECST_EXITCODE : int
+    returncode of every invocation, default 0
+FAKECST_DELAY : float
+    seconds to sleep per invocation, default 0
+FAKECST_SPANS : str
+    start and end time and arguments of every invocation are
+    appended to this file as json list
+FAKECST_DOWN : str
+    comma separated "host:port" of unreachable DC main controllers,
+    invocations with -withdc=<host:port> of these return 1
+
+Behaviour
+---------
+model.exitcodes : file next to the model, if existing
+    its first line is removed and used as returncode
+-par file : parameters "key=value" of file are written to Model.par
+-e : writes Result/Frequency.rd0, the sum of all numeric parameters
+'''
+import os
+import sys
+import json
+import time
+
+
+def install(folder):
+    '''writes an executable wrapper of this script to folder
+
+    Returns
+    -------
+    str
+        path to executable
+    '''
+    path = os.path.join(folder, "fakecst").replace("\\", "/")
+    with open(path, "w") as file:
+        file.write('#!/bin/sh\nexec "%s" "%s" "$@"\n'
+                   % (sys.executable, os.path.abspath(__file__)))
+    os.chmod(path, 0o755)
+    return path
+
+
+def make_model(folder, lines, cst_path="cst"):
+    '''creates model.cst with Model.par in folder and returns CstModel'''
+    from pycst import pycst
+    folder = folder.replace("\\", "/")
+    filename = folder + "/model.cst"
+    open(filename, "w").close()
+    os.makedirs(folder + "/model/Model/3D")
+    write_par(folder + "/model/Model/3D/Model.par", lines)
+    model = pycst.CstModel(filename, cst_path=cst_path, autoanswer="n")
+    model.verbose = False
+    return model
+
+
+def write_par(path, lines):
+    with open(path, "w") as file:
+        file.write("\n".join(lines) + "\n")
+
+
+def invocations(logpath):
+    '''returns list of argument lists logged at logpath'''
+    if not os.path.isfile(logpath):
+        return []
+    with open(logpath) as file:
+        return [json.loads(line) for line in file]
+
+
+def spans(logpath):
+    '''returns list of (start, end, args) logged at logpath'''
+    return [(start, end, args)
+            for start, end, args in invocations(logpath)]
+
+
+def max_overlap(spans):
+    '''returns the largest number of spans running at once'''
+    events = sorted([(s[0], 1) for s in spans] + [(s[1], -1) for s in spans])
+    running = most = 0
+    for _, step in events:
+        running += step
+        most = max(most, running)
+    return most
+
+
+def read_par(path):
+    with open(path) as file:
+        lines = [line.split("  ") for line in file.read().splitlines()]
+    return [[a.strip() for a in line if a.strip()] for line in lines]
+
+
+def import_par(model, parfile):
+    par = model[:-len(".cst")] + "/Model/3D/Model.par"
+    lines = read_par(par)
+    with open(parfile) as file:
+        for line in file.read().splitlines():
+            key, value = line.split("=", 1)
+            for p in lines:
+                if p[0].lower() == key.lower():
+                    p[1] = value
+                    break
+            else:
+                lines.append([key, value])
+    with open(par, "w") as file:
+        file.write("\n".join("  ".join(p) for p in lines) + "\n")
+
+
+def solve(model):
+    par = model[:-len(".cst")] + "/Model/3D/Model.par"
+    total = 0.0
+    for p in read_par(par):
+        try:
+            total += float(p[1])
+        except ValueError:
+            pass
+    result = model[:-len(".cst")] + "/Result"
+    os.makedirs(result, exist_ok=True)
+    with open(result + "/Frequency.rd0", "w") as file:
+        file.write(repr(total) + "\n")
+
+
+def main(args):
+    if os.environ.get("FAKECST_LOG"):
+        with open(os.environ["FAKECST_LOG"], "a") as file:
+            file.write(json.dumps(args) + "\n")
+    print("fakecst", " ".join(args), flush=True)
+    start = time.time()
+    time.sleep(float(os.environ.get("FAKECST_DELAY", 0)))
+    if os.environ.get("FAKECST_SPANS"):
+        with open(os.environ["FAKECST_SPANS"], "a") as file:
+            file.write(json.dumps([start, time.time(), args]) + "\n")
+    returncode = int(os.environ.get("FAKECST_EXITCODE", 0))
+    model = args[-1]
+    exitcodes = model[:-len(".cst")] + ".exitcodes"
+    if os.path.isfile(exitcodes):
+        with open(exitcodes) as file:
+            codes = file.read().split()
+        if codes:
+            returncode = int(codes[0])
+            with open(exitcodes, "w") as file:
+                file.write("\n".join(codes[1:]))
+    down = os.environ.get("FAKECST_DOWN", "").split(",")
+    if any(a.startswith("-withdc=") and a[len("-withdc="):] in down
+           for a in args):
+        returncode = 1
+    if returncode != 0:
+        return returncode
+    if "-par" in args:
+        import_par(model, args[args.index("-par") + 1])
+    if "-e" in args:
+        solve(model)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
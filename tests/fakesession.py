@@ -0,0 +1,38 @@
+'''Stand-in for a CST session server, refer to pycst.session.Session.
+
+Invoked as: fakesession.py model.cst
+
+Logs ["<session>"] to FAKECST_LOG when starting and runs every
+"run" request in-process with fakecst. The flag "-crash" makes
+the server exit without answering, "-hang" lets it sleep.
+'''
+import os
+import sys
+import json
+import time
+import fakecst
+
+
+def main(model):
+    if os.environ.get("FAKECST_LOG"):
+        with open(os.environ["FAKECST_LOG"], "a") as file:
+            file.write(json.dumps(["<session>"]) + "\n")
+    print("session opened", model, flush=True)
+    for line in sys.stdin:
+        request = json.loads(line)
+        if request["cmd"] == "quit":
+            return 0
+        returncode = 0
+        if request["cmd"] == "run":
+            if "-crash" in request["flags"]:
+                return 1
+            if "-hang" in request["flags"]:
+                time.sleep(60)
+            returncode = fakecst.main(request["flags"] + [model])
+        print(json.dumps({"id": request["id"], "returncode": returncode}),
+              flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1]))
@@ -0,0 +1,102 @@
+import unittest
+import os
+import tempfile
+import fakecst
+from pycst.cache import ResultCache, parameter_key
+from pycst.sweep import SweepEngine
+
+
+class tests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.sqlite")
+
+    def tearDown(self):
+        os.environ.pop("FAKECST_LOG", None)
+        self.tmp.cleanup()
+
+    def test_parameter_key(self):
+        key = parameter_key({"A": 1, "b": 2.5}, " -m -e ")
+        self.assertEqual(key, parameter_key({"b": 2.5, "a": 1.0}, "-m -e"))
+        self.assertEqual(key, parameter_key(
+            {"a": {"equation": "1", "value": 1.0}, "b": 2.5}, "-m -e"))
+        self.assertNotEqual(key, parameter_key({"a": 1, "b": 2.5}, "-m -o"))
+        self.assertNotEqual(key, parameter_key(
+            {"a": 1, "b": 2.5}, "-m -e", "C:/other.cst"))
+
+    def test_persistence(self):
+        cache = ResultCache(self.path)
+        cache.put("k", {"Frequency": 1.5})
+        cache = ResultCache(self.path)
+        self.assertEqual(cache.get("k"), {"Frequency": 1.5})
+        self.assertIsNone(cache.get("other"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_lru_eviction(self):
+        cache = ResultCache(self.path, max_entries=2)
+        cache.put("a", {"x": 1})
+        cache.put("b", {"x": 2})
+        cache.get("a")
+        cache.put("c", {"x": 3})
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_folder(self):
+        folder = os.path.join(self.tmp.name, "Result")
+        os.makedirs(folder)
+        with open(os.path.join(folder, "x.rd1"), "w") as file:
+            file.write("data")
+        cache = ResultCache(self.path, store_folders=True)
+        cache.put("a", {}, folder=folder)
+        target = os.path.join(self.tmp.name, "restored")
+        os.makedirs(target)
+        stale = os.path.join(target, "stale.rd0")
+        with open(stale, "w") as file:
+            file.write("1")
+        self.assertTrue(cache.restore_folder("a", target))
+        self.assertTrue(os.path.isfile(os.path.join(target, "x.rd1")))
+        self.assertFalse(os.path.isfile(stale))
+        cache.clear()
+        self.assertFalse(cache.restore_folder("a", target))
+
+    def test_model_skips_solver(self):
+        log = os.path.join(self.tmp.name, "log.jsonl")
+        os.environ["FAKECST_LOG"] = log
+        model = fakecst.make_model(
+            self.tmp.name, ["a  1", "b  2"],
+            cst_path=fakecst.install(self.tmp.name))
+        model.result_cache = ResultCache(self.path)
+        df = SweepEngine(model).run({"a": [10, 20, 10, 20]})
+        self.assertEqual(list(df["Frequency"]), [12, 22, 12, 22])
+        # two solver runs and one rebuild to recover parameters
+        self.assertEqual(len(fakecst.invocations(log)), 3)
+        self.assertEqual(model.result_cache.hits, 2)
+
+    def test_model_hit_imports_parameters(self):
+        log = os.path.join(self.tmp.name, "log.jsonl")
+        os.environ["FAKECST_LOG"] = log
+        model = fakecst.make_model(
+            self.tmp.name, ["a  1", "b  2"],
+            cst_path=fakecst.install(self.tmp.name))
+        model.result_cache = ResultCache(self.path)
+        model.cst_run_eigenmode(parameters_values={"a": 10})
+        model.cst_run_eigenmode(parameters_values={"a": 1})
+        stale = model.RESULTPATH + "stale.rd0"
+        with open(stale, "w") as file:
+            file.write("1")
+        calls = len(fakecst.invocations(log))
+        self.assertEqual(
+            model.cst_run_eigenmode(parameters_values={"a": 10}), 0)
+        # only the import without rebuild, no solver run
+        calls = fakecst.invocations(log)[calls:]
+        self.assertEqual(len(calls), 1)
+        self.assertNotIn("-e", calls[0])
+        self.assertEqual(model.result_cache.hits, 1)
+        self.assertEqual(model.get_parameters()["a"]["value"], 10)
+        self.assertFalse(os.path.isfile(stale))
+
+
+if __name__ == "__main__":
+    unittest.main()
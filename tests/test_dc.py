@@ -0,0 +1,112 @@
+import unittest
+import os
+import tempfile
+import fakecst
+from pycst.dc import DcDispatcher, Controller, controllers_from
+
+
+def controllers(calls):
+    '''controller address of every logged invocation'''
+    return [a[len("-withdc="):] for c in calls for a in c
+            if a.startswith("-withdc=")]
+
+
+class tests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log = os.path.join(self.tmp.name, "log.jsonl")
+        os.environ["FAKECST_LOG"] = self.log
+        self.model = fakecst.make_model(
+            self.tmp.name, ["a  1", "b  2"],
+            cst_path=fakecst.install(self.tmp.name))
+
+    def tearDown(self):
+        del os.environ["FAKECST_LOG"]
+        os.environ.pop("FAKECST_DOWN", None)
+        os.environ.pop("FAKECST_DELAY", None)
+        self.tmp.cleanup()
+
+    def test_controllers_from(self):
+        result = controllers_from({"h1:1": 2, "h2:1": 1})
+        self.assertEqual([c.capacity for c in result], [2, 1])
+        result = controllers_from(["h1:1", ("h2:1", 3), Controller("h3:1")])
+        self.assertEqual([c.address for c in result], ["h1:1", "h2:1", "h3:1"])
+        with self.assertRaises(ValueError):
+            controllers_from(["h1:1", "h1:1"])
+        with self.assertRaises(ValueError):
+            controllers_from([])
+
+    def test_spread(self):
+        os.environ["FAKECST_DELAY"] = "0.2"
+        dispatcher = DcDispatcher(self.model, {"h1:1": 2, "h2:1": 1})
+        df = dispatcher.run({"a": [float(i) for i in range(6)]})
+        self.assertEqual(list(df["returncode"]), [0] * 6)
+        self.assertEqual(list(df["Frequency"]), [i + 2.0 for i in range(6)])
+        used = controllers(fakecst.invocations(self.log))
+        self.assertEqual(len(used), 6)
+        self.assertGreaterEqual(used.count("h1:1"), used.count("h2:1"))
+        self.assertGreater(used.count("h2:1"), 0)
+        status = dispatcher.status().set_index("address")
+        self.assertEqual(status["done"].sum(), 6)
+        self.assertEqual(status["running"].sum(), 0)
+        dispatcher.cleanup()
+
+    def test_failover(self):
+        os.environ["FAKECST_DOWN"] = "h2:1"
+        dispatcher = DcDispatcher(
+            self.model, ["h1:1", "h2:1"], max_failures=1)
+        df = dispatcher.run({"a": [1.0, 2.0, 3.0, 4.0]})
+        self.assertEqual(list(df["returncode"]), [0] * 4)
+        status = dispatcher.status().set_index("address")
+        self.assertEqual(status.loc["h1:1", "done"], 4)
+        self.assertEqual(status.loc["h2:1", "failed"], 1)
+        self.assertFalse(status.loc["h2:1", "healthy"])
+        # taken out after its first failure
+        used = controllers(fakecst.invocations(self.log))
+        self.assertEqual(used.count("h2:1"), 1)
+
+    def test_failing_point(self):
+        os.environ["FAKECST_DOWN"] = "h1:1,h2:1"
+        dispatcher = DcDispatcher(
+            self.model, ["h1:1", "h2:1"], max_failures=1)
+        df = dispatcher.run({"a": [1.0]})
+        self.assertEqual(list(df["returncode"]), [1])
+        # tried on both, neither controller blamed
+        used = controllers(fakecst.invocations(self.log))
+        self.assertEqual(sorted(used), ["h1:1", "h2:1"])
+        self.assertEqual([c.failures for c in dispatcher.controllers], [0, 0])
+        # but their cooldowns run on
+        self.assertFalse(dispatcher.status()["healthy"].any())
+
+    def test_acquit(self):
+        dispatcher = DcDispatcher(self.model, ["h1:1"], max_failures=2)
+        controller = dispatcher.controllers[0]
+        controller.running = 4
+        with dispatcher._condition:
+            dispatcher._release(controller, 1)
+            blamed = [(controller, controller._streak)]
+            # the success ended the failures in a row
+            dispatcher._release(controller, 0)
+            dispatcher._release(controller, 1)
+            dispatcher._release(controller, 1)
+            dispatcher._acquit(blamed)
+        self.assertEqual(controller.failures, 2)
+        self.assertFalse(controller.healthy)
+        with dispatcher._condition:
+            dispatcher._acquit([(controller, controller._streak)])
+        self.assertEqual(controller.failures, 1)
+        self.assertFalse(controller.healthy)
+
+    def test_model_sweep(self):
+        df = self.model.sweep("a", [5, 6], dc=["h1:1", "h2:1"])
+        self.assertEqual(list(df["Frequency"]), [7, 8])
+        self.assertEqual(len(controllers(fakecst.invocations(self.log))), 2)
+        # the model itself is unchanged
+        self.assertEqual(self.model.get_parameters()["a"]["value"], 1)
+        self.assertFalse(os.path.isdir(
+            self.model.FILEPATH + str(self.model) + "_workspaces"))
+
+
+if __name__ == "__main__":
+    unittest.main()
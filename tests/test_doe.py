@@ -0,0 +1,98 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+import fakecst
+from pycst import doe
+from pycst.graph import ParameterGraph
+
+BOUNDS = {"x%d" % i: (-1.0, 1.0 + i) for i in range(8)}
+
+
+def discrepancy(u):
+    '''centered L2 discrepancy of points u in the unit cube'''
+    n, d = u.shape
+    z = np.abs(u - 0.5)
+    single = np.prod(1 + z / 2 - z ** 2 / 2, axis=1).sum()
+    pairs = np.prod(1 + (z[:, None] + z[None]) / 2
+                    - np.abs(u[:, None] - u[None]) / 2, axis=2).sum()
+    return np.sqrt((13 / 12) ** d - 2 / n * single + pairs / n ** 2)
+
+
+def unit(df):
+    lower = np.array([BOUNDS[c][0] for c in df.columns])
+    upper = np.array([BOUNDS[c][1] for c in df.columns])
+    return (df.to_numpy() - lower) / (upper - lower)
+
+
+class tests(unittest.TestCase):
+
+    def test_full_factorial(self):
+        df = doe.full_factorial({"a": (0, 1), "b": (0, 4)},
+                                levels={"a": 2, "b": 5})
+        self.assertEqual(len(df), 10)
+        self.assertEqual(sorted(set(df["b"])), [0, 1, 2, 3, 4])
+
+    def test_bounds(self):
+        for method in doe.METHODS.values():
+            df = method(BOUNDS, 256, seed=1)
+            self.assertEqual(list(df.columns), list(BOUNDS))
+            for name, (lower, upper) in BOUNDS.items():
+                self.assertTrue(df[name].between(lower, upper).all())
+        with self.assertRaises(ValueError):
+            doe.sobol({"a": (1, 0)}, 4)
+
+    def test_latin_hypercube(self):
+        df = doe.latin_hypercube({"a": (0, 10)}, 10, seed=2)
+        self.assertEqual(sorted(np.floor(df["a"])), list(range(10)))
+
+    def test_sobol_balance(self):
+        df = doe.sobol(BOUNDS, 256, scramble=False)
+        for name, (lower, upper) in BOUNDS.items():
+            u = (df[name] - lower) / (upper - lower)
+            # one point in each of the 256 intervals
+            self.assertEqual(len(set(np.floor(u * 256))), 256)
+        self.assertEqual(list(df.iloc[0]), [b[0] for b in BOUNDS.values()])
+        rest = doe.sobol(BOUNDS, 4, scramble=False, skip=256)
+        self.assertEqual(len(rest), 4)
+
+    def test_low_discrepancy(self):
+        random = np.random.default_rng(3).random((512, len(BOUNDS)))
+        for method in (doe.sobol, doe.halton):
+            self.assertLess(discrepancy(unit(method(BOUNDS, 512, seed=3))),
+                            discrepancy(random) / 2)
+
+    def test_constraints(self):
+        with tempfile.TemporaryDirectory() as folder:
+            model = fakecst.make_model(
+                folder, ["r  1", "w  2", "gap  w-2*r"])
+            graph = ParameterGraph(model.get_parameters())
+            bounds = {"r": (0, 2), "w": (0, 4)}
+            df = doe.sample(bounds, 64, constraints=["gap > 0"],
+                            graph=graph, seed=4)
+            self.assertEqual(len(df), 64)
+            self.assertTrue((df["w"] > 2 * df["r"]).all())
+            df = model.sample_design(
+                bounds, 16, method="halton",
+                constraints=[lambda v: v["gap"] < 1, "r > 0.5"])
+            self.assertTrue((df["w"] - 2 * df["r"] < 1).all())
+            self.assertTrue((df["r"] > 0.5).all())
+            with self.assertRaises(NameError):
+                doe.feasible(df, ["unknown > 1"], graph)
+            with self.assertRaises(ValueError):
+                doe.sample(bounds, 8, constraints=["gap > 100"],
+                           graph=graph)
+
+    def test_sweep_design(self):
+        with tempfile.TemporaryDirectory() as folder:
+            model = fakecst.make_model(
+                folder, ["a  1", "b  2"],
+                cst_path=fakecst.install(folder))
+            design = doe.full_factorial({"a": (0, 1), "b": (0, 1)}, 2)
+            df = model.sweep_design(design)
+            self.assertEqual(list(df["Frequency"]),
+                             list(design["a"] + design["b"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
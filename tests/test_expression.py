@@ -0,0 +1,66 @@
+import unittest
+import builtins
+import numpy as np
+from unittest import mock
+from pycst.expression import Expression, tokenize
+
+
+class tests(unittest.TestCase):
+
+    def test_arithmetic(self):
+        self.assertEqual(Expression("1+2*3-4/2")({}), 5)
+        self.assertEqual(Expression("-(a+1)*B")({"a": 2, "b": 3}), -9)
+        self.assertEqual(Expression("2e3+.5")({}), 2000.5)
+        # evaluated in order, not positive terms first
+        self.assertEqual(Expression("a-b+c")(
+            {"a": 1e16, "b": 1e16, "c": 1}), 1)
+        self.assertEqual(Expression("a+c-b")(
+            {"a": 1e16, "b": 1e16, "c": 1}), 0)
+
+    def test_power(self):
+        self.assertEqual(Expression("2^3")({}), 8)
+        self.assertEqual(Expression("2**3")({}), 8)
+        # left associative like in VBA
+        self.assertEqual(Expression("2^3^2")({}), 64)
+        self.assertEqual(Expression("2^-1")({}), 0.5)
+
+    def test_comparison(self):
+        self.assertEqual(Expression("a>1")({"a": 2}), -1)
+        self.assertEqual(Expression("a<>2")({"a": 2}), 0)
+        self.assertEqual(Expression("(a=2)*5")({"a": 2}), -5)
+
+    def test_functions(self):
+        self.assertAlmostEqual(Expression("Sqr(16)+sin(pi/2)")(
+            {"pi": np.pi}), 5)
+        self.assertEqual(Expression("max(a,3,2)")({"a": 1}), 3)
+
+    def test_names(self):
+        code = Expression("Cos(Alpha)*l+l")
+        self.assertEqual(code.names, {"alpha", "l"})
+
+    def test_no_eval(self):
+        with mock.patch.object(builtins, "eval", side_effect=AssertionError):
+            self.assertEqual(Expression("a*2")({"a": 3}), 6)
+
+    def test_errors(self):
+        with self.assertRaises(NameError):
+            Expression("__import__(1)")
+        with self.assertRaises(SyntaxError):
+            Expression("a+")
+        with self.assertRaises(SyntaxError):
+            Expression("(a")
+        with self.assertRaises(ValueError):
+            tokenize("a.__class__")
+        with self.assertRaises(ZeroDivisionError):
+            Expression("1/0")({})
+
+    def test_vectorized(self):
+        a = np.linspace(0, 1, 10000)
+        code = Expression("sqr(a^2+b)*(a>0.5)")
+        values = code.vectorized({"a": a, "b": 1.0})
+        self.assertEqual(values.shape, a.shape)
+        np.testing.assert_allclose(values, -np.sqrt(a**2 + 1) * (a > 0.5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import os
+import tempfile
+from pycst import read
+from pycst.graph import ParameterGraph
+
+
+def parameters(**equations):
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "Model.par")
+        with open(path, "w") as file:
+            for name, equation in equations.items():
+                file.write(name + "  " + equation + "\n")
+        return read.eval_parfile(path)
+
+
+class tests(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = ParameterGraph(parameters(
+            a="1", b="2", c="a*10", d="c+b", e="b*3"))
+
+    def test_update(self):
+        changed = self.graph.update({"A": 2})
+        self.assertEqual(changed, {"a", "c", "d"})
+        self.assertEqual(self.graph.changed, changed)
+        self.assertEqual(self.graph["d"], 22)
+        self.assertEqual(self.graph["e"], 6)
+
+    def test_update_unchanged_value(self):
+        self.assertEqual(self.graph.update({"a": 1}), set())
+
+    def test_update_equation(self):
+        changed = self.graph.update({"c": "b*100"})
+        self.assertEqual(changed, {"c", "d"})
+        self.assertEqual(self.graph["d"], 202)
+        # a no longer drives c
+        self.assertEqual(self.graph.update({"a": 5}), {"a"})
+
+    def test_predict(self):
+        values = self.graph.predict({"b": 4})
+        self.assertEqual(values["d"], 14)
+        self.assertEqual(values["e"], 12)
+        self.assertEqual(self.graph["d"], 12)
+
+    def test_downstream(self):
+        self.assertEqual(self.graph.downstream(["b"]), {"b", "d", "e"})
+
+    def test_evaluate_design(self):
+        design = {"a": [float(i) for i in range(10000)]}
+        df = self.graph.evaluate_design(design)
+        self.assertEqual(list(df.columns), ["a", "c", "d"])
+        self.assertEqual(len(df), 10000)
+        self.assertEqual(df["d"].iloc[5], 52)
+        df = self.graph.evaluate_design(design, names=["e", "d"])
+        self.assertEqual(list(df["e"].iloc[:2]), [6, 6])
+        self.assertEqual(self.graph["d"], 12)
+
+    def test_failed_update(self):
+        before = (self.graph.values, self.graph.equation("c"))
+        with self.assertRaises(ValueError):
+            self.graph.update({"a": "d", "b": 7})
+        with self.assertRaises(NameError):
+            self.graph.update({"b": 7, "c": "x*2"})
+        with self.assertRaises(ZeroDivisionError):
+            self.graph.update({"b": 0, "e": "a/b"})
+        self.assertEqual((self.graph.values, self.graph.equation("c")),
+                         before)
+        self.assertEqual(self.graph.update({"a": 2}), {"a", "c", "d"})
+
+    def test_unknown(self):
+        with self.assertRaises(KeyError):
+            self.graph.update({"x": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+import unittest
+import os
+import tempfile
+import threading
+from pycst import write
+from fakecst import make_model, write_par, install, invocations
+
+
+class tests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.model = make_model(self.tmp.name, ["a  1", "b  a*2"])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parameter_cache(self):
+        self.assertTrue(self.model.is_parameter("a"))
+        self.assertFalse(self.model.is_parameter("c"))
+        self.assertEqual(self.model.get_parameters()["b"]["value"], 2)
+        info = self.model.parhandler.cache_info()
+        self.assertEqual(info, {"hits": 2, "misses": 1})
+
+    def test_parameter_cache_invalidation(self):
+        self.model.get_parameters()
+        write_par(self.model.parhandler.path, ["a  1", "b  a*3"])
+        self.assertEqual(self.model.get_parameters()["b"]["value"], 3)
+        self.assertEqual(self.model.parhandler.cache_misses, 2)
+
+    def test_parameter_copy(self):
+        self.model.get_parameters()["b"]["value"] = 7
+        self.assertEqual(self.model.get_parameters()["b"]["value"], 2)
+
+    def test_results_all_runs(self):
+        path = self.model.RESULTPATH
+        for name, value in [("f", 1), ("f_1", 2), ("f_2", 3), ("g", 4)]:
+            write.write_one_liner(path + name + ".rd0", value)
+        df = self.model.get_results(
+            run_ids="all", parameters={"1": {"a": 5}, "2": {"a": 6}})
+        self.assertEqual(list(df["run_id"]), ["0", "0", "1", "2"])
+        self.assertEqual(list(df["result"]), ["f", "g", "f", "f"])
+        self.assertEqual(list(df["value"]), [1, 4, 2, 3])
+        self.assertEqual(list(df["a"].fillna(0)), [0, 0, 5, 6])
+        df = self.model.get_results(run_ids=["0"])
+        self.assertEqual(list(df["b"]), [2, 2])
+
+    def test_parfile_tmp(self):
+        paths = []
+        with write.parfile_tmp(self.tmp.name, {"a": 1}) as first, \
+                write.parfile_tmp(self.tmp.name, {"a": 2}) as second:
+            paths += [first, second]
+            self.assertNotEqual(first, second)
+            with open(second) as file:
+                self.assertEqual(file.read(), "a=2\n")
+        self.assertFalse(any(os.path.exists(p) for p in paths))
+
+    def test_parfile_changes(self):
+        parameters = self.model.get_parameters()
+        changes = write.parfile_changes(
+            parameters, {"a": 1.0, "b": 2, "c": 3})
+        # b=2 replaces its equation
+        self.assertEqual(changes, {"b": 2, "c": 3})
+        self.assertEqual(write.parfile_changes(
+            parameters, {"a": "1", "b": "a * 2"}), {})
+        self.assertEqual(write.parfile_changes(
+            parameters, {"a": 1 + 1e-6, "b": "a*3"}), {"a": 1 + 1e-6,
+                                                       "b": "a*3"})
+        self.assertEqual(write.parfile_changes(
+            parameters, {"a": 1 + 1e-6}, tol=1e-5), {})
+
+    def fake_model(self):
+        log = os.path.join(self.tmp.name, "log.jsonl")
+        os.environ["FAKECST_LOG"] = log
+        self.addCleanup(os.environ.pop, "FAKECST_LOG")
+        self.model.CST_PATH = install(self.tmp.name)
+        return log
+
+    def test_edit_unchanged(self):
+        log = self.fake_model()
+        self.assertEqual(self.model.edit_parameters({"a": 1}), 0)
+        self.assertEqual(invocations(log), [])
+        self.model.edit_parameters({"a": 1, "b": "a*2"}, rebuild=False)
+        self.assertEqual(invocations(log), [])
+        self.assertEqual(self.model.skipped_invocations, 3)
+        self.model.edit_parameters({"a": 3}, rebuild=False)
+        self.assertEqual(len(invocations(log)), 1)
+        self.assertEqual(self.model.get_parameters()["b"]["value"], 6)
+        self.model.parameter_tolerance = 0.1
+        self.model.add_parameters({"a": 3.05, "b": 6}, rebuild=False)
+        self.assertEqual(len(invocations(log)), 2)
+        self.assertEqual(self.model.skipped_invocations, 3)
+        parameters = self.model.get_parameters()
+        # only b was imported, its equation replaced
+        self.assertEqual(parameters["a"]["value"], 3)
+        self.assertEqual(parameters["b"]["equation"], "6")
+        leftovers = [f for f in os.listdir(self.model.FILEPATH)
+                     if f.endswith(".par")]
+        self.assertEqual(leftovers, [])
+
+    def test_batch_parameters(self):
+        log = self.fake_model()
+        with self.model.batch_parameters() as batch:
+            self.model.edit_parameters({"a": 4})
+            self.model.add_parameters({"c": 5})
+            self.model.edit_parameters({"a": 2, "c": 6}, rebuild=False)
+            self.assertEqual(invocations(log), [])
+        self.assertEqual(batch.returncode, 0)
+        calls = invocations(log)
+        # one import, one rebuild
+        self.assertEqual(len(calls), 2)
+        parameters = self.model.get_parameters()
+        self.assertEqual(parameters["a"]["value"], 2)
+        self.assertEqual(parameters["c"]["value"], 6)
+
+    def test_concurrent_edits(self):
+        self.fake_model()
+        os.environ["FAKECST_DELAY"] = "0.3"
+        self.addCleanup(os.environ.pop, "FAKECST_DELAY")
+        # a second model in the same folder
+        filename = self.model.FILEPATH + "second.cst"
+        open(filename, "w").close()
+        os.makedirs(self.model.FILEPATH + "second/Model/3D")
+        write_par(self.model.FILEPATH + "second/Model/3D/Model.par",
+                  ["a  1"])
+        second = type(self.model)(
+            filename, cst_path=self.model.CST_PATH, autoanswer="n")
+        second.verbose = False
+        models = [self.model, second]
+        threads = [threading.Thread(target=m.edit_parameters,
+                                    args=({"a": 7 + i}, False))
+                   for i, m in enumerate(models)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self.model.get_parameters()["a"]["value"], 7)
+        self.assertEqual(second.get_parameters()["a"]["value"], 8)
+
+if __name__ == "__main__":
+    unittest.main()
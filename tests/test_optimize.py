@@ -0,0 +1,73 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+import fakecst
+from pycst.sweep import SweepEngine
+from pycst.optimize import SurrogateOptimizer, target
+
+
+def frequency(points):
+    return [{"returncode": 0,
+             "Frequency": 1 + p["a"] ** 2 + np.sin(3 * p["b"])}
+            for p in points]
+
+
+class tests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_reaches_target(self):
+        opt = SurrogateOptimizer(
+            frequency, {"a": (0, 2), "b": (0, 1)},
+            target("Frequency", 3.5), batch_size=2, seed=1)
+        best = opt.run(budget=40, tol=1e-3)
+        self.assertLessEqual(best["objective"], 1e-3)
+        # a grid of the same resolution would need hundreds of points
+        self.assertLess(len(opt.evaluations), 30)
+
+    def test_resume(self):
+        checkpoint = os.path.join(self.tmp.name, "opt.json")
+        calls = []
+
+        def evaluator(points):
+            calls.extend(points)
+            rows = frequency(points)
+            rows[0]["returncode"] = 1
+            return rows
+
+        kwargs = dict(bounds={"a": (0, 2), "b": (0, 1)},
+                      objective="Frequency", checkpoint=checkpoint, seed=2)
+        SurrogateOptimizer(evaluator, batch_size=3, **kwargs).run(6)
+        opt = SurrogateOptimizer(evaluator, batch_size=3, **kwargs)
+        self.assertEqual(len(opt.evaluations), 6)
+        self.assertTrue(np.isnan(opt.evaluations[0]["objective"]))
+        opt.run(9)
+        self.assertEqual(len(calls), 9)
+        self.assertEqual(len(opt.evaluations), 9)
+
+    def test_sweep_engine(self):
+        log = os.path.join(self.tmp.name, "log.jsonl")
+        os.environ["FAKECST_LOG"] = log
+        try:
+            model = fakecst.make_model(
+                self.tmp.name, ["a  1", "b  2"],
+                cst_path=fakecst.install(self.tmp.name))
+            opt = SurrogateOptimizer(
+                SweepEngine(model), {"a": (0, 4), "b": (0, 4)},
+                target("Frequency", 5), seed=0)
+            best = opt.run(budget=12, tol=0.05)
+        finally:
+            del os.environ["FAKECST_LOG"]
+        self.assertLessEqual(best["objective"], 0.05)
+        self.assertAlmostEqual(
+            best["row"]["Frequency"], sum(best["point"].values()))
+        self.assertEqual(model.get_parameters()["a"]["value"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+import unittest
+import os
+import time
+import tempfile
+from pycst import read
+
+
+def write_parfile(folder, lines):
+    path = os.path.join(folder, "Model.par")
+    with open(path, "w") as file:
+        file.write("\n".join(lines) + "\n")
+    return path
+
+
+class tests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_eval_parfile(self):
+        path = write_parfile(self.tmp.name, [
+            "b  A*2+ih_1  some comment",
+            "A  3",
+            "ih  1",
+            "ih_1  9",
+            "c  b^2",
+            "d  sqr(c)+Pi-pi",
+            "meta  1  -1",
+        ])
+        pars = read.eval_parfile(path)
+        self.assertEqual(pars["A"]["value"], 3)
+        self.assertEqual(pars["b"]["value"], 15)
+        self.assertEqual(pars["b"]["equation"], "A*2+ih_1")
+        self.assertEqual(pars["c"]["value"], 225)
+        self.assertAlmostEqual(pars["d"]["value"], 15)
+        self.assertNotIn("meta", pars)
+
+    def test_eval_parfile_cycle(self):
+        path = write_parfile(self.tmp.name, ["a  b", "b  c+1", "c  a"])
+        with self.assertRaises(ValueError):
+            read.eval_parfile(path)
+
+    def test_eval_parfile_unresolved(self):
+        path = write_parfile(self.tmp.name, ["a  1", "b  a+nothere"])
+        with self.assertRaises(NameError):
+            read.eval_parfile(path)
+
+    def test_eval_parfile_chain(self):
+        lines = ["p0  1"] + ["p%d  p%d+1" % (i, i - 1) for i in range(1, 5000)]
+        path = write_parfile(self.tmp.name, lines[::-1])
+        pars = read.eval_parfile(path)
+        self.assertEqual(pars["p4999"]["value"], 5000)
+
+    def test_eval_parfile_scaling(self):
+        def seconds(count):
+            lines = ["p0  1"] + ["p%d  p%d+sin(0)" % (i, i - 1)
+                                 for i in range(1, count)]
+            path = write_parfile(self.tmp.name, lines)
+            times = []
+            for _ in range(3):
+                start = time.perf_counter()
+                read.eval_parfile(path)
+                times.append(time.perf_counter() - start)
+            return min(times)
+
+        # linear: 4 times as long, quadratic: 16 times
+        self.assertLess(seconds(16000) / seconds(4000), 8)
+
+    def write_result(self, name, value):
+        path = os.path.join(self.tmp.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(str(value) + "\n")
+
+    def test_get_files(self):
+        for name in ["f.rd0", "sub/g.rd0", "h.rd0.bak", "i.rd01", "j.rd1"]:
+            self.write_result(name, 1)
+        names = read.get_files(self.tmp.name + "/", [".rd0"])
+        self.assertEqual(sorted(names), ["f", "sub/g"])
+        names = read.get_files(self.tmp.name, [".rd0", ".rd1"])
+        self.assertEqual(sorted(names), ["f", "j", "sub/g"])
+
+    def test_result_scanner(self):
+        self.write_result("f.rd0", 1)
+        self.write_result("sub/g.rd0", 2)
+        self.write_result("bad.rd0", "x")
+        scanner = read.ResultScanner(self.tmp.name)
+        self.assertEqual(scanner.scan(), {"f": 1, "sub/g": 2})
+        self.assertIn("bad", scanner.errors)
+        self.write_result("f.rd0", 3)
+        os.remove(os.path.join(self.tmp.name, "sub", "g.rd0"))
+        self.assertEqual(scanner.scan(), {"f": 3})
+
+    def test_unchanged(self):
+        self.write_result("f.rd0", 1)
+        path = os.path.join(self.tmp.name, "f.rd0")
+        stat = os.stat(path)
+        state = read.file_state(stat, path=path)
+        self.assertIsNotNone(state[2])
+        self.assertEqual(read.unchanged(path, state), (True, state))
+        # written again within the timestamp resolution
+        self.write_result("f.rd0", 2)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(read.unchanged(path, state), (False, None))
+        # no longer racy, mtime and size are trusted
+        old = time.time() - 10
+        os.utime(path, (old, old))
+        state = read.file_state(os.stat(path), path=path)
+        self.assertIsNone(state[2])
+        self.assertEqual(read.unchanged(path, state), (True, state))
+
+    def test_result_scanner_racy(self):
+        self.write_result("f.rd0", 1)
+        path = os.path.join(self.tmp.name, "f.rd0")
+        stat = os.stat(path)
+        scanner = read.ResultScanner(self.tmp.name)
+        self.assertEqual(scanner.scan(), {"f": 1})
+        self.write_result("f.rd0", 3)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(scanner.scan(), {"f": 3})
+
+    def test_read_1d(self):
+        self.write_result("s.rd1", "\n".join([
+            '#"Frequency / GHz"\t"S1,1"',
+            "#" + "-" * 20,
+            "1.0\t-12.5",
+            "2.0\t-13e-1",
+            "#Parameters = {a=2}",
+            "-----",
+            "1.0\t-11",
+            "2.0\t-12",
+        ]))
+        data = read.read_1d(os.path.join(self.tmp.name, "s.rd1"))
+        self.assertEqual(data.shape, (2, 2, 2))
+        self.assertEqual(data[0, 1, 1], -1.3)
+        self.assertEqual(data[1, 0, 1], -11)
+
+    def test_read_1d_mmap(self):
+        self.write_result("s.rd1", "#x y\n" + "".join(
+            "%d 2.5\n" % i for i in range(1000)) + "#z\n1 2 3")
+        threshold, read.MMAP_THRESHOLD = read.MMAP_THRESHOLD, 10
+        chunk, read._CHUNK = read._CHUNK, 64
+        try:
+            data = read.read_1d(os.path.join(self.tmp.name, "s.rd1"))
+        finally:
+            read.MMAP_THRESHOLD = threshold
+            read._CHUNK = chunk
+        self.assertEqual(data[0].shape, (1000, 2))
+        self.assertEqual(list(data[0][:, 0]), list(range(1000)))
+        self.assertEqual(data[1].tolist(), [[1, 2, 3]])
+
+    def test_read_runs(self):
+        self.write_result("sub/s.rd1", "1 2\n3 4")
+        self.write_result("sub/s_2.rd1", "1 5\n3 6")
+        self.write_result("sub/s_10.rd1", "1 7\n3 8")
+        self.write_result("sub/t_1.rd1", "1 7")
+        run_ids, data = read.read_runs(self.tmp.name, "sub/s", ".rd1")
+        self.assertEqual(run_ids, ["0", "2", "10"])
+        self.assertEqual(data[:, 1, 1].tolist(), [4, 6, 8])
+        runs = read.split_run_ids(["sub/s", "sub/s_2", "sub/t_1"])
+        self.assertEqual(runs["sub/t_1"], {"0": "sub/t_1"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import os
+import time
+import asyncio
+import tempfile
+import fakecst
+from pycst import runner
+
+
+class tests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.exe = fakecst.install(self.tmp.name)
+
+    def tearDown(self):
+        os.environ.pop("FAKECST_DELAY", None)
+        os.environ.pop("FAKECST_SPANS", None)
+        self.tmp.cleanup()
+
+    def model(self, name):
+        folder = os.path.join(self.tmp.name, name)
+        os.makedirs(folder)
+        return fakecst.make_model(folder, ["a  1"], cst_path=self.exe)
+
+    def test_arun_streams(self):
+        model = self.model("m")
+        lines = []
+        returncode = asyncio.run(model.arun(
+            " -m -rebuild ",
+            on_line=lambda stream, line: lines.append((stream, line))))
+        self.assertEqual(returncode, 0)
+        self.assertEqual(
+            lines, [("stdout", "fakecst -m -rebuild " + model.FILENAME)])
+
+    def test_timeout_kills_tree(self):
+        start = time.time()
+        returncode = asyncio.run(runner.run_async(
+            ["sh", "-c", "sleep 30 & sleep 30"], timeout=0.5))
+        self.assertEqual(returncode, 1)
+        self.assertLess(time.time() - start, 5)
+
+    def test_cancel_reaps_process(self):
+        started = []
+
+        async def cancel():
+            task = asyncio.ensure_future(runner.run_async(
+                ["sh", "-c", "echo started; sleep 30"],
+                on_line=lambda stream, line: started.append(line)))
+            while not started:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            # nothing left running on the loop
+            return [t for t in asyncio.all_tasks()
+                    if t is not asyncio.current_task()]
+
+        start = time.time()
+        self.assertEqual(asyncio.run(cancel()), [])
+        self.assertLess(time.time() - start, 5)
+
+    def test_concurrent_models(self):
+        os.environ["FAKECST_DELAY"] = "0.5"
+        spans = os.path.join(self.tmp.name, "spans.jsonl")
+        os.environ["FAKECST_SPANS"] = spans
+        models = [self.model("m%d" % i) for i in range(3)]
+
+        async def run_all():
+            return await asyncio.gather(*[
+                m.acst_run_eigenmode(parameters_values={"a": i})
+                for i, m in enumerate(models)])
+
+        self.assertEqual(asyncio.run(run_all()), [0, 0, 0])
+        # the solver runs overlap instead of queueing
+        solves = [s for s in fakecst.spans(spans) if "-e" in s[2]]
+        self.assertEqual(len(solves), 3)
+        self.assertGreater(fakecst.max_overlap(solves), 1)
+        self.assertEqual(models[2].get_results(), {"Frequency": 2.0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import os
+import tempfile
+import fakecst
+from pycst.scheduler import Scheduler
+
+
+class tests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.exe = fakecst.install(self.tmp.name)
+        self.log = os.path.join(self.tmp.name, "log.jsonl")
+        os.environ["FAKECST_LOG"] = self.log
+        self.spans = os.path.join(self.tmp.name, "spans.jsonl")
+        os.environ["FAKECST_SPANS"] = self.spans
+
+    def tearDown(self):
+        del os.environ["FAKECST_LOG"]
+        del os.environ["FAKECST_SPANS"]
+        os.environ.pop("FAKECST_DELAY", None)
+        self.tmp.cleanup()
+
+    def model(self, name, exitcodes=()):
+        folder = os.path.join(self.tmp.name, name)
+        os.makedirs(folder)
+        if exitcodes:
+            with open(os.path.join(folder, "model.exitcodes"), "w") as file:
+                file.write("\n".join(str(c) for c in exitcodes))
+        return fakecst.make_model(folder, ["a  1"], cst_path=self.exe)
+
+    def test_retry_nolicense(self):
+        model = self.model("m", [3, 3, 0])
+        with Scheduler(retries=3, backoff=0.05) as scheduler:
+            job = scheduler.submit(model, "rebuild")
+        self.assertEqual(job.returncode, 0)
+        self.assertEqual(job.attempts, 3)
+
+    def test_give_up(self):
+        model = self.model("m", [3, 3, 3, 3])
+        with Scheduler(retries=2, backoff=0.01) as scheduler:
+            job = scheduler.submit(model, "eigenmode")
+        self.assertEqual(job.returncode, 3)
+        self.assertEqual(job.attempts, 3)
+
+    def test_no_retry_on_failure(self):
+        model = self.model("m", [1, 0])
+        with Scheduler(backoff=0.01) as scheduler:
+            job = scheduler.submit(model, "eigenmode")
+        self.assertEqual((job.returncode, job.attempts), (1, 1))
+
+    def test_limits(self):
+        os.environ["FAKECST_DELAY"] = "0.4"
+        models = [self.model("m%d" % i) for i in range(4)]
+        with Scheduler(limits={"eigenmode": 2}) as scheduler:
+            jobs = [scheduler.submit(m, "eigenmode") for m in models]
+        self.assertEqual([j.returncode for j in jobs], [0, 0, 0, 0])
+        # never more than the limit at once
+        self.assertLessEqual(
+            fakecst.max_overlap(fakecst.spans(self.spans)), 2)
+
+    def test_priority(self):
+        models = [self.model("m%d" % i) for i in range(3)]
+        scheduler = Scheduler(limits={"rebuild": 1})
+        for priority, model in zip([0, 5, 1], models):
+            scheduler.submit(model, "rebuild", priority=priority)
+        scheduler.start()
+        scheduler.join()
+        scheduler.shutdown()
+        order = [c[-1] for c in fakecst.invocations(self.log)]
+        expected = [models[i].FILENAME for i in [1, 2, 0]]
+        self.assertEqual(order, expected)
+
+    def test_busy_model(self):
+        os.environ["FAKECST_DELAY"] = "0.3"
+        models = [self.model("m0"), self.model("m1")]
+        scheduler = Scheduler(limits={"eigenmode": 2, "rebuild": 2})
+        jobs = [scheduler.submit(models[0], "eigenmode", priority=5),
+                scheduler.submit(models[0], "eigenmode", priority=4),
+                scheduler.submit(models[1], "rebuild"),
+                scheduler.submit(models[0], "rebuild", priority=9)]
+        scheduler.start()
+        scheduler.join()
+        scheduler.shutdown()
+        self.assertEqual([j.attempts for j in jobs], [1, 1, 1, 1])
+        # the three runs of m0 one after another
+        spans = [s for s in fakecst.spans(self.spans)
+                 if s[2][-1] == models[0].FILENAME]
+        self.assertEqual(len(spans), 3)
+        self.assertEqual(fakecst.max_overlap(spans), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import os
+import sys
+import time
+import tempfile
+import fakecst
+from pycst.session import Session, SessionPool
+
+COMMAND = [sys.executable,
+           os.path.join(os.path.dirname(__file__), "fakesession.py")]
+
+
+class tests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log = os.path.join(self.tmp.name, "log.jsonl")
+        os.environ["FAKECST_LOG"] = self.log
+        self.model = fakecst.make_model(self.tmp.name, ["a  1", "b  2"])
+
+    def tearDown(self):
+        del os.environ["FAKECST_LOG"]
+        self.tmp.cleanup()
+
+    def test_warm_session(self):
+        with SessionPool(COMMAND) as pool:
+            session = pool.attach(self.model)
+            self.assertEqual(self.model.cst_rebuild(), 0)
+            self.assertEqual(
+                self.model.cst_run_eigenmode(parameters_values={"a": 5}), 0)
+            self.assertTrue(session.ping())
+        calls = fakecst.invocations(self.log)
+        self.assertEqual(calls[0], ["<session>"])
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(session.starts, 1)
+        self.assertEqual(self.model.get_results(), {"Frequency": 7.0})
+
+    def test_restart_after_crash(self):
+        with Session(self.model, COMMAND) as session:
+            self.assertEqual(session.run("-crash"), 1)
+            self.assertEqual(session.starts, 2)
+            self.assertEqual(session.run("-m -rebuild"), 0)
+            self.assertEqual(session.starts, 3)
+
+    def test_timeout(self):
+        with Session(self.model, COMMAND) as session:
+            start = time.time()
+            self.assertEqual(session.run("-hang", timeout=0.5), 1)
+            self.assertLess(time.time() - start, 5)
+            self.assertFalse(session.alive())
+            self.assertTrue(session.ping())
+
+    def test_pool_size(self):
+        folder = os.path.join(self.tmp.name, "other")
+        os.makedirs(folder)
+        other = fakecst.make_model(folder, ["a  1"])
+        with SessionPool(COMMAND, size=1) as pool:
+            first = pool.get(self.model)
+            first.ping()
+            pool.get(other).ping()
+            self.assertFalse(first.alive())
+
+    def test_pool_size_attached(self):
+        folder = os.path.join(self.tmp.name, "other")
+        os.makedirs(folder)
+        other = fakecst.make_model(folder, ["a  1"])
+        with SessionPool(COMMAND, size=1) as pool:
+            first = pool.attach(self.model)
+            self.assertEqual(self.model.cst_rebuild(), 0)
+            second = pool.attach(other)
+            self.assertEqual(other.cst_rebuild(), 0)
+            self.assertIsNone(self.model.session)
+            self.assertIs(other.session, second)
+            # runs without restarting the evicted session
+            self.model.CST_PATH = fakecst.install(self.tmp.name)
+            self.assertEqual(self.model.cst_rebuild(), 0)
+            self.assertFalse(first.alive())
+            self.assertEqual(first.starts, 1)
+            self.assertTrue(second.alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
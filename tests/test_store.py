@@ -0,0 +1,124 @@
+import unittest
+import os
+import tempfile
+import time
+import socket
+import threading
+import subprocess
+import sys
+import importlib.util
+from unittest import mock
+import pandas as pd
+from pycst import write
+from pycst.store import ResultStore
+
+
+class tests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.csv = os.path.join(self.tmp.name, "Results.csv")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_csv(self):
+        return pd.read_csv(self.csv, delimiter=";", index_col=0)
+
+    def test_write_csv_appends(self):
+        for i in range(3):
+            write.write_csv(self.csv, pd.DataFrame([{"a": i, "f": i * 2.0}]))
+        df = self.read_csv()
+        self.assertEqual(list(df.index), [0, 1, 2])
+        self.assertEqual(list(df["f"]), [0, 2, 4])
+
+    def test_write_csv_columns(self):
+        write.write_csv(self.csv, pd.DataFrame([{"a": 1, "f": 2.0}]))
+        write.write_csv(self.csv, pd.DataFrame([{"f": 3.0, "a": 2}]))
+        write.write_csv(self.csv, pd.DataFrame([{"a": 3, "g": 4.0}]))
+        df = self.read_csv()
+        self.assertEqual(list(df["a"]), [1, 2, 3])
+        self.assertEqual(list(df["f"].fillna(-1)), [2, 3, -1])
+        self.assertEqual(list(df["g"].fillna(-1)), [-1, -1, 4])
+
+    def test_write_csv_concurrent(self):
+        def work(i):
+            write.write_csv(self.csv, pd.DataFrame([{"a": i}]))
+        threads = [threading.Thread(target=work, args=(i,)) for i in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        df = self.read_csv()
+        self.assertEqual(sorted(df["a"]), list(range(20)))
+        self.assertEqual(list(df.index), list(range(20)))
+
+    def test_write_csv_external_append(self):
+        write.write_csv(self.csv, pd.DataFrame([{"a": 1}]))
+        pd.DataFrame([{"a": 2}], index=[1]).to_csv(
+            self.csv, sep=";", mode="a", header=False)
+        write.write_csv(self.csv, pd.DataFrame([{"a": 3}]))
+        self.assertEqual(list(self.read_csv().index), [0, 1, 2])
+
+    def test_stale_lock(self):
+        dead = subprocess.Popen([sys.executable, "-c", "pass"])
+        dead.wait()
+        with open(self.csv + ".lock", "w") as file:
+            file.write("%s %d" % (socket.gethostname(), dead.pid))
+        start = time.monotonic()
+        write.write_csv(self.csv, pd.DataFrame([{"a": 1}]))
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertFalse(os.path.isfile(self.csv + ".lock"))
+        # a living owner keeps its lock
+        with open(self.csv + ".lock", "w") as file:
+            file.write("%s %d" % (socket.gethostname(), os.getpid()))
+        with self.assertRaises(TimeoutError):
+            with write.file_lock(self.csv, timeout=0.1):
+                pass
+
+    def test_store(self):
+        path = os.path.join(self.tmp.name, "store")
+        stores = [ResultStore(path, writer="w%d" % i) for i in range(2)]
+        stores[0].append({"a": 1, "f": 1.5})
+        stores[1].extend([{"a": 2, "f": 2.5}, {"a": 3}])
+        df = ResultStore(path).to_dataframe()
+        self.assertEqual(list(df["a"]), [1, 2, 3])
+        stores[0].export_csv(self.csv)
+        self.assertEqual(list(self.read_csv()["a"]), [1, 2, 3])
+        # moved aside by a crashed compact
+        shard = stores[1]._shard()
+        os.replace(shard, shard + ".1.compacting")
+        df = ResultStore(path).to_dataframe()
+        self.assertEqual(list(df["a"]), [1, 2, 3])
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "no pyarrow")
+    def test_compact(self):
+        store = ResultStore(os.path.join(self.tmp.name, "store"))
+        store.extend([{"a": 1}, {"a": 2}])
+        # torn by a crashed append
+        with open(store._shard(), "a") as file:
+            file.write('{"a": 9')
+        store.compact()
+        store.append({"a": 3})
+        self.assertEqual(list(store.to_dataframe()["a"]), [1, 2, 3])
+
+    def test_compact_failed(self):
+        path = os.path.join(self.tmp.name, "store")
+        store = ResultStore(path)
+        store.extend([{"a": 1}, {"a": 2}])
+
+        def to_parquet(self, filepath):
+            with open(filepath, "w") as file:
+                file.write("partial")
+            raise OSError("disk full")
+        with mock.patch.object(pd.DataFrame, "to_parquet", to_parquet):
+            with self.assertRaises(OSError):
+                store.compact()
+        self.assertFalse(os.path.exists(
+            os.path.join(path, "data.parquet.tmp")))
+        # the rows stay in the moved shard
+        self.assertEqual(list(store.to_dataframe()["a"]), [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
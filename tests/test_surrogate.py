@@ -0,0 +1,83 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import fakecst
+from pycst.surrogate import GaussianProcess, ResultInterpolator
+
+
+class tests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_gaussian_process(self):
+        X = np.linspace(0, 1, 8)[:, None]
+        gp = GaussianProcess().fit(X, np.sin(4 * X[:, 0]))
+        mean, std = gp.predict(X, return_std=True)
+        self.assertTrue(np.allclose(mean, np.sin(4 * X[:, 0]), atol=1e-3))
+        self.assertTrue((std < 1e-2).all())
+        mean, std = gp.predict([[0.5 / 7]], return_std=True)
+        self.assertAlmostEqual(mean[0], np.sin(2 / 7), places=2)
+        self.assertGreater(std[0], 0)
+
+    def test_interpolator(self):
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({"a": rng.uniform(0, 1, 300),
+                           "b": rng.uniform(1, 2, 300), "c": 7.0})
+        df["f"] = np.sin(3 * df["a"]) + df["b"] ** 2
+        df["g"] = np.where(df.index % 2, df["a"], np.nan)
+        df["returncode"] = 0
+        df.loc[0, ["returncode", "f"]] = [1, 1e3]
+        path = os.path.join(self.tmp.name, "Results.csv")
+        df.to_csv(path, sep=";")
+        interpolator = ResultInterpolator(path, ["a", "b", "c"])
+        self.assertEqual(interpolator.results, ["f", "g"])
+        point = {"a": 0.5, "b": 1.5, "c": 7}
+        mean, std = interpolator.predict(point, return_std=True)
+        self.assertAlmostEqual(mean["f"], np.sin(1.5) + 2.25, places=3)
+        self.assertAlmostEqual(mean["g"], 0.5, places=3)
+        self.assertLess(std["f"], 1e-2)
+        self.assertLessEqual(abs(mean["f"] - np.sin(1.5) - 2.25), 3 * std["f"])
+        means = interpolator.predict(pd.DataFrame([point, point]))
+        self.assertEqual(len(means), 2)
+        with self.assertRaises(ValueError):
+            interpolator.predict({"a": 1.5, "b": 1.5, "c": 7})
+        with self.assertRaises(ValueError):
+            interpolator.predict({"a": 0.5, "b": 1.5, "c": 8})
+
+    def test_interpolator_gap(self):
+        # L-shaped design, its bounding box has an empty corner
+        x = np.linspace(0, 1, 11)
+        df = pd.DataFrame({"a": np.r_[x, np.zeros(10)],
+                           "b": np.r_[np.zeros(11), x[1:]]})
+        df["f"] = df["a"] + df["b"]
+        interpolator = ResultInterpolator(df, ["a", "b"])
+        self.assertAlmostEqual(interpolator.max_distance, 0.1)
+        self.assertAlmostEqual(
+            interpolator.predict({"a": 0.55, "b": 0.05})["f"], 0.6, places=1)
+        with self.assertRaises(ValueError):
+            interpolator.predict({"a": 0.9, "b": 0.9})
+        interpolator.max_distance = 2
+        interpolator.predict({"a": 0.9, "b": 0.9})
+
+    def test_model_interpolator(self):
+        model = fakecst.make_model(
+            self.tmp.name, ["a  1", "b  2", "c  a+b"])
+        df = pd.DataFrame({"a": [0, 1, 0, 1], "b": [0, 0, 1, 1]})
+        df["c"] = df["a"] + df["b"]
+        df["Frequency"] = df["c"] + 1
+        df.to_csv(model.FILEPATH + model.csv_name, sep=";")
+        interpolator = model.get_interpolator()
+        self.assertEqual(interpolator.parameters, ["a", "b"])
+        self.assertEqual(interpolator.results, ["Frequency"])
+        mean = interpolator.predict({"a": 0.5, "b": 0.5})
+        self.assertAlmostEqual(mean["Frequency"], 2, places=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,230 @@
+import unittest
+import os
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+import fakecst
+from pycst.cache import ResultCache
+from pycst.sweep import SweepEngine, ParallelSweep, AdaptiveSweep, \
+    design_matrix
+from pycst.journal import SweepJournal, journal_path, mark_active, \
+    active_journal
+
+
+def step(points):
+    return [{"returncode": 0, "f": np.tanh((p["x"] - 0.3) * 50)}
+            for p in points]
+
+
+class tests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log = os.path.join(self.tmp.name, "log.jsonl")
+        os.environ["FAKECST_LOG"] = self.log
+        self.model = fakecst.make_model(
+            self.tmp.name, ["a  1", "b  2", "c  a+b"],
+            cst_path=fakecst.install(self.tmp.name))
+
+    def tearDown(self):
+        del os.environ["FAKECST_LOG"]
+        self.tmp.cleanup()
+
+    def test_design_matrix(self):
+        df = design_matrix([{"a": 1, "b": 2}, {"a": 3, "b": 4}])
+        self.assertEqual(list(df["b"]), [2, 4])
+        with self.assertRaises(ValueError):
+            design_matrix({"a": [1, 2], "b": [1]})
+
+    def test_run(self):
+        design = {"a": [10, 20, 30], "b": [1, 1, 2]}
+        df = SweepEngine(self.model).run(design)
+        self.assertEqual(list(df["returncode"]), [0, 0, 0])
+        self.assertEqual(list(df["Frequency"]), [11, 21, 32])
+        calls = fakecst.invocations(self.log)
+        # one call per point and one rebuild to recover parameters
+        self.assertEqual(len(calls), 4)
+        self.assertTrue(all("-par" in c for c in calls[:3]))
+        self.assertEqual(self.model.get_parameters()["a"]["value"], 1)
+
+    def test_run_seperate_import(self):
+        SweepEngine(self.model, combine=False).run({"a": [10, 20]})
+        # import and solve per point, no rebuild in between
+        self.assertEqual(len(fakecst.invocations(self.log)), 5)
+
+    def test_model_sweep(self):
+        df = self.model.sweep("b", [5, 6])
+        self.assertEqual(list(df["b"]), [5, 6])
+        self.assertEqual(len(fakecst.invocations(self.log)), 3)
+
+    def test_failure(self):
+        os.environ["FAKECST_EXITCODE"] = "1"
+        try:
+            df = SweepEngine(self.model).run({"a": [10]})
+        finally:
+            del os.environ["FAKECST_EXITCODE"]
+        self.assertEqual(list(df["returncode"]), [1])
+        self.assertNotIn("Frequency", df.columns)
+
+    def test_parallel(self):
+        os.environ["FAKECST_DELAY"] = "0.5"
+        sweeper = ParallelSweep(self.model, workers=3)
+        start = time.time()
+        try:
+            df = sweeper.run({"a": list(range(6))})
+        finally:
+            del os.environ["FAKECST_DELAY"]
+        # 3 seconds if sequential
+        self.assertLess(time.time() - start, 2.5)
+        self.assertEqual(list(df["Frequency"]), [i + 2.0 for i in range(6)])
+        self.assertEqual(len(fakecst.invocations(self.log)), 6)
+        self.assertEqual(self.model.get_parameters()["a"]["value"], 1)
+        self.assertTrue(os.path.isdir(sweeper.workspace + "2"))
+        sweeper.cleanup()
+        self.assertFalse(os.path.isdir(sweeper.workspace))
+
+    def test_parallel_resync(self):
+        extra = self.model.FILENAME[:-len(".cst")] + "/extra.txt"
+        with open(extra, "w") as file:
+            file.write("1")
+        sweeper = ParallelSweep(self.model, workers=1)
+        sweeper.run({"a": [5]})
+        copied = sweeper.workspace + "0/model/extra.txt"
+        self.assertTrue(os.path.isfile(copied))
+        os.remove(extra)
+        par = sweeper.workspace + "0/model/Model/3D/Model.par"
+        os.utime(par, (0, 0))
+        df = sweeper.run({"a": [6]})
+        self.assertEqual(list(df["Frequency"]), [8])
+        self.assertFalse(os.path.isfile(copied))
+        self.assertNotEqual(os.stat(par).st_mtime, 0)
+        # results are exported to the csv of the model
+        csv = pd.read_csv(self.model.FILEPATH + self.model.csv_name,
+                          delimiter=";", index_col=0)
+        self.assertEqual(list(csv["a"]), [5, 6])
+        sweeper.cleanup()
+
+    def test_parallel_shares_cache(self):
+        self.model.result_cache = ResultCache(
+            os.path.join(self.tmp.name, "cache.sqlite"))
+        SweepEngine(self.model).run({"a": [5, 6]})
+        calls = len(fakecst.invocations(self.log))
+        sweeper = ParallelSweep(self.model, workers=2, reuse=False)
+        df = sweeper.run({"a": [5, 6]})
+        self.assertEqual(list(df["Frequency"]), [7, 8])
+        self.assertEqual(len(fakecst.invocations(self.log)), calls)
+        self.assertEqual(self.model.result_cache.hits, 2)
+
+    def test_journal_resume(self):
+        with open(self.model.FILEPATH + "model.exitcodes", "w") as file:
+            file.write("0\n1\n0\n0")
+        df = self.model.sweep("a", [10, 20, 30], journal=True)
+        self.assertEqual(list(df["returncode"]), [0, 1, 0])
+        journal = SweepJournal.for_model(self.model)
+        self.assertEqual(journal.states(), {"done": 2, "failed": 1})
+        self.assertEqual(journal.rows([{"a": 30}])[0]["Frequency"], 32)
+        calls = len(fakecst.invocations(self.log))
+        df = self.model.sweep("a", [10, 20, 30, 40], journal=True)
+        self.assertEqual(list(df["Frequency"]), [12, 22, 32, 42])
+        # the failed and the new point, and the recovering rebuild
+        self.assertEqual(len(fakecst.invocations(self.log)), calls + 3)
+
+    def test_journal_after_crash(self):
+        journal = SweepJournal.for_model(self.model)
+        points = [{"b": 5}, {"b": 6}, {"b": 7}]
+        journal.start(points)
+        journal.running(points[0])
+        journal.finished(points[0], {"b": 5, "returncode": 0,
+                                     "Frequency": 6})
+        journal.running(points[1])
+        # the crash left the swept parameters and the backup
+        self.model.parhandler.backup()
+        fakecst.write_par(self.model.parhandler.path,
+                          ["a  1", "b  6", "c  a+b"])
+        model = type(self.model)(self.model.FILENAME,
+                                 cst_path=self.model.CST_PATH)
+        model.verbose = False
+        self.assertTrue(model.parhandler.has_backup())
+        df = SweepEngine(model).run({"b": [5, 6, 7]}, journal=journal.path)
+        self.assertEqual(list(df["Frequency"]), [6, 7, 8])
+        self.assertEqual(len(fakecst.invocations(self.log)), 3)
+        self.assertEqual(model.get_parameters()["b"]["value"], 2)
+        self.assertFalse(SweepJournal.unfinished(journal.path))
+
+    def test_journal_custom_path_after_crash(self):
+        path = os.path.join(self.tmp.name, "custom.jsonl")
+        journal = SweepJournal(path)
+        points = [{"b": 5}, {"b": 6}]
+        journal.start(points)
+        journal.running(points[0])
+        mark_active(self.model, path)
+        self.model.parhandler.backup()
+        fakecst.write_par(self.model.parhandler.path,
+                          ["a  1", "b  5", "c  a+b"])
+        # "n" would delete the backup of a sweep without journal
+        model = type(self.model)(self.model.FILENAME,
+                                 cst_path=self.model.CST_PATH,
+                                 autoanswer="n")
+        model.verbose = False
+        self.assertTrue(model.parhandler.has_backup())
+        SweepEngine(model).run({"b": [5, 6]}, journal=path)
+        self.assertEqual(model.get_parameters()["b"]["value"], 2)
+        self.assertIsNone(active_journal(model))
+
+    def test_journal_archived(self):
+        self.model.sweep("a", [10, 20], journal=True)
+        path = journal_path(self.model)
+        self.assertFalse(os.path.isfile(path))
+        archived = [f for f in os.listdir(self.model.FILEPATH)
+                    if f.startswith("model.sweep.") and f.endswith(".jsonl")]
+        self.assertEqual(len(archived), 1)
+        calls = len(fakecst.invocations(self.log))
+        # an unrelated later sweep gets no stale rows
+        self.model.sweep("a", [10, 20], journal=True)
+        self.assertEqual(len(fakecst.invocations(self.log)), calls + 3)
+
+    def test_adaptive_crossing(self):
+        df = AdaptiveSweep(step, "f", threshold=0, budget=30,
+                           tol=1e-3).run({"x": (0, 1)})
+        self.assertLessEqual(len(df), 30)
+        self.assertTrue(df["x"].is_monotonic_increasing)
+        below = df[df["f"] < 0]["x"].max()
+        above = df[df["f"] > 0]["x"].min()
+        # a uniform sweep needs 1000 points for this resolution
+        self.assertLess(above - below, 2e-3)
+        self.assertLess(below, 0.3)
+        self.assertGreater(above, 0.3)
+
+    def test_adaptive_steep(self):
+        df = AdaptiveSweep(step, "f", budget=60,
+                           tol=0.002).run({"x": (0, 1)})
+        # points gather where the result changes
+        steep = ((df["x"] > 0.2) & (df["x"] < 0.4)).sum()
+        self.assertGreater(steep, len(df) / 2)
+
+    def test_adaptive_nd(self):
+        def circle(points):
+            return [{"r": p["x"] ** 2 + p["y"] ** 2} for p in points]
+
+        sweep = AdaptiveSweep(circle, "r", threshold=1, budget=200,
+                              tol=0.01, initial=3)
+        df = sweep.run({"x": (0, 2), "y": (0, 2)})
+        self.assertLessEqual(len(df), 200)
+        near = (abs(df["r"] - 1) < 0.1).sum()
+        self.assertGreater(near, len(df) / 3)
+        with self.assertRaises(ValueError):
+            AdaptiveSweep(circle, "r", budget=5).run(
+                {"x": (0, 1), "y": (0, 1)})
+
+    def test_model_adaptive_sweep(self):
+        df = self.model.adaptive_sweep({"a": (0, 8)}, "Frequency",
+                                       threshold=5.5, budget=7)
+        self.assertEqual(len(df), 7)
+        self.assertEqual(list(df["Frequency"]), list(df["a"] + 2))
+        self.assertEqual(len(fakecst.invocations(self.log)), 8)
+        self.assertEqual(self.model.get_parameters()["a"]["value"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import os
+import tempfile
+import fakecst
+from pycst import telemetry
+
+
+class tests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.model = fakecst.make_model(
+            self.tmp.name, ["a  1", "b  2"],
+            cst_path=fakecst.install(self.tmp.name))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sweep_spans(self):
+        with telemetry.record() as sink:
+            self.model.sweep("a", [3, 4])
+        phases = {(s["name"], s["phase"]) for s in sink.spans}
+        for expected in [("sweep", "sweep"), ("cst_run_eigenmode", "solve"),
+                         ("_run", "solve"), ("_run", "rebuild"),
+                         ("cst_rebuild", "rebuild"),
+                         ("get_results", "result_io"),
+                         ("write_csv", "result_io"),
+                         ("get_parameters", "parameters")]:
+            self.assertIn(expected, phases)
+        runs = [s for s in sink.spans if s["name"] == "_run"]
+        self.assertEqual(len(runs), 3)
+        self.assertTrue(all(s["model"] == "model" for s in runs))
+        self.assertTrue(all(s["returncode"] == 0 for s in runs))
+        df = sink.summary()
+        self.assertAlmostEqual(
+            df[df["name"] == "sweep"]["share"].iloc[0], 1.0, places=3)
+        self.assertIn("cst_run_eigenmode", sink.report())
+        # nothing is recorded after the block
+        count = len(sink.spans)
+        self.model.cst_rebuild()
+        self.assertEqual(len(sink.spans), count)
+
+    def test_sinks(self):
+        path = os.path.join(self.tmp.name, "spans.jsonl")
+        jsonl = telemetry.JsonlSink(path)
+        prometheus = telemetry.PrometheusSink()
+        telemetry.add_sink(jsonl)
+        telemetry.add_sink(prometheus)
+        try:
+            self.model.cst_rebuild()
+            with self.assertRaises(KeyError):
+                with telemetry.span("lookup", phase="test"):
+                    raise KeyError("x")
+        finally:
+            telemetry.remove_sink(jsonl)
+            telemetry.remove_sink(prometheus)
+        spans = jsonl.read()
+        self.assertEqual([s["name"] for s in spans],
+                         ["_run", "cst_rebuild", "lookup"])
+        self.assertEqual(spans[0]["parent"], "cst_rebuild")
+        self.assertEqual(spans[2]["error"], "KeyError")
+        text = prometheus.text()
+        self.assertIn('pycst_span_seconds_count{name="_run",model="model",'
+                      'phase="rebuild"} 1', text)
+        self.assertIn('pycst_errors_total{name="lookup",model="",'
+                      'phase="test"} 1', text)
+
+    def test_without_sinks(self):
+        with telemetry.span("nothing") as span:
+            span["tag"] = 1
+        self.assertEqual(telemetry.summary([]).shape[0], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
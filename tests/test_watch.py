@@ -0,0 +1,88 @@
+import unittest
+import os
+import time
+import asyncio
+import tempfile
+import threading
+from pycst import write
+from pycst.watch import ResultWatcher
+
+
+class tests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = self.tmp.name + "/Result/"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_later(self, values, delay=0.1):
+        def work():
+            for name, value in values:
+                time.sleep(delay)
+                write.write_one_liner(self.path + name + ".rd0", value)
+        thread = threading.Thread(target=work)
+        thread.start()
+        return thread
+
+    def check_watch(self, inotify):
+        write.write_one_liner(self.path + "old.rd0", 0)
+        thread = self.write_later([("f1", 1), ("sub/f2", 2), ("f1", 3)])
+        with ResultWatcher(self.path, interval=0.05,
+                           inotify=inotify) as watcher:
+            records = list(watcher.watch(
+                stop=lambda r: r["value"] == 3, timeout=5))
+        thread.join()
+        self.assertEqual(
+            [(r["result"], r["value"]) for r in records],
+            [("f1", 1), ("sub/f2", 2), ("f1", 3)])
+
+    def test_watch_polling(self):
+        self.check_watch(inotify=False)
+
+    def test_watch_inotify(self):
+        self.check_watch(inotify=True)
+
+    def test_done_and_timeout(self):
+        watcher = ResultWatcher(self.path, interval=0.05, initial=True)
+        thread = self.write_later([("f", 1)], delay=0)
+        thread.join()
+        records = list(watcher.watch(done=lambda: True))
+        self.assertEqual(len(records), 1)
+        start = time.time()
+        self.assertEqual(list(watcher.watch(timeout=0.2)), [])
+        self.assertLess(time.time() - start, 1)
+        watcher.close()
+
+    def test_inotify_subfolders(self):
+        os.makedirs(self.path)
+        with ResultWatcher(self.path, interval=0.05) as watcher:
+            inotify = watcher._inotify
+            if inotify is None:
+                self.skipTest("no inotify")
+            watcher.changes()
+            os.makedirs(self.path + "a/b")
+            self.assertTrue(inotify.wait(1))
+            self.assertTrue(inotify.watching(self.path + "a/b"))
+            os.rmdir(self.path + "a/b")
+            while inotify.wait(0.1):
+                pass
+            self.assertFalse(inotify.watching(self.path + "a/b"))
+            self.assertTrue(inotify.watching(self.path + "a"))
+
+    def test_awatch(self):
+        thread = self.write_later([("f", 1), ("g", 2)])
+
+        async def collect():
+            watcher = ResultWatcher(self.path, interval=0.05)
+            self.addCleanup(watcher.close)
+            return [r["result"] async for r in watcher.awatch(
+                stop=lambda r: r["result"] == "g", timeout=5)]
+
+        self.assertEqual(asyncio.run(collect()), ["f", "g"])
+        thread.join()
+
+
+if __name__ == "__main__":
+    unittest.main()